@@ -1,13 +1,57 @@
 from django.contrib import admin
-from .models import StudentRequest, UserProfile
+from django.db.models import Q
+from . import jobs
+from .models import Affiliation, ArchivedRequest, Job, StudentRequest, UserProfile
+from .pagination import EstimatedCountPaginator
+from .search import matching_user_ids
+
+
+class AffiliationFilter(admin.SimpleListFilter):
+    # fixed choices: the default filter runs SELECT DISTINCT over the whole table
+    title = 'affiliation'
+    parameter_name = 'affiliation'
+
+    def lookups(self, request, model_admin):
+        return Affiliation.choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(affiliation=self.value())
+        return queryset
+
 
 @admin.register(StudentRequest)
 class StudentRequestAdmin(admin.ModelAdmin):
     list_display = ('studentid','user_name','contact_number', 'email','birth_date', 'college_program','year_level', 'affiliation', 'request','cost', 
                    'clearance_status', 'is_graduate', 'last_attended', 'created_at', 'request_purpose', 'request_status', 'eclearance_proof', 'payment_proof', 'claim_date')
-    search_fields = ('user__profile__first_name', 'user__profile__last_name', 'request', 
-                    'year_level', 'request_purpose')
-    list_filter = ('created_at', 'clearance_status', 'is_graduate', 'affiliation')
+    # Student ID prefix or name words, or the start of the document or
+    # purpose, or the year level; see get_search_results
+    search_fields = ('user__username', 'user__profile__first_name', 'user__profile__last_name',
+                     '^request', '^request_purpose', '=year_level')
+    search_help_text = 'Student ID, first/middle/last name, year level, or the start of the document or purpose'
+    list_filter = ('request_status', 'created_at', 'clearance_status', 'is_graduate', AffiliationFilter)
+    # every column below reads the user and profile: join them once, not per row
+    list_select_related = ('user__profile',)
+    # newest first through api_req_created_idx
+    ordering = ('-created_at', '-id')
+    paginator = EstimatedCountPaginator
+    # no second COUNT(*) of the whole table next to filtered results
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        term = search_term.strip()
+        # the matching students come from an index, then their requests from
+        # api_req_user_created_idx; the request columns have UPPER() indexes
+        # for these lookups (migration 0023). A UNION, not an OR: an OR with
+        # the students' subquery can't use the indexes and scans the table.
+        by_student = queryset.filter(user_id__in=matching_user_ids(term, using=queryset.db))
+        by_request = queryset.filter(
+            Q(request__istartswith=term) | Q(request_purpose__istartswith=term) | Q(year_level__iexact=term)
+        )
+        ids = by_student.order_by().values('pk').union(by_request.order_by().values('pk'))
+        return queryset.filter(pk__in=ids), False
 
     def user_name(self, obj):
         return f"{obj.user.profile.first_name} {obj.user.profile.middle_name} {obj.user.profile.last_name} {obj.user.profile.extension_name}".strip()
@@ -15,7 +59,7 @@ class StudentRequestAdmin(admin.ModelAdmin):
     def birth_date(self, obj):
         return obj.user.profile.birth_date
     def studentid(self, obj):
-        return obj.user.profile.user
+        return obj.user.username
     def contact_number(self, obj):
         return obj.user.profile.contact_number
     def email(self, obj):
@@ -27,8 +71,11 @@ class StudentRequestAdmin(admin.ModelAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('get_full_name', 'user', 'contact_number', 'email','birth_date', 'college_program','created_at')
-    search_fields = ('first_name', 'middle_name', 'last_name', 'email')
+    search_fields = ('first_name', 'middle_name', 'last_name', 'user__email')
     list_filter = ('created_at',)
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def email(self, obj):
         return obj.user.email
@@ -37,4 +84,37 @@ class UserProfileAdmin(admin.ModelAdmin):
         if obj.extension_name:
             full_name += f" {obj.extension_name}"
         return full_name.strip()
-    get_full_name.short_description = 'Full Name'
\ No newline at end of file
+    get_full_name.short_description = 'Full Name'
+
+
+@admin.register(ArchivedRequest)
+class ArchivedRequestAdmin(admin.ModelAdmin):
+    # filled by `manage.py archive_requests` only
+    list_display = ('id', 'student_id', 'student_name', 'college_program', 'request', 'cost', 'created_at', 'released_at', 'archived_at')
+    search_fields = ('=student_id',)
+    search_help_text = 'Student ID'
+    ordering = ('-released_at', '-id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'task')
+    ordering = ('run_at', 'id')
+    readonly_fields = ('task', 'payload', 'status', 'run_at', 'attempts', 'last_error', 'created_at')
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected failed jobs')
+    def retry(self, request, queryset):
+        self.message_user(request, f"{jobs.retry(queryset)} jobs queued again.")
@@ -0,0 +1,155 @@
+import os
+import posixpath
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .bulk import ROW_FIELDS, delete_rows, publish_rows
+from .conditional import requests_changed
+from .images import recompress
+from .models import ArchivedRequest, RequestStatus, RequestTombstone, StudentRequest
+from .storage import get_archive_storage, proof_storage
+from .sync import prune_tombstones
+
+
+ARCHIVE_AFTER_DAYS = getattr(settings, 'ARCHIVE_RELEASED_AFTER_DAYS', 365)
+
+PROOF_FIELDS = ('eclearance_proof', 'payment_proof')
+THUMB_FIELDS = ('eclearance_proof_thumb', 'payment_proof_thumb')
+# StudentRequest columns an ArchivedRequest keeps as they are
+COPIED_FIELDS = (
+    'year_level', 'affiliation', 'is_graduate', 'last_attended', 'clearance_status',
+    'request', 'request_purpose', 'cost', 'claim_date', 'created_at', 'released_at',
+)
+# the student as they were when the request was archived
+STUDENT_FIELDS = (
+    'user__username', 'user__profile__first_name', 'user__profile__middle_name',
+    'user__profile__last_name', 'user__profile__extension_name', 'user__profile__college_program',
+)
+
+
+def archivable(older_than_days=None):
+    """Released requests whose release is older than the archive age."""
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    return StudentRequest.objects.filter(request_status=RequestStatus.RELEASED, released_at__lt=cutoff)
+
+
+def student_name(row):
+    # the Student ID when there's no profile
+    if row['user__profile__first_name'] is None:
+        return row['user__username']
+    parts = ('first_name', 'middle_name', 'last_name', 'extension_name')
+    return ' '.join(row[f'user__profile__{part}'] for part in parts if row[f'user__profile__{part}'])
+
+
+class ColdCopier:
+    """
+    Copies one batch's hot proofs into the cold store, optionally
+    recompressed. Shared proofs are copied once per batch, and copying the
+    same content again (a later batch, or a rerun after a rolled-back one)
+    lands on the same content-addressed name.
+    """
+
+    def __init__(self, quality=None):
+        self.storage = get_archive_storage()
+        self.quality = quality
+        self.copied = {}
+        self.missing = 0
+
+    def copy(self, field, name):
+        if not name:
+            return ''
+        if name not in self.copied:
+            try:
+                with proof_storage.open(name, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                self.missing += 1
+                self.copied[name] = ''
+                return ''
+            if self.quality:
+                data = recompress(data, self.quality)
+            # the field's directory, whatever the hot name's layout
+            upload_to = StudentRequest._meta.get_field(field).upload_to
+            self.copied[name] = self.storage.save(posixpath.join(upload_to, posixpath.basename(name)), ContentFile(data))
+        return self.copied[name]
+
+
+def archive_batch(requests, after_id, batch_size, copier):
+    """
+    Move up to batch_size of `requests` with id > after_id into the archive,
+    in one transaction: the archive rows, tombstones and counters commit
+    together with the delete, or not at all. Rows someone else holds locked
+    are skipped and left for the next run.
+
+    Returns None once nothing is left, else (last id looked at, number
+    archived, names of the hot files the archived rows referenced). The hot
+    files stay until release_hot_files(), after the commit.
+    """
+    fields = (*ROW_FIELDS, *COPIED_FIELDS, *PROOF_FIELDS, *THUMB_FIELDS, *STUDENT_FIELDS)
+    with transaction.atomic():
+        rows = list(
+            requests.filter(id__gt=after_id).order_by('id')
+            .select_for_update(of=('self',), skip_locked=True)
+            .values(*fields)[:batch_size]
+        )
+        if not rows:
+            return None
+        ArchivedRequest.objects.bulk_create([
+            ArchivedRequest(
+                id=row['id'],
+                user_id=row['user_id'],
+                student_id=row['user__username'],
+                student_name=student_name(row),
+                college_program=row['user__profile__college_program'],
+                **{name: row[name] for name in COPIED_FIELDS},
+                **{field: copier.copy(field, row[field]) for field in PROOF_FIELDS},
+            )
+            for row in rows
+        ])
+        # to the clients and the counters, the same as a bulk delete (bulk.py)
+        RequestTombstone.objects.bulk_create(
+            [RequestTombstone(request_id=row['id'], user_id=row['user_id']) for row in rows]
+        )
+        counters.rows_changed(rows, [None] * len(rows))
+        requests_changed(row['user_id'] for row in rows)
+        delete_rows([row['id'] for row in rows])
+        prune_tombstones()
+        publish_rows('deleted', rows)
+
+    hot_names = {row[field] for row in rows for field in (*PROOF_FIELDS, *THUMB_FIELDS) if row[field]}
+    return rows[-1]['id'], len(rows), hot_names
+
+
+def release_hot_files(names, grace_seconds):
+    """
+    Delete the hot copies of `names` no request references any more. As in
+    dedupe_proofs, a file touched within the grace period stays: an identical
+    upload may be about to reference it. Files a crash leaves behind here
+    are collected by dedupe_proofs. Returns the bytes freed.
+    """
+    names = list(names)
+    referenced = set()
+    for field in (*PROOF_FIELDS, *THUMB_FIELDS):
+        referenced.update(
+            StudentRequest.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True)
+        )
+    cutoff = time.time() - grace_seconds
+    freed = 0
+    for name in set(names) - referenced:
+        path = proof_storage.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime > cutoff:
+            continue
+        os.unlink(path)
+        freed += stat.st_size
+    return freed
@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import json
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, TooManyFieldsSent, TooManyFilesSent
+from django.http import HttpResponse
+from django.http.multipartparser import MultiPartParserError
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException, AuthenticationFailed, MethodNotAllowed, NotAuthenticated, ParseError, Throttled,
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .authentication import ClaimsJWTAuthentication
+from .metrics import TimedJSONRenderer
+
+
+renderer = TimedJSONRenderer()
+
+# Under ASGI every in-flight request runs its ORM calls on its own thread, so
+# every one opens its own database connection. Bound how many views run at
+# once per process; the rest wait on the event loop, holding nothing.
+DB_CONCURRENCY = getattr(settings, 'ASYNC_API_DB_CONCURRENCY', 20)
+
+_slots = weakref.WeakKeyDictionary()
+
+
+def db_slots():
+    # a semaphore belongs to one event loop (the test client starts a new one per request)
+    loop = asyncio.get_running_loop()
+    if loop not in _slots:
+        _slots[loop] = asyncio.Semaphore(DB_CONCURRENCY)
+    return _slots[loop]
+
+
+def render(data, status=200):
+    # same bytes DRF's Response would send
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+async def authenticate(request, allow_query_token=False, stateless=False):
+    """
+    JWT authentication for async views, same rules as the DRF views. Only the
+    user lookup touches the database, and stateless=True (read-only views)
+    skips it: the user is built from the token claims instead (see
+    api.authentication). EventSource can't send an Authorization header, so
+    the event stream may pass the access token as ?token=.
+    """
+    stateless = stateless and settings.JWT_STATELESS_READS
+    authenticator = ClaimsJWTAuthentication() if stateless else JWTAuthentication()
+    raw_token = request.GET.get('token') if allow_query_token else None
+    if raw_token is None:
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        if stateless:
+            # a cache lookup for the denylist, no database
+            return authenticator.get_user(validated)
+        # the token checks above hold no connection, only the lookup waits for one
+        async with db_slots():
+            return await sync_to_async(authenticator.get_user)(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def async_api_view(methods, stateless=False, throttle_classes=()):
+    """
+    Async counterpart of @api_view + IsAuthenticated + @throttle_classes for
+    plain Django views: checks the method, the Accept header, the JWT and
+    the throttles, sets request.user, and sends any APIException (raised
+    here or by the view) through DRF's EXCEPTION_HANDLER. The view runs on
+    the event loop, so a slow client holds a coroutine instead of a worker
+    thread, and only the view takes one of the DB_CONCURRENCY slots: a
+    request turned away here never waits for one. stateless=True is for
+    read-only views: request.user is a ClaimsUser (id, username, is_staff
+    only). Responses are JSON only.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                negotiate(request)
+                user = await authenticate(request, stateless=stateless)
+                if user is None or not user.is_active:
+                    raise NotAuthenticated()
+                request.user = user
+                throttle(request, view, throttle_classes)
+                async with db_slots():
+                    return await view(request, *args, **kwargs)
+            except APIException as exc:
+                return handle_exception(exc, request, view, methods, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def negotiate(request):
+    # raises NotAcceptable (406) for an Accept header JSON doesn't satisfy
+    negotiator = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+    negotiator.select_renderer(Request(request), [renderer])
+
+
+def throttle(request, view, throttle_classes):
+    """Same as APIView.check_throttles: every throttle counts, the longest wait is reported."""
+    waits = []
+    for throttle_class in throttle_classes:
+        instance = throttle_class()
+        if not instance.allow_request(request, view):
+            waits.append(instance.wait())
+    if waits:
+        raise Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+def handle_exception(exc, request, view, methods, args, kwargs):
+    """The error response an APIView would send for exc."""
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        # JWTAuthentication's header, as APIView.get_authenticate_header sends it
+        exc.auth_header = 'Bearer realm="api"'
+    context = {'view': view, 'args': args, 'kwargs': kwargs, 'request': request}
+    response = api_settings.EXCEPTION_HANDLER(exc, context)
+    if response is None:
+        raise exc
+    rendered = render(response.data, status=response.status_code)
+    for header, value in response.items():
+        # Retry-After, WWW-Authenticate; the body's type is render()'s
+        if header.lower() != 'content-type':
+            rendered[header] = value
+    if isinstance(exc, MethodNotAllowed):
+        rendered['Allow'] = ', '.join(methods)
+    return rendered
+
+
+def parse_body(request):
+    """request.data for the async views; a body that can't be parsed raises ParseError, a 400 as in DRF."""
+    try:
+        if request.content_type == 'application/json':
+            return json.loads(request.body or b'{}')
+        # multipart/urlencoded: fields and files in one dict, like DRF's request.data
+        data = request.POST.copy()
+        data.update(request.FILES)
+        return data
+    except ValueError as e:
+        raise ParseError(f'JSON parse error - {e}')
+    except MultiPartParserError as e:
+        raise ParseError(f'Multipart form parse error - {e}')
+    except (RequestDataTooBig, TooManyFieldsSent, TooManyFilesSent) as e:
+        # over DATA_UPLOAD_MAX_MEMORY_SIZE or the field/file limits
+        raise ParseError(str(e))
+
+
+async def request_data(request):
+    """
+    The body is already buffered by the ASGI handler; parsing it (which may
+    spill big uploads to disk) happens off the event loop. No DB access, so
+    it doesn't need the ORM's thread.
+    """
+    return await sync_to_async(parse_body, thread_sensitive=False)(request)
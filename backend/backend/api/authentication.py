@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Same cache as the profile cache: shared (REDIS_URL) or per process
+REVOCATION_CACHE_ALIAS = getattr(settings, 'JWT_REVOCATION_CACHE_ALIAS', 'default')
+# When the user logged in: set on the refresh token and copied into every
+# access token refreshed from it, so a revocation reaches those too
+AUTH_TIME_CLAIM = 'auth_time'
+
+
+def revocation_key(user_id):
+    return f"api:jwt-revoked:{user_id}"
+
+
+def revoke_tokens(user_id):
+    """
+    Rejects the user's tokens from logins before now on the stateless path,
+    and refreshing them. Kept for one refresh token lifetime: until then an
+    old refresh token could still mint access tokens with the old claims.
+    Whole seconds, like the token's iat: a login in the same second still
+    passes.
+    """
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME).total_seconds()
+    caches[REVOCATION_CACHE_ALIAS].set(revocation_key(user_id), int(time.time()), lifetime)
+
+
+def is_revoked(validated_token):
+    revoked_at = caches[REVOCATION_CACHE_ALIAS].get(revocation_key(validated_token[api_settings.USER_ID_CLAIM]))
+    if revoked_at is None:
+        return False
+    # tokens issued before auth_time was added only have their own iat
+    issued_at = validated_token.get(AUTH_TIME_CLAIM, validated_token.get('iat', 0))
+    return issued_at < revoked_at
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built from the access token claims (see MyTokenObtainPairSerializer):
+    id, username and is_staff, no database row behind it.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query, for read-only
+    endpoints. The signature and expiry are still verified; a deactivated or
+    demoted user keeps access until revoke_tokens() runs for them (the User
+    post_save signal does) or the token expires. Endpoints that write should
+    keep the DB-backed JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if is_revoked(validated_token):
+            raise AuthenticationFailed("Token has been revoked.", code='token_revoked')
+        return ClaimsUser(validated_token)
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, jobs
+from .conditional import requests_changed
+from .events import build_event_from_values
+from .models import COUNTED_FIELDS, RequestStatus, RequestTombstone, StudentRequest
+from .signals import publish_on_commit
+from .sync import prune_tombstones
+
+
+# target status -> statuses a request may move from in a bulk transition
+STATUS_TRANSITIONS = {
+    RequestStatus.TO_PAY: (RequestStatus.PENDING,),
+    RequestStatus.CONFIRMED: (RequestStatus.TO_PAY,),
+    RequestStatus.RELEASED: (RequestStatus.CONFIRMED,),
+    RequestStatus.REJECTED: (RequestStatus.PENDING, RequestStatus.TO_PAY),
+}
+
+EVENT_FIELDS = ('id', 'user_id', 'request_status', 'claim_date', 'cost')
+# what the events and the counters need from each row
+ROW_FIELDS = tuple(dict.fromkeys(EVENT_FIELDS + COUNTED_FIELDS))
+
+
+def publish_rows(action, rows):
+    for row in rows:
+        event = build_event_from_values(
+            action, row['id'], row['request_status'], row['claim_date'], row['cost']
+        )
+        publish_on_commit(event, row['user_id'])
+
+
+def delete_rows(ids):
+    """
+    One DELETE for the ids. Not QuerySet.delete(): with the delete signal
+    receivers connected the Collector loads every row and sends the signals
+    one by one. Nothing references StudentRequest, so there is no cascade to
+    skip; the callers do the tombstones, counters and events themselves.
+    """
+    queryset = StudentRequest.objects.filter(id__in=ids)
+    return queryset._raw_delete(queryset.db)
+
+
+def report(requested_ids, found, done, done_label, skipped_label):
+    """
+    Per-id outcome. With an explicit id list every id gets a line (including
+    ones that don't exist); with a filter only the matched rows are reported.
+    """
+    ids = requested_ids if requested_ids is not None else sorted(found)
+    results = []
+    for pk in ids:
+        if pk in done:
+            result = done_label
+        elif pk in found:
+            result = skipped_label
+        else:
+            result = 'not_found'
+        results.append({'id': pk, 'result': result})
+    return results
+
+
+def bulk_transition(queryset, requested_ids, new_status, changes):
+    """
+    Move every selected request that is in an allowed source status to
+    new_status in one UPDATE. `changes` holds extra columns to set
+    (cost, claim_date). Runs in a single transaction with the rows locked.
+    """
+    allowed_from = STATUS_TRANSITIONS[new_status]
+    with transaction.atomic():
+        rows = list(queryset.select_for_update(of=('self',)).values(*ROW_FIELDS))
+        found = {row['id'] for row in rows}
+        eligible = [row for row in rows if row['request_status'] in allowed_from]
+        done = {row['id'] for row in eligible}
+
+        if done:
+            now = timezone.now()
+            # update() skips StudentRequest.save(), which keeps released_at
+            changes = {**changes, 'released_at': now if new_status == RequestStatus.RELEASED else None}
+            StudentRequest.objects.filter(id__in=done).update(
+                request_status=new_status,
+                # update() skips auto_now, the change feed needs it bumped
+                updated_at=now,
+                **changes,
+            )
+            before = [dict(row) for row in eligible]
+            for row in eligible:
+                row['request_status'] = new_status
+                row.update(changes)
+            counters.rows_changed(before, eligible)
+            requests_changed(row['user_id'] for row in eligible)
+            jobs.enqueue_many(
+                'request_status_email', [{'request_id': row['id'], 'status': new_status} for row in eligible]
+            )
+            publish_rows('updated', eligible)
+
+    return len(done), report(requested_ids, found, done, 'updated', 'invalid_transition')
+
+
+def bulk_delete(queryset, requested_ids):
+    """
+    Delete every selected request in one transaction with set-based SQL:
+    a single INSERT for all tombstones and a single DELETE for the rows.
+    """
+    with transaction.atomic():
+        rows = list(queryset.select_for_update(of=('self',)).values(*ROW_FIELDS))
+        done = {row['id'] for row in rows}
+        if done:
+            RequestTombstone.objects.bulk_create(
+                [RequestTombstone(request_id=row['id'], user_id=row['user_id']) for row in rows]
+            )
+            # programs are looked up before the rows go
+            counters.rows_changed(rows, [None] * len(rows))
+            requests_changed(row['user_id'] for row in rows)
+            delete_rows(done)
+            prune_tombstones()
+            publish_rows('deleted', rows)
+
+    return len(done), report(requested_ids, done, done, 'deleted', 'not_found')
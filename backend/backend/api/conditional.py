@@ -0,0 +1,96 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .media import signing_period
+
+
+# Same cache as the profile cache: shared (REDIS_URL) or per process
+CHANGES_CACHE_ALIAS = getattr(settings, 'REQUEST_CHANGES_CACHE_ALIAS', 'default')
+# Upper bound on staleness when a per-process cache misses a change made in
+# another worker; None keeps a list's change token until its next write
+CHANGES_TIMEOUT = getattr(settings, 'REQUEST_CHANGES_TIMEOUT', None)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+def changes_key(scope):
+    return f"api:request-changes:{scope}"
+
+
+def requests_changed(user_ids):
+    """
+    Gives every request list a write shows up in a new change token: the
+    students' own (keyed by user id) and the staff's (''). Again after
+    commit: a poll between now and the commit could have stored the old rows
+    under the new token, and a write committing late must still move it.
+    """
+    keys = [changes_key('')] + [changes_key(user_id) for user_id in set(user_ids)]
+
+    def bump():
+        caches[CHANGES_CACHE_ALIAS].set_many({key: uuid.uuid4().hex for key in keys}, CHANGES_TIMEOUT)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+async def changes_token(scope):
+    cache = caches[CHANGES_CACHE_ALIAS]
+    key = changes_key(scope)
+    token = await cache.aget(key)
+    if token is None:
+        # first poll since a restart, an eviction or the timeout: a new
+        # token only costs the clients one full response
+        token = uuid.uuid4().hex
+        if not await cache.aadd(key, token, CHANGES_TIMEOUT):
+            token = await cache.aget(key) or token
+    return token
+
+
+async def requests_validators(request):
+    """
+    ETag for a get_requests response, from the caller's request list's
+    change token (requests_changed) instead of serializing the rows or
+    aggregating over them.
+
+    The etag also covers the caller's scope, every query param except
+    `since` (so a change-feed poll with a newer token still matches when
+    nothing changed), the host (proof URLs are absolute) and the media
+    signing period (proof URL signatures roll over with it). There is no
+    Last-Modified: a write committing after a later one has the older
+    updated_at, so If-Modified-Since would miss it.
+    """
+    scope = '' if request.user.is_staff else request.user.pk
+    params = sorted(
+        (key, value) for key, value in request.GET.lists() if key != 'since'
+    )
+    return make_etag(
+        request.user.pk, request.user.is_staff, request.get_host(), params, signing_period(),
+        await changes_token(scope),
+    )
+
+
+def not_modified(request, etag, last_modified=None):
+    """Returns the 304 (or 412) response to send, or None to build the real one."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Responses differ per user, make sure shared caches revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    return response
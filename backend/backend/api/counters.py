@@ -0,0 +1,257 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import COUNTED_FIELDS, RequestCounter, RequestStatus, StudentRequest, UserProfile
+
+
+# Requests of students without a profile (or a program) count under ''
+NO_PROGRAM = ''
+# Rows each counter is split across (see RequestCounter)
+COUNTER_SLOTS = getattr(settings, 'REQUEST_COUNTER_SLOTS', 16)
+
+
+def day(moment):
+    return timezone.localdate(moment).isoformat()
+
+
+class ProgramOf(int):
+    """
+    A program counter key given as the user id whose program it is; apply()
+    looks the program up inside the upsert, saving a query per write.
+    """
+
+
+def programs_of(user_ids):
+    programs = dict(
+        UserProfile.objects.filter(user_id__in=set(user_ids)).values_list('user_id', 'college_program')
+    )
+    return {user_id: programs.get(user_id) or NO_PROGRAM for user_id in user_ids}
+
+
+def contribution(row, program, sign=1):
+    """What one request adds to the counters; `row` maps COUNTED_FIELDS."""
+    deltas = Counter({
+        ('status', row['request_status']): sign,
+        ('program', program): sign,
+        ('created', day(row['created_at'])): sign,
+    })
+    if row['released_at'] is not None:
+        deltas['released', day(row['released_at'])] += sign
+    return deltas
+
+
+def slot():
+    """
+    The counter slot to write. Outside a transaction any will do; inside
+    one every write goes to the connection's own slot, so a transaction
+    never holds rows of two slots that another one locks the other way round.
+    """
+    if not connection.in_atomic_block:
+        return random.randrange(COUNTER_SLOTS)
+    if getattr(connection, 'counter_slot', None) is None:
+        connection.counter_slot = random.randrange(COUNTER_SLOTS)
+    return connection.counter_slot
+
+
+def apply(deltas):
+    """
+    Add {(kind, key): delta} to the counters in one statement, inside the
+    caller's transaction, so a rollback takes the counts back along with the
+    change they describe. An upsert: the first count of a new day or program
+    can't race another writer. Rows go in a fixed order so two writers lock
+    them in the same order.
+    """
+    quote = connection.ops.quote_name
+    table = quote(RequestCounter._meta.db_table)
+    kind_column, key_column, slot_column, count_column = quote('kind'), quote('key'), quote('slot'), quote('count')
+    row_slot = slot()
+    values, params = [], []
+    for (kind, key), delta in sorted(deltas.items(), key=str):
+        if not delta:
+            continue
+        if isinstance(key, ProgramOf):
+            values.append(
+                f"(%s, COALESCE((SELECT {quote('college_program')} FROM {quote(UserProfile._meta.db_table)} "
+                f"WHERE {quote('user_id')} = %s), %s), %s, %s)"
+            )
+            params += [kind, int(key), NO_PROGRAM, row_slot, delta]
+        else:
+            values.append("(%s, %s, %s, %s)")
+            params += [kind, key, row_slot, delta]
+    if not values:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({kind_column}, {key_column}, {slot_column}, {count_column}) "
+            f"VALUES {', '.join(values)} "
+            f"ON CONFLICT ({kind_column}, {key_column}, {slot_column}) "
+            f"DO UPDATE SET {count_column} = {table}.{count_column} + EXCLUDED.{count_column}",
+            params,
+        )
+
+
+def snapshot(instance):
+    return {name: getattr(instance, name) for name in COUNTED_FIELDS}
+
+
+def request_saving(instance):
+    """pre_save: an update needs the stored values to diff against."""
+    loaded = getattr(instance, 'loaded_counts', None) or {}
+    if instance.pk is not None and any(name not in loaded for name in COUNTED_FIELDS):
+        # built in memory or loaded with deferred fields
+        instance.loaded_counts = StudentRequest.objects.filter(pk=instance.pk).values(*COUNTED_FIELDS).first()
+
+
+def request_saved(instance, created):
+    """post_save: count a new request, or move a changed one between counters."""
+    old = None if created else instance.loaded_counts
+    new = instance.loaded_counts = snapshot(instance)
+    if old == new:
+        return
+    if old is None or old['user_id'] == new['user_id']:
+        # the program deltas of a same-user change cancel out
+        program = ProgramOf(new['user_id'])
+        deltas = contribution(new, program)
+        if old is not None:
+            deltas.update(contribution(old, program, -1))
+    else:
+        programs = programs_of([old['user_id'], new['user_id']])
+        deltas = contribution(new, programs[new['user_id']])
+        deltas.update(contribution(old, programs[old['user_id']], -1))
+    apply(deltas)
+
+
+def request_deleting(instance, origin):
+    """
+    pre_delete: when the request goes because its user does, the profile
+    may be deleted first, so look the program up while it's there.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not StudentRequest:
+        instance.counted_program = programs_of([instance.user_id])[instance.user_id]
+
+
+def request_deleted(instance):
+    program = getattr(instance, 'counted_program', None)
+    apply(contribution(snapshot(instance), ProgramOf(instance.user_id) if program is None else program, -1))
+
+
+def rows_changed(before, after):
+    """
+    Bulk paths (bulk.py): `before` and `after` are lists of COUNTED_FIELDS
+    dicts for the same requests, None on one side for created/deleted rows.
+    """
+    programs = programs_of([row['user_id'] for row in (*before, *after) if row is not None])
+    deltas = Counter()
+    for old, new in zip(before, after):
+        if old is not None:
+            deltas.update(contribution(old, programs[old['user_id']], -1))
+        if new is not None:
+            deltas.update(contribution(new, programs[new['user_id']]))
+    apply(deltas)
+
+
+def profile_saving(instance):
+    if instance.pk is not None and not hasattr(instance, 'loaded_program'):
+        instance.loaded_program = (
+            UserProfile.objects.filter(pk=instance.pk).values_list('college_program', flat=True).first()
+        )
+
+
+def profile_saved(instance):
+    """
+    post_save: move the student's requests to their new program. A new
+    profile moves them off NO_PROGRAM. (Deleting a profile on its own is
+    left to reconcile_counters: when the user goes with it, the requests'
+    own deletes already take them off the program.)
+    """
+    old_program = getattr(instance, 'loaded_program', None)
+    instance.loaded_program = instance.college_program
+    program_changed(instance.user_id, old_program, instance.college_program)
+
+
+def program_changed(user_id, old_program, new_program):
+    old_program, new_program = old_program or NO_PROGRAM, new_program or NO_PROGRAM
+    if old_program == new_program:
+        return
+    count = StudentRequest.objects.filter(user_id=user_id).count()
+    if count:
+        apply({('program', old_program): -count, ('program', new_program): count})
+
+
+def compute():
+    """Every counter from scratch, straight from the requests table."""
+    requests = StudentRequest.objects.order_by()
+    counts = Counter()
+    for status, count in requests.values_list('request_status').annotate(n=Count('id')):
+        counts['status', status] = count
+    for program, count in requests.values_list('user__profile__college_program').annotate(n=Count('id')):
+        counts['program', program or NO_PROGRAM] += count
+    tz = timezone.get_current_timezone()
+    for kind, field in (('created', 'created_at'), ('released', 'released_at')):
+        dated = requests.filter(**{f'{field}__isnull': False})
+        for date, count in dated.values_list(TruncDate(field, tzinfo=tz)).annotate(n=Count('id')):
+            counts[kind, date.isoformat()] = count
+    return counts
+
+
+def rebuild(dry_run=False):
+    """
+    Replace the counters with compute(). Returns {(kind, key): (stored,
+    actual)} for every counter that was off; dry_run only reports them. Writers wait on the counter
+    table meanwhile: a change committed before the lock is in the recount,
+    one made after it is applied on top.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {connection.ops.quote_name(RequestCounter._meta.db_table)} IN EXCLUSIVE MODE")
+        stored = Counter()
+        for kind, key, count in RequestCounter.objects.values_list('kind', 'key', 'count'):
+            stored[kind, key] += count
+        actual = compute()
+        drift = {
+            counter: (stored.get(counter, 0), actual.get(counter, 0))
+            for counter in set(stored) | set(actual)
+            if stored.get(counter, 0) != actual.get(counter, 0)
+        }
+        if drift and not dry_run:
+            # folds the slots back into one row per counter
+            RequestCounter.objects.all().delete()
+            RequestCounter.objects.bulk_create(
+                [RequestCounter(kind=kind, key=key, count=count) for (kind, key), count in actual.items() if count]
+            )
+    return drift
+
+
+def summary():
+    """The dashboard numbers: a read of a few hundred counter rows, whatever the table size."""
+    today = day(timezone.now())
+    counters = RequestCounter.objects.filter(kind__in=('status', 'program')) | RequestCounter.objects.filter(
+        kind__in=('created', 'released'), key=today,
+    )
+    # summed over the slots
+    counters = counters.order_by().values('kind', 'key').annotate(total=Sum('count'))
+    by_status = {status: 0 for status in RequestStatus.values}
+    by_program = {}
+    totals = {'created': 0, 'released': 0}
+    for kind, key, count in counters.values_list('kind', 'key', 'total'):
+        if kind == 'status':
+            by_status[key] = count
+        elif kind == 'program':
+            if count:
+                by_program[key] = count
+        else:
+            totals[kind] = count
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'by_program': dict(sorted(by_program.items())),
+        'today': {'date': today, **totals},
+    }
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from decimal import Decimal
+
+from django.utils import timezone
+
+
+# How many undelivered events a slow client may have queued before we start
+# dropping them. The client refetches on reconnect, so dropping is safe.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+CLAIM_DATE_FORMAT = "%m-%d-%Y - %I:%M %p"  # shared with StudentRequestSerializer
+
+
+class Subscription:
+    def __init__(self, user_id, is_staff, loop):
+        self.user_id = user_id
+        self.is_staff = is_staff
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, owner_id):
+        return self.is_staff or self.user_id == owner_id
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+
+class RequestEventBroker:
+    """
+    In-process pub/sub for StudentRequest changes.
+
+    publish() may be called from any thread (sync views run in a thread pool
+    under ASGI); delivery is handed to each subscriber's event loop. Events only
+    reach connections held by this process, so with several workers every
+    worker gets its own broker and clients keep a slow poll as a fallback.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, user_id, is_staff):
+        subscription = Subscription(user_id, is_staff, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event, owner_id):
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.wants(owner_id)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # loop already closed, the connection is going away
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+broker = RequestEventBroker()
+
+
+def build_event(action, instance):
+    return build_event_from_values(
+        action, instance.pk, instance.request_status, instance.claim_date, instance.cost
+    )
+
+
+def build_event_from_values(action, pk, request_status, claim_date, cost):
+    # bulk endpoints work on .values() rows and never load model instances
+    return {
+        'event': action,
+        'id': pk,
+        'request_status': request_status,
+        'claim_date': (
+            timezone.localtime(claim_date).strftime(CLAIM_DATE_FORMAT)
+            if claim_date else None
+        ),
+        'cost': f"{Decimal(cost):.2f}" if cost is not None else None,
+    }
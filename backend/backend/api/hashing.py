@@ -0,0 +1,36 @@
+"""
+Password hashing for the roster import's worker processes. Spawned workers
+unpickle these functions by importing this module before django.setup()
+has run, so nothing here may import models at module level.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def hash_password(args):
+    """Validate, then the expensive hash. Returns (hash, None) or (None, problem)."""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.contrib.auth.password_validation import validate_password
+    from django.core.exceptions import ValidationError
+
+    password, username, email = args
+    try:
+        validate_password(password, user=User(username=username, email=email))
+    except ValidationError as e:
+        return None, ' '.join(e.messages)
+    return make_password(password), None
+
+
+def hash_pool(workers):
+    # spawn, not fork: a forked child would share the parent's open DB socket
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+    )
@@ -0,0 +1,133 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import models
+from PIL import Image, ImageOps
+
+
+# Proofs are receipts and clearance screenshots: 2000px on the long side is
+# still readable, and the dashboards only ever show the thumbnail inline.
+PROOF_MAX_DIMENSION = getattr(settings, 'PROOF_MAX_DIMENSION', 2000)
+PROOF_THUMBNAIL_DIMENSION = getattr(settings, 'PROOF_THUMBNAIL_DIMENSION', 320)
+PROOF_JPEG_QUALITY = getattr(settings, 'PROOF_JPEG_QUALITY', 82)
+PROOF_MAX_UPLOAD_BYTES = getattr(settings, 'PROOF_MAX_UPLOAD_BYTES', 15 * 1024 * 1024)
+PROOF_MAX_PIXELS = getattr(settings, 'PROOF_MAX_PIXELS', 50_000_000)
+
+
+def validate_proof_image(file):
+    if file.size > PROOF_MAX_UPLOAD_BYTES:
+        raise ValidationError(f"Image is too large (max {PROOF_MAX_UPLOAD_BYTES // (1024 * 1024)} MB).")
+    # Only the header is read here, the pixels aren't decoded
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Upload a valid image.")
+    finally:
+        file.seek(position)
+    if width * height > PROOF_MAX_PIXELS:
+        raise ValidationError("Image dimensions are too large.")
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def encode(image, max_dimension):
+    """
+    Downscale to fit max_dimension and re-encode. Nothing from the original
+    file's metadata is passed to save(), so EXIF (GPS, camera, ...) is dropped.
+    Transparent images stay PNG, everything else becomes a progressive JPEG.
+    """
+    image = image.copy()
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    buffer = BytesIO()
+    if has_alpha(image):
+        image.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue(), '.png'
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, format='JPEG', quality=PROOF_JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue(), '.jpg'
+
+
+def recompress(data, quality):
+    """
+    Re-encode a stored JPEG proof at a lower quality for the archive. Returns
+    the original bytes when that isn't smaller, or when they aren't a JPEG
+    (PNGs are already stored optimized and are lossless).
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            if image.format != 'JPEG':
+                return data
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    except (OSError, Image.DecompressionBombError):
+        return data
+    smaller = buffer.getvalue()
+    return smaller if len(smaller) < len(data) else data
+
+
+def process_proof(file):
+    """Returns (display ContentFile, thumbnail ContentFile) for an uploaded proof."""
+    stem = os.path.splitext(os.path.basename(file.name))[0]
+    file.seek(0)
+    with Image.open(file) as image:
+        # phone photos are often stored sideways with an EXIF rotation flag
+        image = ImageOps.exif_transpose(image)
+        display, ext = encode(image, PROOF_MAX_DIMENSION)
+        thumbnail, thumb_ext = encode(image, PROOF_THUMBNAIL_DIMENSION)
+    return ContentFile(display, name=stem + ext), ContentFile(thumbnail, name=stem + thumb_ext)
+
+
+def preprocess_proofs(files):
+    """
+    Re-encodes uploads ahead of the model save, so async views can do the
+    CPU-heavy part on a worker thread instead of the ORM's thread.
+    ProofImageField.pre_save picks the result up from the upload. Invalid
+    files are left alone for the serializer's validation to reject.
+    """
+    for file in files:
+        try:
+            validate_proof_image(file)
+        except ValidationError:
+            continue
+        file.processed_proof = process_proof(file)
+        file.seek(0)
+
+
+class ProofImageField(models.ImageField):
+    """
+    ImageField that re-encodes new uploads (bounded size, no EXIF) before they
+    are stored and fills `thumbnail_field` with a small preview.
+    """
+
+    def __init__(self, *args, thumbnail_field=None, **kwargs):
+        self.thumbnail_field = thumbnail_field
+        kwargs.setdefault('validators', [validate_proof_image])
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.thumbnail_field:
+            kwargs['thumbnail_field'] = self.thumbnail_field
+        if kwargs.get('validators') == [validate_proof_image]:
+            del kwargs['validators']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        # _committed is False only for a file assigned since the last save
+        if file and not file._committed:
+            processed = getattr(file.file, 'processed_proof', None)
+            display, thumbnail = processed or process_proof(file)
+            file.file = display
+            file.name = display.name
+            if self.thumbnail_field:
+                getattr(model_instance, self.thumbnail_field).save(thumbnail.name, thumbnail, save=False)
+        return super().pre_save(model_instance, add)
@@ -0,0 +1,128 @@
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+
+MAX_ATTEMPTS = getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+RETRY_BASE = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 10)
+RETRY_MAX = 3600
+LEASE = timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 300))
+
+# task name -> function, filled by @task (tasks.py)
+TASKS = {}
+
+
+def task(function):
+    """Register a function as a job; it is called with the payload as keyword arguments."""
+    TASKS[function.__name__] = function
+    return function
+
+
+def enqueue(name, **payload):
+    """
+    Queue a job in the caller's transaction: if the change it follows up on
+    rolls back, so does the job. The payload must be JSON: pass ids, not
+    instances.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}")
+    return Job.objects.create(task=name, payload=payload)
+
+
+def enqueue_many(name, payloads):
+    """One INSERT for a batch of jobs of the same task (bulk paths)."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}")
+    return Job.objects.bulk_create([Job(task=name, payload=payload) for payload in payloads])
+
+
+def backoff(attempts):
+    # 10s, 20s, 40s, ... capped at an hour, with jitter so jobs that failed
+    # together (the mail server was down) don't all retry at once
+    delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size):
+    """
+    Take up to batch_size due jobs. SKIP LOCKED lets several workers claim
+    side by side; pushing run_at out by the lease keeps the jobs away from
+    other workers until this one is done with them, without holding a
+    transaction open meanwhile.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.filter(status=JobStatus.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if jobs:
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                run_at=now + LEASE, attempts=F('attempts') + 1,
+            )
+    for job in jobs:
+        job.run_at = now + LEASE
+        job.attempts += 1
+    return jobs
+
+
+def renew(job):
+    """
+    Start the lease over just before running a claimed job, so it covers
+    that job rather than the whole batch. False if the lease ran out while
+    the jobs before it ran and another worker has claimed it since (run_at
+    is no longer ours): it must not run twice.
+    """
+    lease = timezone.now() + LEASE
+    renewed = Job.objects.filter(pk=job.pk, status=JobStatus.QUEUED, run_at=job.run_at).update(run_at=lease)
+    if renewed:
+        job.run_at = lease
+    return bool(renewed)
+
+
+def run(job):
+    """
+    Run a claimed job, then take it off the queue in a short transaction of
+    its own. The task runs outside any transaction: its side effects (an
+    email) can't be rolled back, so one held open around it would keep its
+    locks through the SMTP exchange and could still fail to commit after the
+    mail went out, sending it again on the retry. A task that writes several
+    rows wraps them in its own transaction.atomic(). A failure is retried
+    after a backoff until it runs out of attempts. Returns the error, None
+    on success.
+    """
+    try:
+        function = TASKS.get(job.task)
+        if function is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        function(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= MAX_ATTEMPTS or job.task not in TASKS:
+            Job.objects.filter(pk=job.pk).update(status=JobStatus.FAILED, last_error=error)
+        else:
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now() + backoff(job.attempts), last_error=error)
+        return error
+    # a crash before this commits runs the job again once the lease is up
+    Job.objects.filter(pk=job.pk).delete()
+    return None
+
+
+def work(batch_size):
+    """Claim and run one batch. Returns [(job, error or None)]."""
+    return [(job, run(job)) for job in claim(batch_size) if renew(job)]
+
+
+def retry(jobs):
+    """Queue failed jobs again with a fresh set of attempts."""
+    return jobs.filter(status=JobStatus.FAILED).update(
+        status=JobStatus.QUEUED, run_at=timezone.now(), attempts=0,
+    )
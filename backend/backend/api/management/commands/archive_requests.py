@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.archive import ARCHIVE_AFTER_DAYS, ColdCopier, archivable, archive_batch, release_hot_files
+from api.models import StudentRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Move Released requests released more than --days ago out of the requests table "
+        "into the archive (GET /api/archive/), and their proofs into PROOF_ARCHIVE_ROOT. "
+        "Each batch is its own transaction, so the command can be stopped at any point "
+        "and run again to carry on. Hot copies of the proofs are deleted once no request "
+        "references them, unless touched within the grace period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS,
+                            help=f"archive requests released more than this many days ago (default {ARCHIVE_AFTER_DAYS})")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, help="stop after this many requests")
+        parser.add_argument('--recompress-quality', type=int,
+                            help="re-encode JPEG proofs at this quality (1-95) when it makes them smaller")
+        parser.add_argument('--grace-hours', type=float, default=24)
+        parser.add_argument('--vacuum', action='store_true',
+                            help="VACUUM ANALYZE the requests table afterwards (Postgres), so the freed index and "
+                                 "table space is reused right away instead of after autovacuum")
+        parser.add_argument('--dry-run', action='store_true', help="count what would be archived, change nothing")
+
+    def handle(self, *args, **options):
+        quality = options['recompress_quality']
+        if quality is not None and not 1 <= quality <= 95:
+            raise CommandError("--recompress-quality must be between 1 and 95.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        requests = archivable(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f"Would archive {requests.count()} requests released more than {options['days']} days ago.")
+            return
+
+        start = time.perf_counter()
+        limit = options['limit']
+        after_id = archived = freed = missing = 0
+        while limit is None or archived < limit:
+            size = options['batch_size'] if limit is None else min(options['batch_size'], limit - archived)
+            copier = ColdCopier(quality)
+            batch = archive_batch(requests, after_id, size, copier)
+            if batch is None:
+                break
+            after_id, count, hot_names = batch
+            archived += count
+            missing += copier.missing
+            freed += release_hot_files(hot_names, options['grace_hours'] * 3600)
+            if options['verbosity'] > 1:
+                self.stderr.write(f"{archived} archived (up to #{after_id})")
+
+        if options['vacuum'] and archived and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(StudentRequest._meta.db_table)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} requests in {time.perf_counter() - start:.1f}s; "
+            f"freed {freed / (1024 * 1024):.1f} MB of hot proofs"
+            + (f", {missing} proofs were missing on disk." if missing else ".")
+        ))
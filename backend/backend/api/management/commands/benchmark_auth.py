@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.management.http import WSGIClient, summary
+from api.views import MyTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard's polls (GET /api/requests/ answered 304, and the profile "
+        "endpoint) with the User row loaded per request and with the stateless "
+        "claims-only authentication (JWT_STATELESS_READS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="username to issue the access token for")
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['user']!r}")
+        client = WSGIClient(str(MyTokenObtainPairSerializer.get_token(user).access_token))
+        count = options['requests']
+
+        for path in ('/api/requests/', '/api/user/profile/'):
+            for label, stateless in (('User lookup', False), ('claims only', True)):
+                with override_settings(JWT_STATELESS_READS=stateless):
+                    etag = client.get(path)[1]
+                    timings = client.time(path, count, etag)
+                    with CaptureQueriesContext(connection) as ctx:
+                        client.get(path, etag)
+                self.stdout.write(
+                    f"{path:22} {label:12} 304: {summary(timings)}, {len(ctx.captured_queries)} queries"
+                )
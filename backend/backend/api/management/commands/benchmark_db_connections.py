@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.management.http import WSGIClient, summary
+from api.views import MyTokenObtainPairSerializer
+
+
+# (label, CONN_MAX_AGE, pool options)
+MODES = (
+    ('new connection per request', 0, None),
+    ('persistent (CONN_MAX_AGE=60)', 60, None),
+    ('psycopg pool', 0, {'min_size': 2, 'max_size': 4}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET /api/requests/ end to end through the WSGI handler (so connections "
+        "are opened and released exactly as in production) with a new connection per "
+        "request, persistent connections and the psycopg pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="username to issue the access token for")
+        parser.add_argument('--path', default='/api/requests/')
+        parser.add_argument('--requests', type=int, default=300)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['user']!r}")
+        client = WSGIClient(str(MyTokenObtainPairSerializer.get_token(user).access_token))
+        path, count = options['path'], options['requests']
+
+        original = dict(connection.settings_dict)
+        original_options = dict(original.get('OPTIONS', {}))
+        try:
+            for label, max_age, pool in MODES:
+                self.configure(max_age, pool, original_options)
+                full = client.time(path, count)
+                etag = client.get(path)[1]
+                conditional = client.time(path, count, etag)
+                self.stdout.write(f"{label:30} 200: {summary(full)} | 304: {summary(conditional)}")
+        finally:
+            self.configure(original['CONN_MAX_AGE'], original_options.get('pool'), original_options)
+
+    def configure(self, max_age, pool, original_options):
+        connection.close()
+        connection.close_pool()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['OPTIONS'] = dict(original_options)
+        connection.settings_dict['OPTIONS'].pop('pool', None)
+        if pool:
+            connection.settings_dict['OPTIONS']['pool'] = pool
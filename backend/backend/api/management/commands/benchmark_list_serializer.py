@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.management.synthetic import Rollback, seed_requests
+from api.models import StudentRequest
+from api.serializer import StudentRequestListSerializer, StudentRequestSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare StudentRequestSerializer with the StudentRequestListSerializer fast path "
+        "on a synthetic table (rolled back at the end): query + serialize + render time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--students', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {options['rows']} requests...")
+                seed_requests(options['rows'], options['students'])
+                self.compare(options['repeat'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def compare(self, repeat):
+        http_request = Request(APIRequestFactory().get('/api/requests/'))
+        context = {'request': http_request}
+        queryset = StudentRequest.objects.select_related('user', 'user__profile').order_by('id')
+        renderer = JSONRenderer()
+
+        def model_serializer():
+            return renderer.render(StudentRequestSerializer(queryset, many=True, context=context).data)
+
+        def list_serializer():
+            fast = StudentRequestListSerializer(context=context)
+            return renderer.render(fast.to_representation(fast.rows(queryset)))
+
+        if model_serializer() != list_serializer():
+            raise CommandError("Outputs differ, the fast path is out of sync with StudentRequestSerializer")
+
+        results = {}
+        for name, run in (('StudentRequestSerializer', model_serializer),
+                          ('StudentRequestListSerializer', list_serializer)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f"{name:<30}{results[name]:>10.1f} ms (median of {repeat})")
+
+        speedup = results['StudentRequestSerializer'] / results['StudentRequestListSerializer']
+        self.stdout.write(f"identical output, {speedup:.1f}x faster")
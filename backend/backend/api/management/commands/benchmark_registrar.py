@@ -0,0 +1,240 @@
+import itertools
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from unittest import mock
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from PIL import Image
+
+from api.management.synthetic import make_proofs, seed_requests
+from api.models import StudentRequest
+from api.throttling import SlidingWindowThrottle
+from api.views import MyTokenObtainPairSerializer
+
+
+PASSWORD = 'benchmark-password'
+SCENARIOS = ('token', 'profile', 'requests_staff', 'requests_student', 'create_request', 'manage_request')
+# students with a pre-minted token; requests rotate through them
+ACTIVE_STUDENTS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the real endpoints (token, profile, request list, create, update) "
+        "in-process through the Django test client: no server or network. A fresh test "
+        "database is created, seeded with a fixed seed and dropped afterwards, so runs "
+        "on different commits are comparable. Reports p50/p95/p99 latency, queries per "
+        "request and throughput as JSON; --compare prints the change against an "
+        "earlier report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1_000)
+        parser.add_argument('--requests', type=int, default=10_000, help="seeded requests")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--proofs', type=int, default=10, help="distinct proof images to seed")
+        parser.add_argument('--count', type=int, default=200, help="requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=4, help="client threads")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+        parser.add_argument('--upload', action='store_true', help="create_request uploads a proof image")
+        parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+        parser.add_argument('--compare', help="an earlier JSON report to compare against")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        media_root = tempfile.mkdtemp(prefix='benchmark-media-')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # the throttles would turn most of the token scenario into 429s
+            rates = {scope: None for scope in SlidingWindowThrottle.THROTTLE_RATES}
+            with override_settings(MEDIA_ROOT=media_root), \
+                    mock.patch.dict(SlidingWindowThrottle.THROTTLE_RATES, rates):
+                self.seed(options)
+                results = {name: self.run_scenario(name, options) for name in scenarios}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report = {'meta': self.meta(options), 'scenarios': results}
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(text + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(text)
+        self.print_table(results, baseline['scenarios'] if baseline else None)
+
+    def seed(self, options):
+        self.stderr.write(f"Seeding {options['students']} students and {options['requests']} requests...")
+        proofs = {}
+        if options['proofs']:
+            for field_name in ('eclearance_proof', 'payment_proof'):
+                proofs[field_name] = make_proofs(field_name, options['proofs'], seed=options['seed'])
+        users = seed_requests(
+            options['requests'], options['students'], seed=options['seed'], prefix='bench',
+            password=make_password(PASSWORD), proofs=proofs,
+        )
+        self.staff = User.objects.create(username='bench-staff', password='!', is_staff=True)
+        self.students = users[:ACTIVE_STUDENTS]
+        self.tokens = {
+            user.pk: str(MyTokenObtainPairSerializer.get_token(user).access_token)
+            for user in [self.staff, *self.students]
+        }
+        self.request_ids = list(StudentRequest.objects.order_by('?').values_list('pk', flat=True)[:500])
+        self.upload = None
+        if options['upload']:
+            buffer = BytesIO()
+            Image.new('RGB', (1600, 1200), (240, 240, 240)).save(buffer, format='JPEG', quality=90)
+            self.upload = buffer.getvalue()
+
+    def build(self, name, i):
+        """(method, path, data, extra) for the i-th request of a scenario."""
+        student = self.students[i % len(self.students)]
+        as_student = {'HTTP_AUTHORIZATION': f'Bearer {self.tokens[student.pk]}'}
+        as_staff = {'HTTP_AUTHORIZATION': f'Bearer {self.tokens[self.staff.pk]}'}
+        if name == 'token':
+            return 'post', reverse('token_obtain_pair'), {'username': student.username, 'password': PASSWORD}, {}
+        if name == 'profile':
+            return 'get', reverse('current-user-profile'), None, as_student
+        if name == 'requests_staff':
+            return 'get', reverse('get_requests'), None, as_staff
+        if name == 'requests_student':
+            return 'get', reverse('get_requests'), None, as_student
+        if name == 'create_request':
+            data = {'request': 'Diploma', 'request_purpose': 'Employment'}
+            if self.upload:
+                data['eclearance_proof'] = BytesIO(self.upload)
+                data['eclearance_proof'].name = 'clearance.jpg'
+                return 'post', reverse('create_request'), data, as_student
+            return 'post', reverse('create_request'), data, {**as_student, 'json': True}
+        if name == 'manage_request':
+            pk = self.request_ids[i % len(self.request_ids)]
+            data = {'request_purpose': ('Employment', 'Scholarship')[i % 2]}
+            return 'patch', reverse('manage_request', args=[pk]), data, {**as_staff, 'json': True}
+        raise CommandError(f"Unknown scenario {name!r}")
+
+    def run_scenario(self, name, options):
+        count, concurrency = options['count'], options['concurrency']
+        # built up front so the timing is only the request
+        calls = [self.build(name, i) for i in range(count)]
+        next_call = itertools.count()
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        i = next(next_call)
+                    if i >= count:
+                        return
+                    method, path, data, extra = calls[i]
+                    extra = dict(extra)
+                    kwargs = {'content_type': 'application/json'} if extra.pop('json', False) else {}
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = getattr(client, method)(path, data, **kwargs, **extra)
+                        elapsed = time.perf_counter() - start
+                    with lock:
+                        samples.append((elapsed * 1000, len(queries), response.status_code))
+            finally:
+                connections.close_all()
+
+        self.stderr.write(f"{name}: {count} requests, {concurrency} at a time...")
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        return self.summarize(samples, wall)
+
+    def summarize(self, samples, wall):
+        latencies = sorted(sample[0] for sample in samples)
+        queries = [sample[1] for sample in samples]
+        errors = sum(1 for sample in samples if sample[2] >= 400)
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'status_codes': sorted({sample[2] for sample in samples}),
+            'latency_ms': {
+                'p50': round(percentiles[49], 2),
+                'p95': round(percentiles[94], 2),
+                'p99': round(percentiles[98], 2),
+                'mean': round(statistics.mean(latencies), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries_per_request': {
+                'mean': round(statistics.mean(queries), 2),
+                'max': max(queries),
+            },
+            'throughput_rps': round(len(samples) / wall, 1),
+        }
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {key: options[key] for key in (
+                'students', 'requests', 'seed', 'proofs', 'count', 'concurrency', 'upload',
+            )},
+        }
+
+    def print_table(self, results, baseline):
+        header = f"{'scenario':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'req/s':>8}{'errors':>8}"
+        if baseline:
+            header += f"{'p50 Δ':>9}{'p95 Δ':>9}"
+        self.stderr.write(header)
+        for name, result in results.items():
+            latency = result['latency_ms']
+            line = (
+                f"{name:<18}{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+                f"{result['queries_per_request']['mean']:>9.1f}{result['throughput_rps']:>8.1f}{result['errors']:>8}"
+            )
+            if baseline and name in baseline:
+                before = baseline[name]['latency_ms']
+                line += f"{change(before['p50'], latency['p50']):>9}{change(before['p95'], latency['p95']):>9}"
+            self.stderr.write(line)
+
+
+def change(before, after):
+    return f"{(after - before) / before * 100:+.0f}%" if before else ''
@@ -0,0 +1,73 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.management.synthetic import Rollback, seed_requests
+from api.models import RequestStatus, StudentRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard list/filter queries against a synthetic StudentRequest table. "
+        "Rows are created inside a transaction that is rolled back at the end. "
+        "Run it before and after `migrate api 0013` to compare with and without the indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--students', type=int, default=5_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user_ids = self.seed(options['rows'], options['students'])
+                self.run_queries(user_ids, options['repeat'], options['page_size'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, rows, students):
+        self.stdout.write(f"Seeding {students} students and {rows} requests...")
+        return [user.pk for user in seed_requests(rows, students)]
+
+    def run_queries(self, user_ids, repeat, page_size):
+        base = StudentRequest.objects.select_related('user', 'user__profile')
+        student_id = user_ids[len(user_ids) // 2]
+        cutoff = timezone.now() - timedelta(days=365)
+        queries = {
+            'staff first page': lambda: base.order_by('-created_at', '-id')[:page_size],
+            'staff deep page (keyset)': lambda: base.filter(created_at__lt=cutoff).order_by('-created_at', '-id')[:page_size],
+            'Pending tab page': lambda: base.filter(request_status=RequestStatus.PENDING).order_by('-created_at', '-id')[:page_size],
+            'active tabs page': lambda: base.filter(request_status__in=[
+                RequestStatus.PENDING, RequestStatus.TO_PAY, RequestStatus.CONFIRMED,
+            ]).order_by('-created_at', '-id')[:page_size],
+            'To Pay count': lambda: [base.filter(request_status=RequestStatus.TO_PAY).count()],
+            'student history': lambda: base.filter(user_id=student_id).order_by('-created_at', '-id'),
+        }
+        self.stdout.write(f"{'query':<28}{'p50 ms':>10}{'p95 ms':>10}  plan")
+        for name, build in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(build())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{name:<28}{statistics.median(timings):>10.2f}{p95:>10.2f}  {self.plan(build())}"
+            )
+
+    def plan(self, queryset):
+        if not hasattr(queryset, 'explain'):
+            return ''
+        # how the plan reaches api_studentrequest (seq scan vs which index)
+        for line in queryset.explain().splitlines():
+            if 'api_studentrequest' in line and 'Scan' in line:
+                return line.strip().lstrip('-> ').split('  (')[0]
+        return ''
@@ -0,0 +1,97 @@
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import StudentRequest
+from api.storage import is_content_addressed, proof_storage
+
+
+PROOF_FIELDS = ('eclearance_proof', 'payment_proof', 'eclearance_proof_thumb', 'payment_proof_thumb')
+PROOF_DIRECTORIES = ('clearance_proofs', 'payment_proofs')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move proofs to content-addressed names (identical files stored once) and delete "
+        "files no request references any more. Unreferenced files younger than the grace "
+        "period are kept, since an upload of the same content may be in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24)
+        parser.add_argument('--dry-run', action='store_true', help="report only, change nothing")
+        parser.add_argument('--skip-backfill', action='store_true')
+        parser.add_argument('--skip-gc', action='store_true')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if not options['skip_backfill']:
+            self.backfill(dry_run)
+        if not options['skip_gc']:
+            self.collect(options['grace_hours'] * 3600, dry_run)
+
+    def backfill(self, dry_run):
+        moved = missing = 0
+        for field in PROOF_FIELDS:
+            names = (
+                StudentRequest.objects
+                .exclude(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}))
+                .values_list(field, flat=True).distinct()
+            )
+            for name in list(names):
+                if is_content_addressed(name):
+                    continue
+                if not proof_storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f"{field}: {name} is referenced but missing on disk")
+                    continue
+                if dry_run:
+                    moved += 1
+                    continue
+                with proof_storage.open(name, 'rb') as old:
+                    new_name = proof_storage.save(name, old)
+                # every row sharing the legacy name moves in one UPDATE
+                StudentRequest.objects.filter(**{field: name}).update(**{field: new_name})
+                moved += 1
+        verb = "Would move" if dry_run else "Moved"
+        self.stdout.write(f"{verb} {moved} legacy files to content-addressed names ({missing} missing).")
+
+    def reference_counts(self):
+        counts = Counter()
+        for field in PROOF_FIELDS:
+            rows = StudentRequest.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True)
+            counts.update(name for name in rows.iterator() if name)
+        return counts
+
+    def collect(self, grace_seconds, dry_run):
+        references = self.reference_counts()
+        cutoff = time.time() - grace_seconds
+        kept = deleted = reclaimed = 0
+        for directory in PROOF_DIRECTORIES:
+            root = proof_storage.path(directory)
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    name = os.path.relpath(path, proof_storage.location).replace(os.sep, '/')
+                    if references[name]:
+                        kept += 1
+                        continue
+                    stat = os.stat(path)
+                    if stat.st_mtime > cutoff:
+                        kept += 1
+                        continue
+                    deleted += 1
+                    reclaimed += stat.st_size
+                    if not dry_run:
+                        os.unlink(path)
+
+        shared = sum(1 for count in references.values() if count > 1)
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            f"{len(references)} files referenced {sum(references.values())} times "
+            f"({shared} shared by several proofs). {verb} {deleted} unreferenced files "
+            f"({reclaimed / (1024 * 1024):.1f} MB), kept {kept}."
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import csv_lines
+from api.models import StudentRequest
+from api.pagination import DEFAULT_ORDERING, ORDERINGS
+from api.views import filter_requests
+
+
+class Command(BaseCommand):
+    help = "Stream student requests (joined with profiles) to a CSV file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', default='', help="request_status, comma separated for several")
+        parser.add_argument('--search', default='', help="student ID, name or requested document")
+        parser.add_argument('--ordering', default=DEFAULT_ORDERING, choices=list(ORDERINGS))
+        parser.add_argument('--output', '-o', help="file to write, defaults to stdout")
+
+    def handle(self, *args, **options):
+        requests = filter_requests(
+            StudentRequest.objects.all(),
+            {'status': options['status'], 'search': options['search']},
+        )
+        ordering = options['ordering']
+        requests = requests.order_by(ordering, ordering.replace('created_at', 'id'))
+
+        path = options['output']
+        try:
+            out = open(path, 'w', encoding='utf-8', newline='') if path else None
+        except OSError as e:
+            raise CommandError(f"Cannot write {path}: {e}")
+        try:
+            count = -2  # BOM and header
+            for line in csv_lines(requests):
+                if out:
+                    out.write(line)
+                else:
+                    self.stdout.write(line, ending='')
+                count += 1
+        finally:
+            if out:
+                out.close()
+        if path:
+            self.stderr.write(f"Exported {count} requests to {path}")
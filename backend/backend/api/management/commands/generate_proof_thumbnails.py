@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.images import process_proof
+from api.models import StudentRequest
+
+
+PROOF_FIELDS = (
+    ('eclearance_proof', 'eclearance_proof_thumb'),
+    ('payment_proof', 'payment_proof_thumb'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create thumbnails for proofs uploaded before the image pipeline existed. "
+        "Originals are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        created = failed = 0
+        for field, thumb_field in PROOF_FIELDS:
+            missing = (
+                StudentRequest.objects
+                .exclude(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}))
+                .filter(Q(**{f'{thumb_field}__isnull': True}) | Q(**{thumb_field: ''}))
+                .only('id', field, thumb_field)
+            )
+            for student_request in missing.iterator(chunk_size=options['batch_size']):
+                proof = getattr(student_request, field)
+                try:
+                    with proof.open('rb'):
+                        _, thumbnail = process_proof(proof)
+                except OSError as e:
+                    failed += 1
+                    self.stderr.write(f"Request #{student_request.pk}: cannot read {proof.name} ({e})")
+                    continue
+                getattr(student_request, thumb_field).save(thumbnail.name, thumbnail, save=False)
+                # update() instead of save(): nothing else changed, skip signals
+                StudentRequest.objects.filter(pk=student_request.pk).update(
+                    **{thumb_field: getattr(student_request, thumb_field).name}
+                )
+                created += 1
+        self.stdout.write(f"Created {created} thumbnails, {failed} failed.")
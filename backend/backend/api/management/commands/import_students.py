@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.roster import ROSTER_CHUNK_SIZE, ROSTER_FORMATS, ROSTER_HASH_WORKERS, RosterError, RosterImport, guess_format, read_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-provision student accounts (User + UserProfile) from a CSV, JSON or JSON "
+        "lines roster. Columns: username, email, first_name, last_name and optionally "
+        "middle_name, extension_name, birth_date (YYYY-MM-DD), college_program, "
+        "contact_number, password. Existing Student IDs are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('roster', help="path to the roster file")
+        parser.add_argument('--format', choices=ROSTER_FORMATS, help="default: from the file extension")
+        parser.add_argument('--chunk-size', type=int, default=ROSTER_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=ROSTER_HASH_WORKERS,
+                            help="password hashing processes (0: hash in this process)")
+        parser.add_argument('--dry-run', action='store_true', help="validate and report, create nothing")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['roster'])
+        start = time.perf_counter()
+
+        def progress(report):
+            self.stdout.write(
+                f"{report['created']} created, {report['skipped_existing']} existing, "
+                f"{report['invalid']} invalid ({time.perf_counter() - start:.1f}s)"
+            )
+
+        importer = RosterImport(
+            chunk_size=options['chunk_size'], workers=options['workers'],
+            dry_run=options['dry_run'], progress=progress,
+        )
+        try:
+            with open(options['roster'], 'rb') as f:
+                report = importer.run(read_roster(f, fmt))
+        except (OSError, RosterError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']} ({error['username']}): {error['error']}")
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(
+            f"{verb} {report['created']} students in {time.perf_counter() - start:.1f}s, "
+            f"skipped {report['skipped_existing']} existing, {report['invalid']} invalid rows."
+        )
@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server: slow clients trickle their request headers in "
+        "(like phones on a bad connection) while fast clients poll GET /api/requests/. "
+        "Run it against gunicorn sync workers and against uvicorn (backend.asgi) to "
+        "compare how many slow connections each can hold before polls stall."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--user', required=True, help="username to issue the access token for")
+        parser.add_argument('--path', default='/api/requests/')
+        parser.add_argument('--polls', type=int, default=300, help="total fast requests")
+        parser.add_argument('--concurrency', type=int, default=20, help="fast requests in flight")
+        parser.add_argument('--slow-clients', type=int, default=50)
+        parser.add_argument('--slow-seconds', type=float, default=10)
+        parser.add_argument('--timeout', type=float, default=60)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['user']!r}")
+        self.token = str(AccessToken.for_user(user))
+        url = urlsplit(options['url'])
+        self.host, self.port = url.hostname, url.port or 80
+        self.path = options['path']
+        self.timeout = options['timeout']
+        asyncio.run(self.run(options))
+
+    def request_head(self):
+        return (
+            f"GET {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Authorization: Bearer {self.token}\r\nConnection: close\r\n\r\n"
+        ).encode()
+
+    async def fetch(self, trickle_seconds=0):
+        """Returns (status, seconds) for one request on a fresh connection."""
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = self.request_head()
+            if trickle_seconds:
+                # a few bytes at a time, spread over trickle_seconds
+                pieces = 20
+                step = -(-len(head) // pieces)
+                for i in range(0, len(head), step):
+                    writer.write(head[i:i + step])
+                    await writer.drain()
+                    await asyncio.sleep(trickle_seconds / pieces)
+            else:
+                writer.write(head)
+                await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            status = int(status_line.split()[1]) if status_line else 0
+        finally:
+            writer.close()
+        return status, time.perf_counter() - start
+
+    async def timed(self, trickle_seconds=0):
+        try:
+            return await asyncio.wait_for(self.fetch(trickle_seconds), self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            return 0, self.timeout
+
+    async def run(self, options):
+        slow = [asyncio.create_task(self.timed(options['slow_seconds'])) for _ in range(options['slow_clients'])]
+        # let the slow clients grab their connections first
+        await asyncio.sleep(0.5)
+
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def poll():
+            async with semaphore:
+                return await self.timed()
+
+        start = time.perf_counter()
+        fast = await asyncio.gather(*(poll() for _ in range(options['polls'])))
+        elapsed = time.perf_counter() - start
+        slow = await asyncio.gather(*slow)
+
+        self.report('fast polls', fast, elapsed)
+        self.report('slow clients', slow)
+
+    def report(self, label, results, elapsed=None):
+        ok = sorted(seconds for status, seconds in results if status == 200)
+        failed = len(results) - len(ok)
+        line = f"{label}: {len(ok)} ok, {failed} failed"
+        if ok:
+            p95 = ok[min(len(ok) - 1, int(len(ok) * 0.95))]
+            line += f", p50 {statistics.median(ok) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+        if elapsed:
+            line += f", {len(ok) / elapsed:.0f} req/s"
+        self.stdout.write(line)
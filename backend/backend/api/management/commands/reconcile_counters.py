@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the dashboard counters (requests per status, per program, created and "
+        "released per day) from the requests table and replace any that drifted. Writes "
+        "that skip the signals (bulk_create, QuerySet.update(), raw SQL) leave them off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="report the drift only, change nothing")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        drift = counters.rebuild(dry_run=options['dry_run'])
+        for (kind, key), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{kind} {key or '(none)'}: {stored} -> {actual}")
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(drift)} counters {verb} in {time.perf_counter() - start:.1f}s."
+            if drift else f"Counters are correct ({time.perf_counter() - start:.1f}s)."
+        ))
@@ -0,0 +1,74 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (status emails, password reset notices, see "
+        "api/tasks.py). Each worker thread claims a batch of due jobs at a time; failed "
+        "jobs are retried with exponential backoff up to JOB_MAX_ATTEMPTS. Runs until "
+        "interrupted, or with --once until nothing is due."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=getattr(settings, 'JOB_WORKER_CONCURRENCY', 2),
+                            help="worker threads, each with its own database connection")
+        parser.add_argument('--batch-size', type=int, default=10, help="jobs a worker claims at a time")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="seconds to wait when nothing is due")
+        parser.add_argument('--once', action='store_true', help="exit once no job is due")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--concurrency and --batch-size must be positive.")
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.done = self.failed = 0
+
+        if options['concurrency'] == 1:
+            # in this thread, on this connection
+            self.worker(options)
+        else:
+            signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+            threads = [
+                threading.Thread(target=self.threaded_worker, args=(options,), daemon=True)
+                for _ in range(options['concurrency'])
+            ]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=0.5)
+            except KeyboardInterrupt:
+                # let the jobs in hand finish
+                self.stop.set()
+                for thread in threads:
+                    thread.join()
+        self.stdout.write(f"{self.done} jobs done, {self.failed} failed.")
+
+    def threaded_worker(self, options):
+        try:
+            self.worker(options)
+        finally:
+            connections.close_all()
+
+    def worker(self, options):
+        while not self.stop.is_set():
+            results = jobs.work(options['batch_size'])
+            for job, error in results:
+                with self.lock:
+                    if error is None:
+                        self.done += 1
+                    else:
+                        self.failed += 1
+                        self.stderr.write(f"{job.task} #{job.pk} failed (attempt {job.attempts}):\n{error}")
+            if not results:
+                if options['once']:
+                    return
+                self.stop.wait(options['poll_interval'])
@@ -0,0 +1,60 @@
+import re
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.management.synthetic import make_proofs, seed_requests
+from api.models import StudentRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with realistic registrar data for load tests and benchmarks: "
+        "students with profiles, requests over the last two years in the usual status "
+        "mix, optional proof images on disk, and a staff account. Every student shares "
+        "--password. The same --seed gives the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5_000)
+        parser.add_argument('--requests', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='seed', help="username prefix of the seeded students")
+        parser.add_argument('--password', default='registrar-seed', help="password of every seeded account")
+        parser.add_argument('--staff', default='seed-staff', help="staff username to create ('' for none)")
+        parser.add_argument('--proofs', type=int, default=0,
+                            help="distinct proof images to write to MEDIA_ROOT and share between requests")
+        parser.add_argument('--reset', action='store_true', help="delete the accounts from a previous seed first")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = User.objects.filter(username__regex=rf'^{re.escape(prefix)}\d{{7}}$')
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError(f"Users starting with {prefix!r} already exist; pass --reset to replace them.")
+            StudentRequest.objects.filter(user__in=existing).delete()
+            existing.delete()
+        if options['staff']:
+            User.objects.filter(username=options['staff']).delete()
+
+        start = time.perf_counter()
+        # hashed once: every account gets the same hash
+        password = make_password(options['password'])
+        proofs = {}
+        if options['proofs']:
+            self.stdout.write(f"Writing {options['proofs']} proof images of each kind...")
+            for field_name in ('eclearance_proof', 'payment_proof'):
+                proofs[field_name] = make_proofs(field_name, options['proofs'], seed=options['seed'])
+
+        self.stdout.write(f"Seeding {options['students']} students and {options['requests']} requests...")
+        with transaction.atomic():
+            seed_requests(
+                options['requests'], options['students'], seed=options['seed'],
+                prefix=prefix, password=password, proofs=proofs,
+            )
+            if options['staff']:
+                User.objects.create(username=options['staff'], password=password, is_staff=True)
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - start:.1f}s."))
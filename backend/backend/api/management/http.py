@@ -0,0 +1,64 @@
+import statistics
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+
+
+class WSGIClient:
+    """
+    Calls the real WSGI handler in-process. Unlike django.test.Client the
+    request_started/request_finished signals run normally, so database
+    connections are opened, kept or closed exactly as in production.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.handler = WSGIHandler()
+
+    def get(self, path, etag=None):
+        """Returns (status line, ETag)."""
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+            'wsgi.input': BytesIO(),
+        }
+        if etag:
+            environ['HTTP_IF_NONE_MATCH'] = etag
+        setup_testing_defaults(environ)
+        headers = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            headers['status'] = status
+            headers.update(response_headers)
+
+        body = self.handler(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            # fires request_finished, which closes or keeps the connection
+            body.close()
+        if not headers['status'].startswith(('200', '304')):
+            raise CommandError(f"{url.path} answered {headers['status']}")
+        return headers['status'], headers.get('ETag')
+
+    def time(self, path, count, etag=None):
+        """Milliseconds per request, after one warm-up request."""
+        self.get(path, etag)
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            self.get(path, etag)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+
+def summary(timings):
+    return f"p50 {statistics.median(timings):6.2f} ms, mean {statistics.mean(timings):6.2f} ms"
@@ -0,0 +1,148 @@
+import random
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from api import counters
+from api.images import process_proof
+from api.models import RequestStatus, StudentRequest, UserProfile
+
+
+# Roughly what a registrar's table looks like after a few semesters
+STATUS_MIX = [
+    (RequestStatus.RELEASED, 70),
+    (RequestStatus.REJECTED, 10),
+    (RequestStatus.PENDING, 10),
+    (RequestStatus.TO_PAY, 5),
+    (RequestStatus.CONFIRMED, 5),
+]
+
+REQUEST_TYPES = [
+    ('Transcript of Records', 50),
+    ('Certificate of Enrollment', 20),
+    ('Certificate of Grades', 15),
+    ('Diploma', 10),
+    ('Good Moral Certificate', 5),
+]
+PROGRAMS = ['BSIT', 'BSCS', 'BSEd', 'BSN', 'BSBA', 'BSCE']
+PURPOSES = ['Employment', 'Further studies', 'Scholarship', 'Board exam', 'Not specified']
+# Statuses at which the student has already uploaded a payment proof
+PAID_STATUSES = {RequestStatus.CONFIRMED, RequestStatus.RELEASED}
+
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    """Raised at the end of an atomic() block to throw the seeded rows away."""
+
+
+def make_proofs(field_name, count, seed=1):
+    """
+    Saves `count` distinct proof images through the field's storage, the way
+    an upload is stored (display + thumbnail). Returns [(name, thumb name)].
+    """
+    rng = random.Random(seed)
+    field = StudentRequest._meta.get_field(field_name)
+    thumb_field = StudentRequest._meta.get_field(field.thumbnail_field)
+    names = []
+    for i in range(count):
+        # a receipt-ish picture: light background, a few dark lines of "text"
+        image = Image.new('RGB', (1200, 1600), (rng.randrange(225, 256),) * 3)
+        draw = ImageDraw.Draw(image)
+        for line in range(rng.randrange(10, 30)):
+            y = 100 + line * 45
+            draw.rectangle((80, y, 80 + rng.randrange(300, 1040), y + 18), fill=(rng.randrange(60),) * 3)
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        display, thumbnail = process_proof(ContentFile(buffer.getvalue(), name=f"proof_{i}.jpg"))
+        names.append((
+            field.storage.save(field.generate_filename(None, display.name), display),
+            thumb_field.storage.save(thumb_field.generate_filename(None, thumbnail.name), thumbnail),
+        ))
+    return names
+
+
+def seed_requests(rows, students, seed=1, prefix='bench', password='!', proofs=None):
+    """
+    Bulk-insert `students` users (with profiles) and `rows` requests spread
+    over the last two years. Returns the created users.
+
+    `password` is stored as is, so pass a hash (one make_password() shared
+    by every account) to be able to log in. `proofs` maps a proof field name
+    to [(name, thumb name)] from make_proofs(); without it the proof columns
+    hold names of files that don't exist.
+    """
+    rng = random.Random(seed)
+    users = User.objects.bulk_create(
+        [User(username=f"{prefix}{i:07d}", email=f"{prefix}{i}@example.com", password=password) for i in range(students)],
+        batch_size=BATCH_SIZE,
+    )
+    UserProfile.objects.bulk_create(
+        [
+            UserProfile(
+                user=user,
+                first_name='Bench',
+                middle_name=rng.choice([None, 'Reyes']),
+                last_name=f"Student{i}",
+                birth_date=date(1998, 1, 1) + timedelta(days=rng.randrange(2500)),
+                college_program=rng.choice(PROGRAMS),
+                contact_number='09171234567',
+            )
+            for i, user in enumerate(users)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    statuses, weights = zip(*STATUS_MIX)
+    request_types, request_weights = zip(*REQUEST_TYPES)
+    proofs = proofs or {}
+    now = timezone.now()
+    # Spread created_at over two years so ordering is meaningful. It has to
+    # be set on insert: an UPDATE afterwards would leave every row with a
+    # dead version at the newest end of the created_at indexes.
+    created_at = StudentRequest._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    try:
+        batch = []
+        for _ in range(rows):
+            status = rng.choices(statuses, weights)[0]
+            created = now - timedelta(seconds=rng.randrange(730 * 24 * 3600))
+            student_request = StudentRequest(
+                user=users[rng.randrange(students)],
+                request=rng.choices(request_types, request_weights)[0],
+                request_purpose=rng.choice(PURPOSES),
+                request_status=status,
+                created_at=created,
+                released_at=(
+                    min(created + timedelta(days=rng.randrange(1, 15)), now)
+                    if status == RequestStatus.RELEASED else None
+                ),
+                cost='150.00' if status != RequestStatus.PENDING else None,
+                eclearance_proof=f"clearance_proofs/proof_{rng.randrange(10**6)}.jpg",
+            )
+            if 'eclearance_proof' in proofs:
+                student_request.eclearance_proof, student_request.eclearance_proof_thumb = \
+                    rng.choice(proofs['eclearance_proof'])
+            if 'payment_proof' in proofs and status in PAID_STATUSES:
+                student_request.payment_proof, student_request.payment_proof_thumb = \
+                    rng.choice(proofs['payment_proof'])
+            batch.append(student_request)
+            if len(batch) == BATCH_SIZE:
+                StudentRequest.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            StudentRequest.objects.bulk_create(batch)
+    finally:
+        created_at.auto_now_add = True
+
+    # bulk_create skips the signals that keep the counters
+    counters.rebuild()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_studentrequest")
+    return users
@@ -0,0 +1,135 @@
+import os
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+
+from .storage import is_content_addressed
+
+
+# A signed URL stays the same for a whole period (so browsers can cache it)
+# and is accepted for one more period after that.
+MEDIA_URL_PERIOD = getattr(settings, 'MEDIA_URL_PERIOD_SECONDS', 24 * 3600)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 3600
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+signer = signing.Signer(salt='api.media')
+
+ARCHIVE_SIGNING_PREFIX = 'archive/'
+
+
+def media_signature(name, expires):
+    return signer.signature(f"{name}:{expires}")
+
+
+def signing_period(now=None):
+    return int((now or time.time()) // MEDIA_URL_PERIOD)
+
+
+def signed_query(name, now=None):
+    expires = (signing_period(now) + 2) * MEDIA_URL_PERIOD
+    return f"?exp={expires}&sig={media_signature(name, expires)}"
+
+
+def check_signature(name, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return constant_time_compare(signature or '', media_signature(name, expires))
+
+
+def proof_url(request, file):
+    """Absolute, signed URL for a stored proof, None if the field is empty."""
+    if not file:
+        return None
+    return request.build_absolute_uri(file.url) + signed_query(file.name)
+
+
+def archived_proof_url(request, name):
+    """Signed URL for a proof in the cold store (api.views.archived_proof)."""
+    if not name:
+        return None
+    # signed under their own prefix, so a hot proof's URL doesn't open the archive
+    return request.build_absolute_uri(reverse('archived_proof', args=[name])) + signed_query(ARCHIVE_SIGNING_PREFIX + name)
+
+
+def etag_for(name, stat):
+    if is_content_addressed(name):
+        # the file name is the sha256 of its content
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def cache_control_for(name):
+    # private: these are personal documents, shared caches must not keep them
+    if is_content_addressed(name):
+        return f"private, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"private, max-age={MUTABLE_MAX_AGE}"
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the whole
+    file (no/multi/garbled range), or False when it can't be satisfied.
+    """
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_file(path, start, end, chunk_size=64 * 1024):
+    """Bytes start..end (inclusive) of a file, a chunk at a time, for the WSGI server."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def aiter_file(path, start, end, chunk_size=64 * 1024):
+    """
+    Bytes start..end (inclusive) of a file for the ASGI server. It has no
+    sendfile and reads a sync iterator to the end before sending, so the
+    reads go chunk by chunk to a worker thread instead.
+    """
+    read = sync_to_async(lambda f, size: f.read(size), thread_sensitive=False)
+    f = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await read(f, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
@@ -0,0 +1,277 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+
+# Off: the middleware removes itself and no query wrapper is installed
+METRICS_ENABLED = getattr(settings, 'API_METRICS_ENABLED', True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class RequestMetrics:
+    """
+    One request's numbers. An async view's sync_to_async calls can run on
+    several threads at once (thread_sensitive=False), so updates take the lock.
+    """
+    __slots__ = ('lock', 'queries', 'query_time', 'serialize_time')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.query_time = 0.0
+        self.serialize_time = 0.0
+
+    def add_query(self, duration):
+        with self.lock:
+            self.queries += 1
+            self.query_time += duration
+
+    def add_serialization(self, duration):
+        with self.lock:
+            self.serialize_time += duration
+
+
+# The request being measured. Async views run their ORM calls through
+# sync_to_async, which copies the context, so queries on those threads
+# land on the same RequestMetrics.
+current = contextvars.ContextVar('api_request_metrics', default=None)
+# Inside a serializing() block; per context, so one thread's block doesn't
+# hide another's
+_serializing = contextvars.ContextVar('api_serializing', default=False)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.serialize = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.responses = defaultdict(int)
+
+
+class Registry:
+    """Per (URL name, method) metrics for this worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(ViewMetrics)
+
+    def observe(self, view, method, status, duration, request_metrics, size):
+        with self.lock:
+            metrics = self.views[view, method]
+            metrics.responses[status] += 1
+            metrics.latency.observe(duration)
+            metrics.queries.observe(request_metrics.queries)
+            metrics.query_seconds += request_metrics.query_time
+            metrics.serialize.observe(request_metrics.serialize_time)
+            if size is not None:
+                metrics.size.observe(size)
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4)."""
+        with self.lock:
+            views = sorted(self.views.items())
+            families = {
+                'api_request_duration_seconds': ('histogram', 'Request latency.'),
+                'api_requests_total': ('counter', 'Responses by status code.'),
+                'api_db_queries_per_request': ('histogram', 'SQL queries per request.'),
+                'api_db_query_seconds_total': ('counter', 'Time spent in SQL queries.'),
+                'api_serialize_seconds': ('histogram', 'Time spent serializing and rendering the response body.'),
+                'api_response_size_bytes': ('histogram', 'Response body size (non-streaming responses).'),
+            }
+            samples = defaultdict(list)
+            for (view, method), metrics in views:
+                labels = f'view="{escape(view)}",method="{method}"'
+                samples['api_request_duration_seconds'] += metrics.latency.lines('api_request_duration_seconds', labels)
+                for status, count in sorted(metrics.responses.items()):
+                    samples['api_requests_total'].append(f'api_requests_total{{{labels},status="{status}"}} {count}')
+                samples['api_db_queries_per_request'] += metrics.queries.lines('api_db_queries_per_request', labels)
+                samples['api_db_query_seconds_total'].append(
+                    f'api_db_query_seconds_total{{{labels}}} {metrics.query_seconds}')
+                samples['api_serialize_seconds'] += metrics.serialize.lines('api_serialize_seconds', labels)
+                if metrics.size.count:
+                    samples['api_response_size_bytes'] += metrics.size.lines('api_response_size_bytes', labels)
+
+        lines = []
+        for name, (kind, help_text) in families.items():
+            lines += family(name, kind, help_text, samples[name])
+        return lines
+
+
+registry = Registry()
+
+
+def family(name, kind, help_text, samples):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', *samples]
+
+
+def exposition():
+    """Everything this process counts, including the profile cache and throttles."""
+    from . import profile_cache, throttling
+
+    lines = registry.exposition()
+    cache = profile_cache.stats.snapshot()
+    lines += family('api_profile_cache_requests_total', 'counter', 'Profile cache lookups.', [
+        f'api_profile_cache_requests_total{{result="hit"}} {cache["hits"]}',
+        f'api_profile_cache_requests_total{{result="miss"}} {cache["misses"]}',
+    ])
+    lines += family('api_throttle_requests_total', 'counter', 'Throttle decisions by scope.', [
+        f'api_throttle_requests_total{{scope="{scope}",result="{result}"}} {count}'
+        for scope, counts in throttling.stats.snapshot().items()
+        for result, count in counts.items()
+    ])
+    return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - start)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created fires again on every reconnect
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializing():
+    """Times the block as serialization; nested blocks are counted once."""
+    metrics = current.get()
+    if metrics is None or _serializing.get():
+        yield
+        return
+    token = _serializing.set(True)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_serialization(time.perf_counter() - start)
+        _serializing.reset(token)
+
+
+def timed_serialization(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with serializing():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class TimedJSONRenderer(JSONRenderer):
+    @timed_serialization
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL queries and time, serialization time and response
+    size per URL name (see metrics_view for the exposition). In DEBUG the
+    numbers for the request are also sent as a Server-Timing header, which
+    browser dev tools show next to the request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, duration):
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        registry.observe(view, request.method, response.status_code, duration, metrics, size)
+        if settings.DEBUG:
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.queries} queries", '
+                f'serialize;dur={metrics.serialize_time * 1000:.1f}'
+            )
+        return response
+
+
+if METRICS_ENABLED:
+    connection_created.connect(install_query_wrapper, dispatch_uid='api.metrics')
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.contrib.postgres import operations
+from django.db import migrations, models
+
+
+STATUSES = ['Pending', 'To Pay', 'Confirmed', 'Released', 'Rejected']
+
+
+def normalize_statuses(apps, schema_editor):
+    # request_status used to be free text; fold case/spacing variants onto the
+    # canonical values so existing rows pass choices validation
+    StudentRequest = apps.get_model('api', 'StudentRequest')
+    canonical = {status.lower(): status for status in STATUSES}
+    stray = (
+        StudentRequest.objects.exclude(request_status__in=STATUSES)
+        .values_list('request_status', flat=True).distinct()
+    )
+    for value in list(stray):
+        fixed = canonical.get(' '.join((value or '').split()).lower())
+        if fixed:
+            StudentRequest.objects.filter(request_status=value).update(request_status=fixed)
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on Postgres, so building the indexes doesn't
+    block writes to a big table; a plain AddIndex elsewhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0013_userprofile_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_statuses, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='request_status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('To Pay', 'To Pay'), ('Confirmed', 'Confirmed'), ('Released', 'Released'), ('Rejected', 'Rejected')], default='Pending', max_length=50),
+        ),
+        AddIndexConcurrently(
+            model_name='studentrequest',
+            index=models.Index(fields=['created_at', 'id'], name='api_req_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='studentrequest',
+            index=models.Index(fields=['request_status', 'created_at', 'id'], name='api_req_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='studentrequest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='api_req_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='studentrequest',
+            index=models.Index(condition=models.Q(('request_status__in', ['Pending', 'To Pay', 'Confirmed'])), fields=['created_at', 'id'], name='api_req_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:19
+
+import api.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_studentrequest_status_choices_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrequest',
+            name='eclearance_proof_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='clearance_proofs/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='studentrequest',
+            name='payment_proof_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='payment_proofs/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='eclearance_proof',
+            field=api.images.ProofImageField(blank=True, null=True, thumbnail_field='eclearance_proof_thumb', upload_to='clearance_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='payment_proof',
+            field=api.images.ProofImageField(blank=True, null=True, thumbnail_field='payment_proof_thumb', upload_to='payment_proofs/'),
+        ),
+    ]
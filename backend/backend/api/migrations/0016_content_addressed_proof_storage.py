@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:23
+
+import api.images
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_proof_image_pipeline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='eclearance_proof',
+            field=api.images.ProofImageField(blank=True, null=True, storage=api.storage.get_proof_storage, thumbnail_field='eclearance_proof_thumb', upload_to='clearance_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='eclearance_proof_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=api.storage.get_proof_storage, upload_to='clearance_proofs/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='payment_proof',
+            field=api.images.ProofImageField(blank=True, null=True, storage=api.storage.get_proof_storage, thumbnail_field='payment_proof_thumb', upload_to='payment_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='payment_proof_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=api.storage.get_proof_storage, upload_to='payment_proofs/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+# Same expression as api.search.name_vector(), or the planner won't use it
+NAME_SEARCH_INDEX = GinIndex(
+    SearchVector('first_name', 'middle_name', 'last_name', config='simple'),
+    name='api_profile_name_search_idx',
+)
+
+
+def add_index(apps, schema_editor):
+    # full-text search needs Postgres; elsewhere the search falls back to icontains
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('api', 'UserProfile'), NAME_SEARCH_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('api', 'UserProfile'), NAME_SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_content_addressed_proof_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,121 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+
+SEARCH_INDEX = GinIndex(fields=['search_vector'], name='api_req_search_idx')
+
+# Weights: A = Student ID and full name, B = requested document, C = program.
+# 'simple' config: names and IDs aren't English words, see api.search.
+INSTALL_SQL = """
+CREATE FUNCTION api_request_search_vector(request_user_id integer, document text) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', concat_ws(' ', u.username, p.first_name, p.middle_name,
+                                                     p.last_name, p.extension_name)), 'A')
+        || setweight(to_tsvector('simple', coalesce(document, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(p.college_program, '')), 'C')
+    FROM auth_user u LEFT JOIN api_userprofile p ON p.user_id = u.id
+    WHERE u.id = request_user_id
+$$ LANGUAGE sql STABLE;
+
+-- Recomputed on every write: Django's save() sends back whatever value the
+-- instance had, which may be stale or NULL.
+CREATE FUNCTION api_studentrequest_search_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := api_request_search_vector(NEW.user_id, NEW.request);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_studentrequest_search BEFORE INSERT OR UPDATE ON api_studentrequest
+    FOR EACH ROW EXECUTE FUNCTION api_studentrequest_search_trigger();
+
+-- A student's ID, name or program changed: touch their requests so the
+-- trigger above rebuilds the vectors. The checks live here rather than in
+-- WHEN / UPDATE OF clauses, which would stop later migrations from altering
+-- those columns. OLD/NEW are NULL where they don't apply.
+CREATE FUNCTION api_student_search_refresh() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'auth_user' THEN
+        IF NEW.username IS DISTINCT FROM OLD.username THEN
+            UPDATE api_studentrequest SET search_vector = NULL WHERE user_id = NEW.id;
+        END IF;
+    ELSIF TG_OP <> 'UPDATE'
+            OR (OLD.user_id, OLD.first_name, OLD.middle_name, OLD.last_name, OLD.extension_name, OLD.college_program)
+               IS DISTINCT FROM
+               (NEW.user_id, NEW.first_name, NEW.middle_name, NEW.last_name, NEW.extension_name, NEW.college_program) THEN
+        UPDATE api_studentrequest SET search_vector = NULL WHERE user_id IN (OLD.user_id, NEW.user_id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_userprofile_search AFTER INSERT OR UPDATE OR DELETE ON api_userprofile
+    FOR EACH ROW EXECUTE FUNCTION api_student_search_refresh();
+
+CREATE TRIGGER auth_user_search AFTER UPDATE ON auth_user
+    FOR EACH ROW EXECUTE FUNCTION api_student_search_refresh();
+
+-- backfill through the trigger
+UPDATE api_studentrequest SET search_vector = NULL;
+"""
+
+UNINSTALL_SQL = """
+DROP TRIGGER IF EXISTS auth_user_search ON auth_user;
+DROP TRIGGER IF EXISTS api_userprofile_search ON api_userprofile;
+DROP TRIGGER IF EXISTS api_studentrequest_search ON api_studentrequest;
+DROP FUNCTION IF EXISTS api_student_search_refresh();
+DROP FUNCTION IF EXISTS api_studentrequest_search_trigger();
+DROP FUNCTION IF EXISTS api_request_search_vector(integer, text);
+"""
+
+# Typo-tolerant name matching (api.search.fuzzy_search_requests) needs
+# pg_trgm, which not every Postgres install ships; without it search is
+# full-text only.
+TRIGRAM_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS api_profile_first_name_trgm_idx ON api_userprofile USING gin (first_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS api_profile_last_name_trgm_idx ON api_userprofile USING gin (last_name gin_trgm_ops);
+"""
+
+TRIGRAM_UNINSTALL_SQL = """
+DROP INDEX IF EXISTS api_profile_last_name_trgm_idx;
+DROP INDEX IF EXISTS api_profile_first_name_trgm_idx;
+"""
+
+
+def install(apps, schema_editor):
+    # elsewhere (SQLite tests) the column stays NULL and search uses icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(INSTALL_SQL)
+    schema_editor.add_index(apps.get_model('api', 'StudentRequest'), SEARCH_INDEX)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trigram = cursor.fetchone() is not None
+    if has_trigram:
+        schema_editor.execute(TRIGRAM_SQL)
+
+
+def uninstall(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # the extension is left installed, something else may use it
+    schema_editor.execute(TRIGRAM_UNINSTALL_SQL)
+    schema_editor.remove_index(apps.get_model('api', 'StudentRequest'), SEARCH_INDEX)
+    schema_editor.execute(UNINSTALL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_profile_name_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrequest',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:34
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    StudentRequest = apps.get_model('api', 'StudentRequest')
+    RequestCounter = apps.get_model('api', 'RequestCounter')
+    # the release moment wasn't kept; the last change is the closest there is
+    StudentRequest.objects.filter(request_status='Released').update(released_at=F('updated_at'))
+
+    # same counts as api.counters.compute()
+    requests = StudentRequest.objects.order_by()
+    counts = {}
+    for status, n in requests.values_list('request_status').annotate(n=Count('id')):
+        counts['status', status] = n
+    for program, n in requests.values_list('user__profile__college_program').annotate(n=Count('id')):
+        counts['program', program or ''] = counts.get(('program', program or ''), 0) + n
+    tz = timezone.get_current_timezone()
+    for kind, field in (('created', 'created_at'), ('released', 'released_at')):
+        dated = requests.filter(**{f'{field}__isnull': False}).values_list(TruncDate(field, tzinfo=tz))
+        for date, n in dated.annotate(n=Count('id')):
+            counts[kind, date.isoformat()] = n
+    RequestCounter.objects.bulk_create(
+        [RequestCounter(kind=kind, key=key, count=n) for (kind, key), n in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_studentrequest_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentrequest',
+            name='released_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='RequestCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='api_counter_kind_key_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_request_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('student_id', models.CharField(max_length=150)),
+                ('student_name', models.CharField(max_length=400)),
+                ('college_program', models.CharField(blank=True, max_length=100, null=True)),
+                ('year_level', models.CharField(blank=True, max_length=50, null=True)),
+                ('affiliation', models.CharField(blank=True, max_length=100, null=True)),
+                ('is_graduate', models.BooleanField(blank=True, null=True)),
+                ('last_attended', models.CharField(blank=True, max_length=100, null=True)),
+                ('clearance_status', models.BooleanField(default=False)),
+                ('request', models.CharField(max_length=999)),
+                ('request_purpose', models.CharField(max_length=250)),
+                ('cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('claim_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('released_at', models.DateTimeField()),
+                ('eclearance_proof', models.CharField(blank=True, max_length=255)),
+                ('payment_proof', models.CharField(blank=True, max_length=255)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['released_at', 'id'], name='api_arch_released_idx'), models.Index(fields=['user', 'released_at', 'id'], name='api_arch_user_released_idx'), models.Index(fields=['student_id', 'released_at', 'id'], name='api_arch_student_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_job'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='requestcounter',
+            name='api_counter_kind_key_uniq',
+        ),
+        migrations.AddField(
+            model_name='requestcounter',
+            name='slot',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='requestcounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'key', 'slot'), name='api_counter_kind_key_slot_uniq'),
+        ),
+    ]
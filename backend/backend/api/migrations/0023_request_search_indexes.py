@@ -0,0 +1,45 @@
+from django.contrib.postgres.indexes import OpClass
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+# The admin search's istartswith/iexact lookups compare UPPER(column::text);
+# text_pattern_ops lets a prefix LIKE use the index whatever the collation
+SEARCH_INDEXES = [
+    models.Index(OpClass(Upper('request'), name='text_pattern_ops'), name='api_req_request_upper_idx'),
+    models.Index(OpClass(Upper('request_purpose'), name='text_pattern_ops'), name='api_req_purpose_upper_idx'),
+    models.Index(Upper('year_level'), name='api_req_year_level_upper_idx'),
+]
+
+
+def add_indexes(apps, schema_editor):
+    # CONCURRENTLY: the requests table stays writable while they build
+    if schema_editor.connection.vendor == 'postgresql':
+        model = apps.get_model('api', 'StudentRequest')
+        for index in SEARCH_INDEXES:
+            schema_editor.add_index(model, index, concurrently=True)
+
+
+def remove_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        model = apps.get_model('api', 'StudentRequest')
+        for index in SEARCH_INDEXES:
+            schema_editor.remove_index(model, index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0022_request_counter_slots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentrequest',
+            name='affiliation',
+            field=models.CharField(blank=True, choices=[('Student', 'Student'), ('Alumni', 'Alumni')], max_length=100, null=True),
+        ),
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
@@ -1,5 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
+from .images import ProofImageField
+from .storage import get_proof_storage
 
 # Create your models here.
 
@@ -13,6 +17,14 @@ class UserProfile(models.Model):
     birth_date = models.DateField(blank=True, null=True)
     college_program = models.CharField(max_length=100, blank=True, null=True)
     contact_number = models.CharField(max_length=15, blank=True, null=True)  # Optional field for contact number
+    updated_at = models.DateTimeField(auto_now=True)  # validator for conditional GETs
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # as stored, so the request counters can tell a program change (counters.py)
+        instance.loaded_program = dict(zip(field_names, values)).get('college_program')
+        return instance
 
     def __str__(self):
         full_name = f"{self.first_name} {self.middle_name or ''} {self.last_name}"
@@ -21,6 +33,27 @@ class UserProfile(models.Model):
         return full_name.strip()
 
 
+class RequestStatus(models.TextChoices):
+    PENDING = 'Pending'
+    TO_PAY = 'To Pay'
+    CONFIRMED = 'Confirmed'
+    RELEASED = 'Released'
+    REJECTED = 'Rejected'
+
+
+class Affiliation(models.TextChoices):
+    STUDENT = 'Student'
+    ALUMNI = 'Alumni'
+
+
+# Statuses the dashboards work through; everything else is history
+ACTIVE_STATUSES = [RequestStatus.PENDING, RequestStatus.TO_PAY, RequestStatus.CONFIRMED]
+
+
+# What the request counters are derived from (see counters.py)
+COUNTED_FIELDS = ('user_id', 'request_status', 'created_at', 'released_at')
+
+
 class StudentRequest(models.Model):
     user = models.ForeignKey(
         User, 
@@ -28,13 +61,17 @@ class StudentRequest(models.Model):
         related_name='requests',
     )
     year_level = models.CharField(max_length=50, blank=True, null=True)
-    affiliation = models.CharField(max_length=100, blank=True, null=True) #alumni or student
+    affiliation = models.CharField(max_length=100, choices=Affiliation.choices, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     #Part 1
     clearance_status = models.BooleanField(default=False)
-    eclearance_proof = models.ImageField(upload_to='clearance_proofs/', blank=True, null=True)
-    payment_proof = models.ImageField(upload_to='payment_proofs/', blank=True, null=True)
+    # New uploads are re-encoded (bounded size, EXIF stripped) and get a thumbnail, see images.py.
+    # Files are named by content hash so identical uploads are stored once, see storage.py.
+    eclearance_proof = ProofImageField(upload_to='clearance_proofs/', storage=get_proof_storage, blank=True, null=True, thumbnail_field='eclearance_proof_thumb')
+    payment_proof = ProofImageField(upload_to='payment_proofs/', storage=get_proof_storage, blank=True, null=True, thumbnail_field='payment_proof_thumb')
+    eclearance_proof_thumb = models.ImageField(upload_to='clearance_proofs/thumbs/', storage=get_proof_storage, blank=True, null=True, editable=False)
+    payment_proof_thumb = models.ImageField(upload_to='payment_proofs/thumbs/', storage=get_proof_storage, blank=True, null=True, editable=False)
     is_graduate = models.BooleanField(default=False, blank=True, null=True)
     last_attended = models.CharField(max_length=100, blank=True, null=True)
     #Part 2
@@ -42,9 +79,184 @@ class StudentRequest(models.Model):
 
     #Part 3
     request_purpose = models.CharField(max_length=250, default="Not specified",)  # Providing a default value for existing records
-    request_status = models.CharField(max_length=50, default="Pending")  # New field with default value
+    request_status = models.CharField(max_length=50, choices=RequestStatus.choices, default=RequestStatus.PENDING)
     claim_date = models.DateTimeField(blank=True, null=True)
     cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, default=None)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # used by the ?since= change feed
+    # when the request last became Released, None while it isn't (see save())
+    released_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Student ID + name, document and program for /requests/search/. Kept up to
+    # date by database triggers on Postgres (migration 0018), whatever Django writes.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # staff list / keyset pages: ORDER BY created_at, id
+            models.Index(fields=['created_at', 'id'], name='api_req_created_idx'),
+            # staff tabs: WHERE request_status = ? ORDER BY created_at, id
+            models.Index(fields=['request_status', 'created_at', 'id'], name='api_req_status_created_idx'),
+            # student dashboard: WHERE user_id = ? ORDER BY created_at, id
+            models.Index(fields=['user', 'created_at', 'id'], name='api_req_user_created_idx'),
+            # the active tabs are a small slice of the table once history piles up
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(request_status__in=ACTIVE_STATUSES),
+                name='api_req_active_created_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # as stored, so the request counters can tell what a save changed (counters.py)
+        loaded = dict(zip(field_names, values))
+        instance.loaded_counts = {name: loaded[name] for name in COUNTED_FIELDS if name in loaded}
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # the refreshed columns are the stored values now
+        if fields is None:
+            refreshed = set(COUNTED_FIELDS) - self.get_deferred_fields()
+        else:
+            refreshed = {self._meta.get_field(name).attname for name in fields}
+        self.loaded_counts = {
+            **(getattr(self, 'loaded_counts', None) or {}),
+            **{name: getattr(self, name) for name in COUNTED_FIELDS if name in refreshed},
+        }
+
+    def save(self, *args, **kwargs):
+        if self.request_status == RequestStatus.RELEASED:
+            if self.released_at is None:
+                self.released_at = timezone.now()
+        else:
+            self.released_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'request_status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'released_at'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.profile.first_name} {self.user.profile.last_name} - {self.request}"
+
+
+class RequestTombstone(models.Model):
+    # Left behind when a StudentRequest is deleted so polling clients can drop it
+    request_id = models.BigIntegerField()
+    # No FK constraint: deleting a User cascades to its requests, which writes
+    # tombstones pointing at the user being deleted in the same transaction
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='deleted_requests',
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Deleted request #{self.request_id}"
+
+class ArchivedRequest(models.Model):
+    """
+    A Released request moved out of the hot table by `manage.py
+    archive_requests` (see archive.py). Read-only, and compact: no search
+    vector or thumbnails, the student's ID, name and program are kept as they
+    were, and the proofs are names in the cold store (get_archive_storage).
+    """
+    # the StudentRequest's id, so a reference to the request still resolves
+    id = models.BigIntegerField(primary_key=True)
+    # No FK constraint: the archive outlives the student's account
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='archived_requests',
+    )
+    student_id = models.CharField(max_length=150)
+    student_name = models.CharField(max_length=400)
+    college_program = models.CharField(max_length=100, blank=True, null=True)
+    year_level = models.CharField(max_length=50, blank=True, null=True)
+    affiliation = models.CharField(max_length=100, blank=True, null=True)
+    is_graduate = models.BooleanField(blank=True, null=True)
+    last_attended = models.CharField(max_length=100, blank=True, null=True)
+    clearance_status = models.BooleanField(default=False)
+    request = models.CharField(max_length=999)
+    request_purpose = models.CharField(max_length=250)
+    cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    claim_date = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    released_at = models.DateTimeField()
+    eclearance_proof = models.CharField(max_length=255, blank=True)
+    payment_proof = models.CharField(max_length=255, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # staff lookup: newest releases first
+            models.Index(fields=['released_at', 'id'], name='api_arch_released_idx'),
+            # a student's own archive
+            models.Index(fields=['user', 'released_at', 'id'], name='api_arch_user_released_idx'),
+            # staff lookup by Student ID, which outlives a deleted account
+            models.Index(fields=['student_id', 'released_at', 'id'], name='api_arch_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_name} - {self.request} (archived)"
+
+
+class RequestCounter(models.Model):
+    """
+    Running request totals for the dashboard summary, kept up to date on
+    every write (see counters.py) so reading them never scans the requests.
+    kind is 'status', 'program', or 'created' / 'released' keyed by day.
+    Each counter is split across COUNTER_SLOTS rows that writers pick from
+    at random, so concurrent writes don't all queue on one row lock; its
+    value is the sum over the slots.
+    """
+    kind = models.CharField(max_length=20)
+    key = models.CharField(max_length=100)
+    slot = models.PositiveSmallIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'key', 'slot'], name='api_counter_kind_key_slot_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} [{self.slot}]: {self.count}"
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'queued'
+    # out of attempts; kept for a look and a retry from the admin
+    FAILED = 'failed'
+
+
+class Job(models.Model):
+    """
+    Background work for `manage.py run_jobs` (see jobs.py). Written in the
+    same transaction as the change it follows up on, so it exists exactly
+    when that change committed. Deleted once it has run.
+    """
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    # due time: later for a retry's backoff, and while a worker holds it
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # the workers' poll: due queued jobs, oldest first
+            models.Index(
+                fields=['run_at', 'id'],
+                condition=models.Q(status=JobStatus.QUEUED),
+                name='api_job_due_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.user.profile.first_name} {self.user.profile.last_name} - {self.request}"
\ No newline at end of file
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,103 @@
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+
+
+# Any configured cache works: LocMem (default, per process) or a shared
+# backend such as Redis so a save in one worker invalidates all of them.
+PROFILE_CACHE_ALIAS = getattr(settings, 'PROFILE_CACHE_ALIAS', 'default')
+# Upper bound on staleness when a per-process cache misses an invalidation
+PROFILE_CACHE_TIMEOUT = getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300)
+# Bump when the cached dict changes shape, old entries are then ignored
+PROFILE_CACHE_VERSION = 1
+
+PROFILE_COLUMNS = (
+    'username', 'email', 'is_staff',
+    'profile__id', 'profile__first_name', 'profile__middle_name', 'profile__last_name',
+    'profile__extension_name', 'profile__college_program', 'profile__updated_at',
+)
+
+
+class CacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else None,
+            }
+
+
+stats = CacheStats()
+
+
+def cache():
+    return caches[PROFILE_CACHE_ALIAS]
+
+
+def cache_key(user_id):
+    return f"api:profile:{user_id}"
+
+
+def load_profile(user_id):
+    """The user + profile fields the profile endpoint and token claims need, one query."""
+    row = User.objects.filter(pk=user_id).values_list(*PROFILE_COLUMNS).first()
+    if row is None:
+        return None
+    (username, email, is_staff, profile_id, first_name, middle_name, last_name,
+     extension_name, college_program, updated_at) = row
+    profile = None
+    if profile_id is not None:
+        # same as str(UserProfile)
+        full_name = f"{first_name} {middle_name or ''} {last_name}"
+        if extension_name:
+            full_name += f" {extension_name}"
+        profile = {
+            'id': profile_id,
+            'full_name': full_name.strip(),
+            'college_program': college_program,
+            'updated_at': updated_at,
+        }
+    return {'username': username, 'email': email, 'is_staff': is_staff, 'profile': profile}
+
+
+def get_profile(user_id):
+    key = cache_key(user_id)
+    data = cache().get(key, version=PROFILE_CACHE_VERSION)
+    stats.record(data is not None)
+    if data is None:
+        data = load_profile(user_id)
+        if data is not None:
+            cache().set(key, data, PROFILE_CACHE_TIMEOUT, version=PROFILE_CACHE_VERSION)
+    return data
+
+
+async def aget_profile(user_id):
+    key = cache_key(user_id)
+    data = await cache().aget(key, version=PROFILE_CACHE_VERSION)
+    stats.record(data is not None)
+    if data is None:
+        data = await sync_to_async(load_profile)(user_id)
+        if data is not None:
+            await cache().aset(key, data, PROFILE_CACHE_TIMEOUT, version=PROFILE_CACHE_VERSION)
+    return data
+
+
+def invalidate(user_id):
+    cache().delete(cache_key(user_id), version=PROFILE_CACHE_VERSION)
@@ -0,0 +1,236 @@
+import csv
+import io
+import json
+import os
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .hashing import hash_password, hash_pool
+from .models import UserProfile
+
+
+REQUIRED_FIELDS = ('username', 'email', 'first_name', 'last_name')
+PROFILE_FIELDS = (
+    'first_name', 'middle_name', 'last_name', 'extension_name',
+    'birth_date', 'college_program', 'contact_number',
+)
+ROSTER_FORMATS = ('csv', 'json', 'jsonl')
+
+# Rows checked, hashed and inserted per transaction
+ROSTER_CHUNK_SIZE = getattr(settings, 'ROSTER_CHUNK_SIZE', 1000)
+# Processes hashing passwords; 0 hashes in the calling process
+ROSTER_HASH_WORKERS = getattr(settings, 'ROSTER_HASH_WORKERS', os.cpu_count() or 1)
+# Errors listed in the report (the counts cover all of them)
+MAX_REPORTED_ERRORS = 100
+INSERT_RETRIES = 3
+
+
+class RosterError(Exception):
+    pass
+
+
+def guess_format(filename):
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return ext if ext in ROSTER_FORMATS else 'csv'
+
+
+def read_roster(file, fmt):
+    """
+    Yields (row number, dict) from a binary file. CSV and JSON lines are
+    streamed, a JSON array is parsed in one go.
+    """
+    if fmt == 'csv':
+        # utf-8-sig: rosters saved from Excel start with a BOM
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        for number, row in enumerate(reader, start=2):
+            yield number, row
+    elif fmt == 'jsonl':
+        for number, line in enumerate(io.TextIOWrapper(file, encoding='utf-8-sig'), start=1):
+            if line.strip():
+                yield number, json.loads(line)
+    elif fmt == 'json':
+        rows = json.load(io.TextIOWrapper(file, encoding='utf-8-sig'))
+        if not isinstance(rows, list):
+            raise RosterError("A JSON roster must be an array of objects.")
+        yield from enumerate(rows, start=1)
+    else:
+        raise RosterError(f"Unknown roster format {fmt!r}, use one of: {', '.join(ROSTER_FORMATS)}")
+
+
+def clean_row(row):
+    """Returns (user fields, profile fields, password), raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError("Row is not an object.")
+    row = {key.strip().lower(): (value.strip() if isinstance(value, str) else value)
+           for key, value in row.items() if key}
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing required field: {', '.join(missing)}")
+    profile = {field: row.get(field) or None for field in PROFILE_FIELDS}
+    if profile['birth_date']:
+        try:
+            profile['birth_date'] = date.fromisoformat(str(profile['birth_date']))
+        except ValueError:
+            raise ValueError("birth_date must be YYYY-MM-DD.")
+    user = {'username': str(row['username']), 'email': str(row['email'])}
+    # bulk_create skips the model validation; on Postgres an over-long value
+    # would even be cut short silently by the ::varchar(n)[] casts
+    user_instance, profile_instance = User(**user), UserProfile(**profile)
+    try:
+        user_instance.clean_fields(exclude=['password'])
+        profile_instance.clean_fields(exclude=['user'])
+    except ValidationError as e:
+        raise ValueError(' '.join(f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()))
+    # as cleaned: numbers from a JSON roster become strings
+    user = {field: getattr(user_instance, field) for field in user}
+    profile = {field: getattr(profile_instance, field) for field in PROFILE_FIELDS}
+    return user, profile, row.get('password') or None
+
+
+class RosterImport:
+    """
+    Creates a User + UserProfile per roster row, a chunk at a time:
+    existing usernames and emails are looked up for the whole chunk in two
+    queries, passwords are hashed in parallel across a process pool, and the
+    chunk is inserted with two bulk_create calls in one transaction.
+
+    Existing usernames are skipped (re-running an import is safe). Rows
+    without a password get an unusable one; students set theirs through the
+    reset-password flow (Student ID + email + birth date).
+    """
+
+    def __init__(self, chunk_size=ROSTER_CHUNK_SIZE, workers=ROSTER_HASH_WORKERS, dry_run=False, progress=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.progress = progress
+        self.pool = None
+        self.pool_size = 0
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.report = {'created': 0, 'skipped_existing': 0, 'invalid': 0, 'errors': []}
+
+    def error(self, number, username, message):
+        self.report['invalid'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': number, 'username': username, 'error': message})
+
+    def run(self, rows):
+        try:
+            chunk = []
+            for number, row in rows:
+                chunk.append((number, row))
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.import_chunk(chunk)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        return self.report
+
+    def hash_passwords(self, items):
+        if self.workers and len(items) > 1:
+            if self.pool is None:
+                # a small roster doesn't need every core
+                self.pool_size = min(self.workers, len(items))
+                self.pool = hash_pool(self.pool_size)
+            chunksize = max(1, len(items) // (self.pool_size * 4))
+            return list(self.pool.map(hash_password, items, chunksize=chunksize))
+        return [hash_password(item) for item in items]
+
+    def import_chunk(self, chunk):
+        cleaned = []
+        for number, row in chunk:
+            try:
+                user, profile, password = clean_row(row)
+            except ValueError as e:
+                self.error(number, row.get('username') if isinstance(row, dict) else None, str(e))
+                continue
+            cleaned.append((number, user, profile, password))
+
+        accepted = self.check_existing(cleaned)
+        accepted = self.hash_accepted(accepted)
+        for attempt in range(INSERT_RETRIES):
+            try:
+                self.insert(accepted)
+                break
+            except IntegrityError:
+                # someone registered one of these accounts meanwhile
+                if attempt == INSERT_RETRIES - 1:
+                    raise
+                accepted = self.check_existing(accepted, retry=True)
+        if self.progress:
+            self.progress(self.report)
+
+    def check_existing(self, rows, retry=False):
+        """Two queries for the whole chunk instead of two per student."""
+        usernames = [user['username'] for _, user, _, _ in rows]
+        emails = [user['email'] for _, user, _, _ in rows]
+        existing_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        existing_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        accepted = []
+        chunk_usernames, chunk_emails = set(), set()
+        for number, user, profile, password in rows:
+            username, email = user['username'], user['email']
+            if username in existing_usernames:
+                self.report['skipped_existing'] += 1
+                continue
+            if email in existing_emails:
+                self.error(number, username, "Email already exists")
+                continue
+            if not retry:
+                if username in self.seen_usernames or username in chunk_usernames:
+                    self.error(number, username, "Student ID appears more than once in the roster.")
+                    continue
+                if email in self.seen_emails or email in chunk_emails:
+                    self.error(number, username, "Email appears more than once in the roster.")
+                    continue
+                chunk_usernames.add(username)
+                chunk_emails.add(email)
+            accepted.append((number, user, profile, password))
+        self.seen_usernames |= chunk_usernames
+        self.seen_emails |= chunk_emails
+        return accepted
+
+    def hash_accepted(self, rows):
+        """Replaces each plain password with its hash (or an unusable password)."""
+        with_password = [row for row in rows if row[3]]
+        results = self.hash_passwords([(password, user['username'], user['email'])
+                                       for _, user, _, password in with_password])
+        hashes = {}
+        for (number, user, _, _), (hashed, problem) in zip(with_password, results):
+            if problem:
+                self.error(number, user['username'], problem)
+            hashes[number] = hashed
+
+        hashed_rows = []
+        for number, user, profile, password in rows:
+            if password:
+                if hashes[number] is None:
+                    continue
+                password = hashes[number]
+            else:
+                password = make_password(None)
+            hashed_rows.append((number, user, profile, password))
+        return hashed_rows
+
+    def insert(self, rows):
+        if self.dry_run:
+            self.report['created'] += len(rows)
+            return
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(password=password, **user) for _, user, _, password in rows
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=created, **profile) for created, (_, _, profile, _) in zip(users, rows)
+            ])
+        self.report['created'] += len(users)
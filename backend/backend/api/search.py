@@ -0,0 +1,162 @@
+import re
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import UserProfile
+
+
+# 'simple': names aren't English words, so no stemming or stop words
+NAME_SEARCH_CONFIG = 'simple'
+
+
+def name_vector():
+    # must stay the expression of api_profile_name_search_idx (migration 0017)
+    return SearchVector('first_name', 'middle_name', 'last_name', config=NAME_SEARCH_CONFIG)
+
+
+# What each part of a request weighs in the portable ranking; the same as
+# Postgres' default ts_rank weights for A (ID, name), B (document) and C
+# (program), the labels the search_vector trigger gives them (migration 0018).
+PORTABLE_WEIGHTS = (
+    (('user__username', 'user__profile__first_name', 'user__profile__middle_name',
+      'user__profile__last_name', 'user__profile__extension_name'), 1.0),
+    (('request',), 0.4),
+    (('user__profile__college_program',), 0.2),
+)
+
+_trigram = {}
+
+
+def search_words(term):
+    return re.findall(r'\w+', term)
+
+
+def prefix_query(words):
+    # every word, as a prefix: "sant 2021" finds Santos with ID 2021000002
+    return SearchQuery(' & '.join(f"{word}:*" for word in words), config=NAME_SEARCH_CONFIG, search_type='raw')
+
+
+def fulltext_available(using='default'):
+    # search_vector is only filled in by the Postgres triggers
+    return connections[using].vendor == 'postgresql'
+
+
+def trigram_available(using='default'):
+    """Whether pg_trgm is installed in the database; checked once per alias."""
+    if using not in _trigram:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                available = cursor.fetchone() is not None
+        _trigram[using] = available
+    return _trigram[using]
+
+
+def match_requests(requests, term):
+    """
+    Requests where every word of `term` starts a word of the Student ID,
+    name, requested document or program. Unordered; see search_requests().
+    """
+    words = search_words(term)
+    if not words:
+        return requests.none()
+    if fulltext_available(requests.db):
+        return requests.filter(search_vector=prefix_query(words))
+    for word in words:
+        condition = Q()
+        for fields, _ in PORTABLE_WEIGHTS:
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': word})
+        requests = requests.filter(condition)
+    return requests
+
+
+def search_requests(requests, term):
+    """
+    match_requests() annotated with a `rank` and ordered best first: a hit on
+    the Student ID or name outranks one on the document, which outranks the
+    program. Ties go newest first. Postgres ranks with ts_rank over the GIN
+    indexed search_vector; elsewhere each word scores its best field.
+    """
+    requests = match_requests(requests, term)
+    if fulltext_available(requests.db):
+        rank = SearchRank(F('search_vector'), prefix_query(search_words(term)))
+    else:
+        rank = Value(0.0)
+        for word in search_words(term):
+            rank += Case(
+                *[
+                    When(Q(**{f'{field}__icontains': word}), then=Value(weight))
+                    for fields, weight in PORTABLE_WEIGHTS for field in fields
+                ],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+    return requests.annotate(rank=rank).order_by('-rank', '-created_at', '-id')
+
+
+def ranked_page(ranked, offset, limit):
+    """
+    Rows offset..offset + limit of a search_requests() queryset. The ranking
+    and sort run over bare ids and only the page's rows get their user and
+    profile joined in: sorting every match with all its columns made broad
+    terms ("transcript") several times slower.
+    """
+    return ranked.filter(pk__in=ranked.values('pk')[offset:offset + limit])
+
+
+def fuzzy_search_requests(requests, term):
+    """
+    Typo-tolerant fallback for when search_requests() finds nothing: requests
+    of students whose first or last name is similar to a word of `term`,
+    closest first. Returns None without pg_trgm (see migration 0018).
+    """
+    words = search_words(term)
+    if not words or term.strip().isdigit() or not trigram_available(requests.db):
+        return None
+    condition = Q()
+    rank = Value(0.0)
+    for word in words:
+        # the % operator (similarity above pg_trgm.similarity_threshold, 0.3 by
+        # default), so the trigram indexes on the name columns are used
+        condition |= Q(first_name__trigram_similar=word) | Q(last_name__trigram_similar=word)
+        rank += Greatest(
+            TrigramSimilarity('user__profile__first_name', word),
+            TrigramSimilarity('user__profile__last_name', word),
+        )
+    profiles = UserProfile.objects.filter(condition).values('user_id')
+    return (
+        requests.filter(user_id__in=profiles)
+        .annotate(rank=rank)
+        .order_by('-rank', '-created_at', '-id')
+    )
+
+
+def matching_user_ids(term, using='default'):
+    """
+    Ids of the students a search box term refers to, as a subquery. Digits
+    are a Student ID prefix (the username's LIKE index); anything else
+    matches every word as a name prefix, through the full-text index on
+    Postgres and icontains elsewhere.
+    """
+    term = term.strip()
+    if term.isdigit():
+        return User.objects.filter(username__startswith=term).values('pk')
+    words = search_words(term)
+    if not words:
+        return User.objects.none().values('pk')
+    if connections[using].vendor == 'postgresql':
+        query = SearchQuery(' & '.join(f"{word}:*" for word in words), config=NAME_SEARCH_CONFIG, search_type='raw')
+        profiles = UserProfile.objects.annotate(name_search=name_vector()).filter(name_search=query)
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q(first_name__icontains=word) | Q(middle_name__icontains=word) | Q(last_name__icontains=word)
+        profiles = UserProfile.objects.filter(condition)
+    return profiles.values('user_id')
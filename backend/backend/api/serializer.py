@@ -1,21 +1,45 @@
+from decimal import Decimal
+
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
-from .models import StudentRequest, UserProfile
+from .models import ArchivedRequest, StudentRequest, UserProfile
+from .bulk import STATUS_TRANSITIONS
+from .events import CLAIM_DATE_FORMAT
+from .media import archived_proof_url, proof_url, signed_query
+from .metrics import timed_serialization
+
+CENTS = Decimal('0.01')
 
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = '__all__'
 
+class SignedImageField(serializers.ImageField):
+    # proofs are only served with a signature (see api.views.serve_media)
+    def to_representation(self, value):
+        return proof_url(self.context['request'], value)
+
+
 class StudentRequestSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: SignedImageField,
+    }
     # These method fields calculate data for the frontend to DISPLAY
     user_name = serializers.SerializerMethodField()
     birth_date = serializers.SerializerMethodField()
     eclearance_proof_url = serializers.SerializerMethodField()
     payment_proof_url = serializers.SerializerMethodField()
+    eclearance_proof_thumb_url = serializers.SerializerMethodField()
+    payment_proof_thumb_url = serializers.SerializerMethodField()
     created_at = serializers.DateTimeField(format="%Y-%m-%d", read_only=True)
     contact_number = serializers.CharField(source='user.profile.contact_number', read_only=True)
     claim_date = serializers.DateTimeField(
-        format="%m-%d-%Y - %I:%M %p",
+        format=CLAIM_DATE_FORMAT,
         required=False,
         allow_null=True
     )
@@ -33,7 +57,9 @@ class StudentRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StudentRequest
-        fields = '__all__'
+        # thumbnails are only exposed as *_thumb_url below; search_vector and
+        # released_at are internal
+        exclude = ['eclearance_proof_thumb', 'payment_proof_thumb', 'search_vector', 'released_at']
         # These fields are auto-generated or admin-controlled, so frontend cannot touch them
         read_only_fields = ['created_at', 'user']
         extra_kwargs = {
@@ -54,14 +80,162 @@ class StudentRequestSerializer(serializers.ModelSerializer):
         return None
     
     def get_eclearance_proof_url(self, obj):
-        request = self.context.get('request')
-        if obj.eclearance_proof:
-            return request.build_absolute_uri(obj.eclearance_proof.url)
-        return None
+        return proof_url(self.context.get('request'), obj.eclearance_proof)
     
     def get_payment_proof_url(self, obj):
-        request = self.context.get('request')
-        # Check if the image exists before trying to get its URL
-        if obj.payment_proof:
-            return request.build_absolute_uri(obj.payment_proof.url)
-        return None
\ No newline at end of file
+        # None if no image was uploaded
+        return proof_url(self.context.get('request'), obj.payment_proof)
+
+    def get_eclearance_proof_thumb_url(self, obj):
+        # Small preview for dashboards; older uploads have none
+        return proof_url(self.context['request'], obj.eclearance_proof_thumb)
+
+    def get_payment_proof_thumb_url(self, obj):
+        return proof_url(self.context['request'], obj.payment_proof_thumb)
+
+    @timed_serialization
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+class ArchivedRequestSerializer(serializers.ModelSerializer):
+    # read-only: archived requests are looked up, never edited
+    eclearance_proof_url = serializers.SerializerMethodField()
+    payment_proof_url = serializers.SerializerMethodField()
+    created_at = serializers.DateTimeField(format="%Y-%m-%d")
+    claim_date = serializers.DateTimeField(format=CLAIM_DATE_FORMAT)
+
+    class Meta:
+        model = ArchivedRequest
+        exclude = ['user', 'eclearance_proof', 'payment_proof']
+
+    def get_eclearance_proof_url(self, obj):
+        return archived_proof_url(self.context['request'], obj.eclearance_proof)
+
+    def get_payment_proof_url(self, obj):
+        return archived_proof_url(self.context['request'], obj.payment_proof)
+
+
+class BulkSelectionSerializer(serializers.Serializer):
+    # Either an explicit id list or the same filters as GET /requests/
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    status = serializers.CharField(required=False)
+    search = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if not any(key in attrs for key in ('ids', 'status', 'search')):
+            raise serializers.ValidationError('Provide ids or at least one filter (status, search).')
+        return attrs
+
+
+class BulkStatusSerializer(BulkSelectionSerializer):
+    request_status = serializers.ChoiceField(choices=list(STATUS_TRANSITIONS))
+    cost = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    claim_date = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class StudentRequestListSerializer:
+    """
+    Read-only fast path for list responses. Produces exactly the same JSON as
+    StudentRequestSerializer(many=True) but reads flat tuples from
+    .values_list() and formats them directly, skipping DRF's per-field
+    machinery and model instantiation. Keep the two in sync: the tests
+    compare their rendered output byte for byte.
+    """
+
+    columns = (
+        'id', 'created_at', 'claim_date', 'updated_at',
+        'user__username', 'user__email',
+        'user__profile__id', 'user__profile__first_name', 'user__profile__middle_name',
+        'user__profile__last_name', 'user__profile__extension_name', 'user__profile__birth_date',
+        'user__profile__contact_number', 'user__profile__college_program',
+        'year_level', 'affiliation', 'clearance_status', 'eclearance_proof', 'payment_proof',
+        'eclearance_proof_thumb', 'payment_proof_thumb',
+        'is_graduate', 'last_attended', 'request', 'request_purpose', 'request_status', 'cost',
+    )
+
+    def __init__(self, context):
+        self.request = context['request']
+        self.tz = timezone.get_current_timezone()
+        # absolute media base URL resolved once per response, not once per row
+        self.media_prefixes = {}
+        for field_name in ('eclearance_proof', 'payment_proof', 'eclearance_proof_thumb', 'payment_proof_thumb'):
+            storage = StudentRequest._meta.get_field(field_name).storage
+            if isinstance(storage, FileSystemStorage):
+                self.media_prefixes[field_name] = self.request.build_absolute_uri(storage.base_url)
+
+    @classmethod
+    def rows(cls, queryset):
+        return queryset.values_list(*cls.columns)
+
+    @staticmethod
+    def cursor_key(row):
+        # (created_at, id) for keyset pagination over rows()
+        return row[1], row[0]
+
+    def media_url(self, field_name, name):
+        if not name:
+            return None
+        prefix = self.media_prefixes.get(field_name)
+        if prefix is not None:
+            return prefix + filepath_to_uri(name).lstrip('/') + signed_query(name)
+        storage = StudentRequest._meta.get_field(field_name).storage
+        return self.request.build_absolute_uri(storage.url(name)) + signed_query(name)
+
+    @timed_serialization
+    def to_representation(self, rows):
+        tz = self.tz
+        media_url = self.media_url
+        data = []
+        for (pk, created_at, claim_date, updated_at, username, email,
+             profile_id, first_name, middle_name, last_name, extension_name, birth_date,
+             contact_number, college_program,
+             year_level, affiliation, clearance_status, eclearance_proof, payment_proof,
+             eclearance_proof_thumb, payment_proof_thumb,
+             is_graduate, last_attended, request, request_purpose, request_status, cost) in rows:
+
+            if profile_id is not None:
+                # same as str(UserProfile)
+                user_name = f"{first_name} {middle_name or ''} {last_name}"
+                if extension_name:
+                    user_name += f" {extension_name}"
+                user_name = user_name.strip()
+            else:
+                user_name = username
+
+            eclearance_proof_url = media_url('eclearance_proof', eclearance_proof)
+            payment_proof_url = media_url('payment_proof', payment_proof)
+            eclearance_proof_thumb_url = media_url('eclearance_proof_thumb', eclearance_proof_thumb)
+            payment_proof_thumb_url = media_url('payment_proof_thumb', payment_proof_thumb)
+            if updated_at is not None:
+                updated_at = updated_at.astimezone(tz).isoformat()
+                if updated_at.endswith('+00:00'):
+                    updated_at = updated_at[:-6] + 'Z'
+
+            data.append({
+                'id': pk,
+                'user_name': user_name,
+                'birth_date': birth_date.isoformat() if birth_date is not None else None,
+                'eclearance_proof_url': eclearance_proof_url,
+                'payment_proof_url': payment_proof_url,
+                'eclearance_proof_thumb_url': eclearance_proof_thumb_url,
+                'payment_proof_thumb_url': payment_proof_thumb_url,
+                'created_at': created_at.astimezone(tz).date().isoformat() if created_at is not None else None,
+                'contact_number': contact_number,
+                'claim_date': claim_date.astimezone(tz).strftime(CLAIM_DATE_FORMAT) if claim_date is not None else None,
+                'user': username,
+                'email': email,
+                'college_program': college_program,
+                'cost': f"{cost.quantize(CENTS):f}" if cost is not None else None,
+                'year_level': year_level,
+                'affiliation': affiliation,
+                'clearance_status': clearance_status,
+                'eclearance_proof': eclearance_proof_url,
+                'payment_proof': payment_proof_url,
+                'is_graduate': is_graduate,
+                'last_attended': last_attended,
+                'request': request,
+                'request_purpose': request_purpose,
+                'request_status': request_status,
+                'updated_at': updated_at,
+            })
+        return data
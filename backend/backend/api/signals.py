@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from django.contrib.auth.models import User
+
+from . import counters, jobs, profile_cache
+from .authentication import revoke_tokens
+from .conditional import requests_changed
+from .events import broker, build_event
+from .models import StudentRequest, UserProfile
+from .sync import record_deletion
+
+
+def publish_on_commit(event, owner_id):
+    # Build the event now (the instance may change later), send it once the
+    # change is actually visible to clients that refetch.
+    transaction.on_commit(lambda: broker.publish(event, owner_id))
+
+
+@receiver(pre_save, sender=StudentRequest)
+def student_request_saving(sender, instance, **kwargs):
+    counters.request_saving(instance)
+
+
+@receiver(post_save, sender=StudentRequest)
+def student_request_saved(sender, instance, created, **kwargs):
+    # as stored before this save: from the load, or fetched in pre_save for
+    # deferred and hand-built instances (None if there was no such row)
+    old_status = None if created else (getattr(instance, 'loaded_counts', None) or {}).get('request_status')
+    counters.request_saved(instance, created)
+    requests_changed([instance.user_id])
+    if old_status is not None and old_status != instance.request_status:
+        # sent by the job worker, not in the request
+        jobs.enqueue('request_status_email', request_id=instance.pk, status=instance.request_status)
+    publish_on_commit(build_event('created' if created else 'updated', instance), instance.user_id)
+
+
+@receiver(pre_delete, sender=StudentRequest)
+def student_request_deleting(sender, instance, origin=None, **kwargs):
+    counters.request_deleting(instance, origin)
+
+
+@receiver(post_delete, sender=StudentRequest)
+def student_request_deleted(sender, instance, **kwargs):
+    record_deletion(instance)
+    counters.request_deleted(instance)
+    requests_changed([instance.user_id])
+    publish_on_commit(build_event('deleted', instance), instance.user_id)
+
+
+def invalidate_profile(user_id):
+    # Again after commit: a read between now and the commit could have cached
+    # the old row.
+    profile_cache.invalidate(user_id)
+    transaction.on_commit(lambda: profile_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_changed(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
+    # the request lists show the student's name and program
+    requests_changed([instance.user_id])
+
+
+@receiver(pre_save, sender=UserProfile)
+def user_profile_saving(sender, instance, **kwargs):
+    counters.profile_saving(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def user_profile_saved(sender, instance, **kwargs):
+    counters.profile_saved(instance)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_profile(instance.pk)
+    if not created:
+        # Password, is_active or is_staff may have changed: tokens issued so
+        # far must stop working on the stateless (claims-only) endpoints.
+        revoke_tokens(instance.pk)
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_content_addressed(name):
+    return bool(name and HASHED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file under <upload_to>/<aa>/<sha256><ext>. Identical uploads
+    land on the same name and are written once, and a name never changes
+    content, so URLs can be cached forever.
+
+    Files are never deleted when a row goes away: another row may reference
+    the same content, and an identical upload may be racing the delete.
+    `manage.py dedupe_proofs` counts references and collects orphans after a
+    grace period instead.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # the final name is only known once the content is hashed in _save()
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        full_directory = self.path(directory) if directory else self.location
+        os.makedirs(full_directory, exist_ok=True)
+
+        # Hash while writing to a temp file in the target directory, then
+        # hard-link it into place: a single pass over the upload, and a
+        # concurrent identical upload just finds the link already there.
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            hashed = '/'.join(part for part in (directory, hexdigest[:2], hexdigest + ext) if part)
+            full_path = self.path(hashed)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                # Already stored. Touch it so a pending garbage collection
+                # sees it as freshly referenced.
+                os.utime(full_path)
+        finally:
+            os.unlink(temp_path)
+        return hashed
+
+
+proof_storage = ContentAddressedStorage()
+
+
+def get_proof_storage():
+    # callable so migrations reference this function instead of pickling settings
+    return proof_storage
+
+
+def get_archive_storage():
+    """
+    The cold store for archived requests' proofs (api/archive.py): the same
+    content-addressed layout under PROOF_ARCHIVE_ROOT, outside MEDIA_ROOT so
+    nothing serves it without going through the archive API.
+    """
+    return ContentAddressedStorage(location=settings.PROOF_ARCHIVE_ROOT)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RequestTombstone
+
+
+# Rows committed by a transaction that started before the previous poll can
+# carry an updated_at older than the token we handed out, so every poll looks
+# back a little. Clients upsert by id, so repeats are harmless.
+SYNC_OVERLAP = timedelta(seconds=getattr(settings, 'REQUEST_SYNC_OVERLAP_SECONDS', 5))
+
+# Tombstones are kept this long; a client whose token is older must resync.
+TOMBSTONE_RETENTION = timedelta(hours=getattr(settings, 'REQUEST_TOMBSTONE_RETENTION_HOURS', 24))
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+def make_token(moment):
+    # microseconds since epoch, only ever grows with the server clock
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def parse_token(token):
+    try:
+        value = int(token)
+    except (TypeError, ValueError):
+        raise InvalidSyncToken()
+    if value < 0:
+        raise InvalidSyncToken()
+    if value == 0:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+def get_changes(requests, tombstones, since):
+    """
+    Returns (changed_requests, deleted_ids, token, reset). Both querysets are
+    lazy, so async callers can evaluate them with the async ORM.
+
+    since=None (token "0") or a token older than the tombstone retention means
+    the client can't be brought up to date incrementally: it gets every row and
+    reset=True so it replaces its list instead of merging.
+    """
+    now = timezone.now()
+    token = make_token(now)
+
+    if since is None or since < now - TOMBSTONE_RETENTION:
+        return requests, tombstones.none().values_list('request_id', flat=True), token, True
+
+    horizon = since - SYNC_OVERLAP
+    changed = requests.filter(updated_at__gt=horizon)
+    deleted = tombstones.filter(deleted_at__gt=horizon).values_list('request_id', flat=True)
+    return changed, deleted, token, False
+
+
+def record_deletion(instance):
+    RequestTombstone.objects.create(request_id=instance.pk, user_id=instance.user_id)
+    prune_tombstones()
+
+
+def prune_tombstones():
+    RequestTombstone.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()
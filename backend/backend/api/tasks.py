@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from .jobs import task
+from .models import RequestStatus, StudentRequest
+
+
+STATUS_MESSAGES = {
+    RequestStatus.PENDING: "is waiting for the registrar's review.",
+    RequestStatus.TO_PAY: "has been reviewed. Please pay the fee and upload your proof of payment.",
+    RequestStatus.CONFIRMED: "is paid and being prepared.",
+    RequestStatus.RELEASED: "has been released.",
+    RequestStatus.REJECTED: "has been rejected. Please check your dashboard for details.",
+}
+
+
+@task
+def request_status_email(request_id, status):
+    """Tell the student their request moved to `status`."""
+    student_request = StudentRequest.objects.select_related('user').filter(pk=request_id).first()
+    # deleted or archived since, or an account without an email
+    if student_request is None or not student_request.user.email:
+        return
+    message = f"Your request for {student_request.request} {STATUS_MESSAGES.get(status, f'is now {status}.')}"
+    if status == RequestStatus.CONFIRMED and student_request.claim_date:
+        claim_date = timezone.localtime(student_request.claim_date)
+        message += f"\nYou can claim it on {claim_date:%B %d, %Y at %I:%M %p}."
+    send_mail(
+        f"Request #{request_id}: {status}",
+        message,
+        None,
+        [student_request.user.email],
+    )
+
+
+@task
+def password_reset_email(user_id):
+    """Let the account's owner know the password changed, in case it wasn't them."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.email:
+        return
+    send_mail(
+        "Your password was reset",
+        f"The password for Student ID {user.username} was just reset. If this wasn't you, "
+        "contact the registrar's office right away.",
+        None,
+        [user.email],
+    )
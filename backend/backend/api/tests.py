@@ -1,3 +1,1709 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import asyncapi, counters, jobs, metrics, profile_cache, throttling
+from .bulk import bulk_delete, bulk_transition
+from .images import process_proof
+from .media import signed_query
+from .models import ArchivedRequest, Job, RequestCounter, RequestStatus, RequestTombstone, StudentRequest, UserProfile
+from .serializer import StudentRequestListSerializer, StudentRequestSerializer
+from .storage import get_archive_storage, is_content_addressed
+from .views import MyTokenObtainPairSerializer
+
+
+def make_student(username, **profile_fields):
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", password="x")
+    profile_fields.setdefault('first_name', 'Juan')
+    profile_fields.setdefault('last_name', 'Dela Cruz')
+    UserProfile.objects.create(user=user, **profile_fields)
+    return user
+
+
+def make_requests(user, count, **fields):
+    fields.setdefault('request', 'Transcript of Records')
+    return StudentRequest.objects.bulk_create(
+        [StudentRequest(user=user, **fields) for _ in range(count)]
+    )
+
+
+def access_token(user):
+    # with the custom claims (is_staff, ...) the stateless endpoints rely on
+    return str(MyTokenObtainPairSerializer.get_token(user).access_token)
+
+
+def log_in(client, user):
+    # a real bearer token: the async views authenticate it themselves
+    if user is None:
+        client.credentials()
+    else:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(user)}')
+
+
+class GetRequestsQueryCountTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        self.url = reverse('get_requests')
+
+    def count_queries(self, **params):
+        params.setdefault('paginate', 'false')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_does_not_grow_with_rows(self):
+        make_requests(make_student('2020000001'), 1)
+        few, data = self.count_queries()
+        self.assertEqual(len(data), 1)
+
+        for i in range(2, 12):
+            make_requests(make_student(f'20200000{i:02d}'), 3)
+        many, data = self.count_queries()
+        self.assertEqual(len(data), 31)
+        self.assertEqual(few, many)
+
+        paged, data = self.count_queries(paginate='true', page_size=20)
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(few, paged)
+
+    def test_student_without_profile_still_listed(self):
+        user = User.objects.create_user(username='noprofile', password='x')
+        make_requests(user, 2)
+        _, data = self.count_queries()
+        self.assertEqual([row['user_name'] for row in data], ['noprofile', 'noprofile'])
+        self.assertIsNone(data[0]['birth_date'])
+
+
+class GetRequestsPaginationTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        self.url = reverse('get_requests')
+        self.maria = make_student('2021000001', first_name='Maria', last_name='Santos')
+        self.jose = make_student('2021000002', first_name='Jose', last_name='Rizal')
+        make_requests(self.maria, 5, request_status='Pending')
+        make_requests(self.jose, 4, request_status='To Pay', request='Diploma')
+
+    def collect_pages(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), int(params.get('page_size', 50)))
+            ids += [row['id'] for row in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids = self.collect_pages(page_size=2)
+        expected = list(
+            StudentRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+        ids = self.collect_pages(page_size=4, ordering='created_at')
+        self.assertEqual(ids, expected[::-1])
+
+    def test_cursor_is_stable_when_rows_share_created_at(self):
+        StudentRequest.objects.update(created_at=StudentRequest.objects.first().created_at)
+        ids = self.collect_pages(page_size=3)
+        self.assertEqual(sorted(ids, reverse=True), ids)
+        self.assertEqual(len(ids), 9)
+
+    def test_status_and_search_filters(self):
+        ids = self.collect_pages(status='To Pay')
+        self.assertEqual(len(ids), 4)
+        ids = self.collect_pages(status='Pending,To Pay')
+        self.assertEqual(len(ids), 9)
+        self.assertEqual(len(self.collect_pages(search='santos')), 5)
+        self.assertEqual(len(self.collect_pages(search='2021000002')), 4)
+        self.assertEqual(len(self.collect_pages(search='diploma')), 4)
+
+    def test_students_only_page_through_their_own_requests(self):
+        log_in(self.client, self.maria)
+        self.assertEqual(len(self.collect_pages(page_size=2)), 5)
+
+    def test_unpaginated_flag_returns_flat_list(self):
+        response = self.client.get(self.url, {'paginate': 'false', 'status': 'Pending'})
+        self.assertEqual(len(response.json()), 5)
+
+    def test_bad_cursor_and_ordering_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'ordering': 'cost'}).status_code, 400)
+
+
+class RequestSearchTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        self.url = reverse('request_search')
+        self.maria = make_student('2021000001', first_name='Maria', last_name='Santos', college_program='BSIT')
+        self.jose = make_student('2021000002', first_name='Jose', last_name='Rizal', college_program='BSCS')
+        self.diploma = make_requests(self.jose, 1, request='Diploma')[0]
+        # a document that mentions the name: must rank under the student's own requests
+        self.santos_cert = make_requests(self.jose, 1, request='Santos Foundation Certificate')[0]
+        self.transcripts = make_requests(self.maria, 3, request_status='Released')
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, **params):
+        return [row['id'] for row in self.search(**params)['results']]
+
+    def test_ranks_id_and_name_over_document_and_program(self):
+        ids = self.ids(q='santos')
+        self.assertEqual(set(ids[:3]), {r.id for r in self.transcripts})
+        self.assertEqual(ids[3], self.santos_cert.id)
+        self.assertEqual(self.ids(q='2021000002'), [self.santos_cert.id, self.diploma.id])
+        # every word must match, as a prefix
+        self.assertEqual(self.ids(q='jos dipl'), [self.diploma.id])
+        self.assertEqual(len(self.ids(q='bsit')), 3)
+        self.assertEqual(self.ids(q='nobody'), [])
+
+    def test_status_filter_and_pages(self):
+        self.assertEqual(len(self.ids(q='santos', status='Released')), 3)
+        ids, page = [], 1
+        while page:
+            data = self.search(q='santos', page=page, page_size=3)
+            ids += [row['id'] for row in data['results']]
+            page = data['next_page']
+        self.assertEqual(ids, self.ids(q='santos'))
+        self.assertEqual(self.client.get(self.url, {'q': ' '}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'x', 'page': '0'}).status_code, 400)
+
+    def test_students_only_search_their_own_requests(self):
+        log_in(self.client, self.maria)
+        self.assertEqual(self.ids(q='santos'), [r.id for r in reversed(self.transcripts)])
+        self.assertEqual(self.ids(q='diploma'), [])
+
+    def test_renaming_a_student_updates_the_index(self):
+        UserProfile.objects.filter(user=self.jose).update(last_name='Mercado')
+        self.assertEqual(len(self.ids(q='mercado')), 2)
+        self.assertEqual(self.ids(q='rizal'), [])
+        self.jose.username = '2021999999'
+        self.jose.save()
+        self.assertEqual(len(self.ids(q='2021999')), 2)
+
+    def test_portable_fallback_ranks_the_same_way(self):
+        with mock.patch('api.search.fulltext_available', return_value=False):
+            ids = self.ids(q='santos')
+            self.assertEqual(set(ids[:3]), {r.id for r in self.transcripts})
+            self.assertEqual(ids[3], self.santos_cert.id)
+            self.assertEqual(self.ids(q='jos dipl'), [self.diploma.id])
+
+    def test_list_search_uses_the_same_matching(self):
+        response = self.client.get(reverse('get_requests'), {'search': 'santos'})
+        self.assertEqual(len(response.json()['results']), 4)
+
+    def test_fuzzy_names_when_nothing_matches(self):
+        from .search import trigram_available
+        if not trigram_available():
+            self.skipTest('pg_trgm is not installed')
+        data = self.search(q='santso')
+        self.assertTrue(data['fuzzy'])
+        self.assertEqual({row['id'] for row in data['results']}, {r.id for r in self.transcripts})
+
+
+class GetRequestsChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        self.url = reverse('get_requests')
+        self.student = make_student('2022000001')
+        self.other = make_student('2022000002')
+        self.first, self.second = make_requests(self.student, 2)
+        make_requests(self.other, 1)
+
+    def poll(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_first_call_returns_everything_and_a_token(self):
+        data = self.poll('0')
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['changed']), 3)
+        self.assertGreater(int(data['token']), 0)
+
+    def test_only_changes_and_deletions_after_the_token(self):
+        token = self.poll('0')['token']
+        # push existing rows out of the overlap window
+        StudentRequest.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.poll(token)['changed'], [])
+
+        self.client.patch(
+            reverse('manage_request', args=[self.first.pk]),
+            {'request_status': 'To Pay'},
+            format='json',
+        )
+        self.client.delete(reverse('manage_request', args=[self.second.pk]))
+
+        data = self.poll(token)
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['id'] for row in data['changed']], [self.first.pk])
+        self.assertEqual(data['changed'][0]['request_status'], 'To Pay')
+        self.assertEqual(data['deleted'], [self.second.pk])
+        self.assertGreaterEqual(int(data['token']), int(token))
+
+    def test_students_only_see_their_own_changes(self):
+        self.client.delete(reverse('manage_request', args=[self.second.pk]))
+        log_in(self.client, self.other.profile.user)
+        token = self.poll('0')['token']
+        data = self.poll(str(int(token) - 1_000_000))
+        self.assertEqual(data['deleted'], [])
+        self.assertEqual(len(data['changed']), 1)
+
+    def test_stale_or_bad_token(self):
+        stale = timezone.now() - timedelta(days=30)
+        data = self.poll(str(int(stale.timestamp() * 1_000_000)))
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['changed']), 3)
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, 400)
+
+    def test_deleting_a_user_with_requests(self):
+        self.other.delete()
+        self.assertEqual(RequestTombstone.objects.count(), 1)
+
+
+class RequestEventsTests(TransactionTestCase):
+    async def read_event(self, stream):
+        while True:
+            chunk = await asyncio.wait_for(anext(stream), timeout=5)
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode()
+            if not chunk.startswith(':'):
+                return json.loads(chunk.split('data: ', 1)[1])
+
+    async def open_stream(self, user):
+        token = await sync_to_async(access_token)(user)
+        response = await self.async_client.get(reverse('request_events'), {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(': connected', (await anext(stream)).decode())
+        return stream
+
+    async def test_staff_and_owner_receive_status_changes(self):
+        staff = await sync_to_async(User.objects.create_user)(username='registrar', password='x', is_staff=True)
+        student = await sync_to_async(make_student)('2023000001')
+        other = await sync_to_async(make_student)('2023000002')
+        staff_stream = await self.open_stream(staff)
+        student_stream = await self.open_stream(student)
+        other_stream = await self.open_stream(other)
+
+        student_request = await StudentRequest.objects.acreate(user=student, request='Diploma')
+        event = await self.read_event(staff_stream)
+        self.assertEqual(event, {
+            'event': 'created', 'id': student_request.pk,
+            'request_status': 'Pending', 'claim_date': None, 'cost': None,
+        })
+        self.assertEqual((await self.read_event(student_stream))['id'], student_request.pk)
+
+        student_request.request_status = 'To Pay'
+        student_request.cost = Decimal('150')
+        await student_request.asave()
+        event = await self.read_event(student_stream)
+        self.assertEqual((event['event'], event['request_status'], event['cost']), ('updated', 'To Pay', '150.00'))
+
+        # nothing was queued for the unrelated student
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(other_stream), timeout=0.2)
+
+    async def test_rejects_missing_or_bad_token(self):
+        response = await self.async_client.get(reverse('request_events'))
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(reverse('request_events'), {'token': 'garbage'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refused_under_wsgi(self):
+        # the sync test client is a WSGI request
+        student = make_student('2025000009')
+        response = self.client.get(reverse('request_events'), {'token': access_token(student)})
+        self.assertEqual(response.status_code, 501)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.student = make_student('2024000001')
+        log_in(self.client, self.student)
+        self.url = reverse('get_requests')
+        self.student_request, = make_requests(self.student, 1)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.client.get(self.url, {'paginate': 'false'})
+        etag = response['ETag']
+        # a late commit has an older updated_at: a date can't validate the list
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get(self.url, {'paginate': 'false'}, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'paginate': 'false'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # the change token is in the cache, the user comes from the token claims
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        # different query params are a different representation
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_and_deletes_invalidate_the_etag(self):
+        etag = self.client.get(self.url, {'since': '0'})['ETag']
+        # a newer since token alone doesn't change the validator
+        response = self.client.get(self.url, {'since': '1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.student_request.request_status = 'To Pay'
+        self.student_request.save()
+        response = self.client.get(self.url, {'since': '0'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.student_request.delete()
+        response = self.client.get(self.url, {'since': '0'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_late_commit_invalidates_the_etag(self):
+        older, = make_requests(self.student, 1)
+        StudentRequest.objects.filter(pk=older.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        older.refresh_from_db()
+        etag = self.client.get(self.url)['ETag']
+
+        # a transaction that started before the newest row was written commits
+        # now: same row count, an updated_at older than the newest one
+        older.request_purpose = 'Scholarship'
+        older.save()
+        StudentRequest.objects.filter(pk=older.pk).update(updated_at=older.updated_at - timedelta(minutes=1))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # a poll before the commit sees the new token with the old rows, the
+        # commit moves the token again
+        with self.captureOnCommitCallbacks() as callbacks:
+            older.request_purpose = 'Employment'
+            older.save()
+            etag = self.client.get(self.url)['ETag']
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # another student's change isn't one to this student's list
+        etag = self.client.get(self.url)['ETag']
+        other = make_student('2024000002')
+        make_requests(other, 1)[0].save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bulk_writes_invalidate_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        bulk_transition(StudentRequest.objects.all(), [], RequestStatus.TO_PAY, {'cost': Decimal('150.00')})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        bulk_delete(StudentRequest.objects.all(), [])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_profile_endpoint(self):
+        url = reverse('current-user-profile')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        profile = self.student.profile
+        profile.college_program = 'BSIT'
+        profile.save()
+        log_in(self.client, User.objects.get(pk=self.student.pk))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['program'], 'BSIT')
+
+
+class BulkEndpointTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        self.student = make_student('2025000001')
+        self.pending = make_requests(self.student, 3, request_status='Pending')
+        self.confirmed = make_requests(self.student, 2, request_status='Confirmed')
+        self.released = make_requests(self.student, 4, request_status='Released')
+
+    def test_transition_by_ids_reports_each_id(self):
+        ids = [r.pk for r in self.pending] + [self.confirmed[0].pk, 999999]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('bulk_update_status'),
+                {'ids': ids, 'request_status': 'To Pay', 'cost': '150.00'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 3)
+        results = {row['id']: row['result'] for row in response.json()['results']}
+        self.assertEqual(results[self.pending[0].pk], 'updated')
+        self.assertEqual(results[self.confirmed[0].pk], 'invalid_transition')
+        self.assertEqual(results[999999], 'not_found')
+        # set-based: the query count doesn't depend on how many rows moved
+        # (one INSERT queues all the status emails)
+        self.assertLess(len(ctx.captured_queries), 9)
+
+        moved = StudentRequest.objects.filter(request_status='To Pay')
+        self.assertEqual(moved.count(), 3)
+        self.assertEqual({str(r.cost) for r in moved}, {'150.00'})
+
+    def test_transition_by_filter(self):
+        response = self.client.post(
+            reverse('bulk_update_status'),
+            {'status': 'Confirmed', 'request_status': 'Released'},
+            format='json',
+        )
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(StudentRequest.objects.filter(request_status='Released').count(), 6)
+
+    def test_bulk_delete_leaves_tombstones(self):
+        deleted = mock.Mock()
+        post_delete.connect(deleted, sender=StudentRequest)
+        self.addCleanup(post_delete.disconnect, deleted, sender=StudentRequest)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('bulk_delete_requests'), {'status': 'Released'}, format='json')
+        self.assertEqual(response.json()['deleted'], 4)
+        # one DELETE, no per-row signals from the Collector
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if q['sql'].startswith('DELETE FROM "api_studentrequest"')]), 1
+        )
+        deleted.assert_not_called()
+        self.assertEqual(StudentRequest.objects.count(), 5)
+        self.assertEqual(
+            set(RequestTombstone.objects.values_list('request_id', flat=True)),
+            {r.pk for r in self.released},
+        )
+
+    def test_requires_a_selection_and_staff(self):
+        response = self.client.post(reverse('bulk_delete_requests'), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('bulk_update_status'), {'ids': [1], 'request_status': 'Done'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        log_in(self.client, self.student)
+        response = self.client.post(reverse('bulk_delete_requests'), {'status': 'Pending'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(StudentRequest.objects.count(), 9)
+
+    def test_student_clears_own_history(self):
+        other = make_student('2025000002')
+        make_requests(other, 2, request_status='Released')
+        log_in(self.client, self.student)
+        response = self.client.delete(reverse('delete_history'))
+        self.assertEqual(response.json()['deleted'], 4)
+        self.assertEqual(StudentRequest.objects.filter(request_status='Released').count(), 2)
+
+
+class RequestCounterTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        self.student = make_student('2026000001', college_program='BSIT')
+        self.other = make_student('2026000002', college_program='BSN')
+        make_requests(self.student, 3, request_status='Pending')
+        make_requests(self.other, 2, request_status='Confirmed')
+        # bulk_create skips the signals
+        counters.rebuild()
+
+    def assertInSync(self):
+        self.assertEqual(counters.rebuild(dry_run=True), {})
+
+    def summary(self):
+        log_in(self.client, self.staff)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('requests_summary'))
+        self.assertEqual(response.status_code, 200)
+        # the token's user, then the counters
+        self.assertEqual(len(ctx.captured_queries), 2)
+        return response.json()
+
+    def test_single_row_writes_keep_counters_exact(self):
+        log_in(self.client, self.student)
+        response = self.client.post(reverse('create_request'), {'request': 'Diploma'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()['id']
+        self.assertInSync()
+
+        log_in(self.client, self.staff)
+        for new_status in ('To Pay', 'Confirmed', 'Released'):
+            response = self.client.patch(reverse('manage_request', args=[pk]), {'request_status': new_status}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(StudentRequest.objects.get(pk=pk).released_at)
+        self.assertInSync()
+
+        data = self.summary()
+        self.assertEqual(data['total'], 6)
+        self.assertEqual(data['by_status'], {'Pending': 3, 'To Pay': 0, 'Confirmed': 2, 'Released': 1, 'Rejected': 0})
+        self.assertEqual(data['by_program'], {'BSIT': 4, 'BSN': 2})
+        self.assertEqual(data['today'], {'date': timezone.localdate().isoformat(), 'created': 6, 'released': 1})
+
+        self.client.delete(reverse('manage_request', args=[pk]))
+        self.assertInSync()
+        self.assertEqual(self.summary()['today']['released'], 0)
+
+    def test_bulk_paths_keep_counters_exact(self):
+        log_in(self.client, self.staff)
+        self.client.post(reverse('bulk_update_status'), {'status': 'Confirmed', 'request_status': 'Released'}, format='json')
+        self.assertEqual(self.summary()['today']['released'], 2)
+        self.assertInSync()
+        self.client.post(reverse('bulk_delete_requests'), {'status': 'Pending'}, format='json')
+        self.assertInSync()
+        self.assertEqual(self.summary()['by_program'], {'BSN': 2})
+
+    def test_program_changes_and_deleted_students(self):
+        profile = UserProfile.objects.get(user=self.student)
+        profile.college_program = 'BSCS'
+        profile.save()
+        self.assertEqual(self.summary()['by_program'], {'BSCS': 3, 'BSN': 2})
+        self.assertInSync()
+
+        self.other.delete()
+        self.assertInSync()
+        self.assertEqual(self.summary()['total'], 3)
+
+    def test_reconcile_command_fixes_drift(self):
+        make_requests(self.other, 4, request_status='Rejected')
+        out = io.StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('status Rejected: 0 -> 4', out.getvalue())
+        self.assertEqual(self.summary()['by_status']['Rejected'], 0)
+
+        call_command('reconcile_counters', stdout=io.StringIO())
+        self.assertInSync()
+        self.assertEqual(self.summary()['by_status']['Rejected'], 4)
+
+    def test_summary_is_staff_only(self):
+        log_in(self.client, self.student)
+        self.assertEqual(self.client.get(reverse('requests_summary')).status_code, 403)
+
+    def test_counters_are_split_across_slots(self):
+        log_in(self.client, self.student)
+        # each request's own transaction (an ASGI server's fresh connection) picks a slot
+        for counter_slot in (3, 7, 7):
+            with mock.patch.object(connection, 'counter_slot', counter_slot, create=True):
+                self.client.post(reverse('create_request'), {'request': 'Diploma'}, format='json')
+        self.assertEqual(
+            sorted(RequestCounter.objects.filter(kind='status', key='Pending', slot__gt=0).values_list('slot', 'count')),
+            [(3, 1), (7, 2)],
+        )
+        self.assertInSync()
+        self.assertEqual(self.summary()['by_status']['Pending'], 6)
+
+        # reconciling folds the slots back into one row
+        make_requests(self.student, 1, request_status='Pending')
+        counters.rebuild()
+        self.assertEqual(list(RequestCounter.objects.filter(kind='status', key='Pending').values_list('slot', 'count')),
+                         [(0, 7)])
+
+
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        self.student = make_student('2033000001', birth_date=date(2001, 5, 17))
+        self.pending = make_requests(self.student, 2, request_status='Pending')
+
+    def run_jobs(self):
+        out = io.StringIO()
+        call_command('run_jobs', '--once', '--concurrency', '1', stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_status_change_emails_from_the_worker(self):
+        log_in(self.client, self.staff)
+        response = self.client.patch(
+            reverse('manage_request', args=[self.pending[0].pk]), {'request_status': 'To Pay'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        # queued with the change, not sent in the request
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(list(Job.objects.values_list('task', 'payload')),
+                         [('request_status_email', {'request_id': self.pending[0].pk, 'status': 'To Pay'})])
+        # saving without a status change queues nothing
+        self.client.patch(reverse('manage_request', args=[self.pending[0].pk]), {'cost': '50.00'}, format='json')
+        self.assertEqual(Job.objects.count(), 1)
+
+        self.assertIn('1 jobs done, 0 failed', self.run_jobs())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['2033000001@example.com'])
+        self.assertIn('Transcript of Records has been reviewed', mail.outbox[0].body)
+        self.assertFalse(Job.objects.exists())
+
+    def test_status_change_of_partly_loaded_requests(self):
+        first, second = self.pending
+        # deferred loads
+        request = StudentRequest.objects.only('id').get(pk=first.pk)
+        request.request_status = 'To Pay'
+        request.save()
+        request = StudentRequest.objects.defer('request_status').get(pk=second.pk)
+        request.request_status = 'Rejected'
+        request.save(update_fields=['request_status'])
+        # built by hand with the pk of a stored row
+        request = StudentRequest(pk=first.pk, user=self.student, request_status='Confirmed')
+        request.save(update_fields=['request_status'])
+        # refreshed after a change made elsewhere: the saved status is a
+        # change from the refreshed one, not from the one it was saved with
+        StudentRequest.objects.filter(pk=first.pk).update(request_status='To Pay')
+        request.refresh_from_db(fields=['request_status'])
+        request.request_status = 'Confirmed'
+        request.save(update_fields=['request_status'])
+
+        self.assertEqual(list(Job.objects.order_by('id').values_list('payload', flat=True)), [
+            {'request_id': first.pk, 'status': 'To Pay'},
+            {'request_id': second.pk, 'status': 'Rejected'},
+            {'request_id': first.pk, 'status': 'Confirmed'},
+            {'request_id': first.pk, 'status': 'Confirmed'},
+        ])
+
+    def test_jobs_commit_with_the_change(self):
+        request = self.pending[0]
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                request.request_status = 'Rejected'
+                request.save()
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+        log_in(self.client, self.staff)
+        self.client.post(reverse('bulk_update_status'), {'status': 'Pending', 'request_status': 'Rejected'}, format='json')
+        self.assertEqual(Job.objects.count(), 2)
+        self.run_jobs()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_password_reset_notice(self):
+        response = self.client.post(reverse('reset_password_confirm'), {
+            'username': '2033000001', 'email': '2033000001@example.com',
+            'birth_date': '2001-05-17', 'new_password': 'a-new-Passw0rd!',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        self.run_jobs()
+        self.assertEqual(mail.outbox[0].subject, 'Your password was reset')
+
+    def test_retries_with_backoff_then_gives_up(self):
+        calls = []
+
+        def flaky(**payload):
+            calls.append(payload)
+            raise ConnectionError("mail server down")
+
+        with mock.patch.dict(jobs.TASKS, {'flaky': flaky}), mock.patch.object(jobs, 'MAX_ATTEMPTS', 2):
+            job = jobs.enqueue('flaky', n=1)
+            self.assertIn('0 jobs done, 1 failed', self.run_jobs())
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertIn('mail server down', job.last_error)
+            self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+            # not due yet
+            self.run_jobs()
+            self.assertEqual(len(calls), 1)
+
+            Job.objects.update(run_at=timezone.now())
+            self.run_jobs()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+            self.assertEqual(jobs.retry(Job.objects.all()), 1)
+            self.run_jobs()
+            self.assertEqual(len(calls), 3)
+
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_task')
+
+    def test_lease_is_per_job(self):
+        runs = []
+        with mock.patch.dict(jobs.TASKS, {'record': lambda n: runs.append(n)}):
+            jobs.enqueue_many('record', [{'n': n} for n in range(3)])
+            claimed = jobs.claim(3)
+            # the first job held the batch past the lease and another worker
+            # took the second one over
+            Job.objects.filter(pk=claimed[1].pk).update(run_at=timezone.now() + timedelta(minutes=1))
+            self.assertTrue(jobs.renew(claimed[0]))
+            jobs.run(claimed[0])
+            self.assertFalse(jobs.renew(claimed[1]))
+            before = claimed[2].run_at
+            self.assertTrue(jobs.renew(claimed[2]))
+            self.assertGreater(claimed[2].run_at, before)
+            self.assertEqual(Job.objects.get(pk=claimed[2].pk).run_at, claimed[2].run_at)
+        self.assertEqual(runs, [0])
+
+
+class JobWorkerConcurrencyTests(TransactionTestCase):
+    # worker threads have their own connections, so the jobs have to be committed
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_each_job_runs_once(self):
+        runs = []
+        lock = threading.Lock()
+
+        def record(n):
+            with lock:
+                runs.append(n)
+
+        with mock.patch.dict(jobs.TASKS, {'record': record}):
+            jobs.enqueue_many('record', [{'n': n} for n in range(60)])
+            out = io.StringIO()
+            call_command('run_jobs', '--once', '--concurrency', '4', '--batch-size', '5', stdout=out)
+        self.assertEqual(sorted(runs), list(range(60)))
+        self.assertIn('60 jobs done', out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+
+    def test_task_runs_outside_a_transaction(self):
+        in_transaction = []
+
+        def record():
+            in_transaction.append(connection.in_atomic_block)
+
+        with mock.patch.dict(jobs.TASKS, {'record': record}):
+            jobs.enqueue('record')
+            self.assertEqual([error for job, error in jobs.work(1)], [None])
+        # nothing held open (or locked) while an email would be sent
+        self.assertEqual(in_transaction, [False])
+        self.assertFalse(Job.objects.exists())
+
+
+class StudentRequestListSerializerTests(APITestCase):
+    def test_output_matches_model_serializer_byte_for_byte(self):
+        full = make_student('2026000001', middle_name='Reyes', extension_name='Jr.',
+                            birth_date=date(2001, 5, 17), contact_number='0917', college_program='BSIT')
+        bare = make_student('2026000002')
+        no_profile = User.objects.create_user(username='2026000003', password='x')
+        make_requests(full, 1, cost=Decimal('150'), claim_date=timezone.now(),
+                      eclearance_proof='clearance_proofs/my proof ñ.jpg',
+                      payment_proof='payment_proofs/receipt.png', request_status='Confirmed',
+                      eclearance_proof_thumb='clearance_proofs/thumbs/my proof ñ.jpg')
+        make_requests(bare, 1, is_graduate=None, last_attended='2019', year_level='4th Year')
+        make_requests(no_profile, 1, cost=Decimal('75.5'))
+
+        http_request = Request(APIRequestFactory().get('/api/requests/'))
+        queryset = StudentRequest.objects.order_by('id')
+        expected = StudentRequestSerializer(queryset, many=True, context={'request': http_request}).data
+        fast = StudentRequestListSerializer(context={'request': http_request})
+        actual = fast.to_representation(fast.rows(queryset))
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+
+class ExportRequestsTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+        student = make_student('2027000001', first_name='Niño', last_name='Santos')
+        make_requests(student, 3, request_status='Released', cost=Decimal('150.00'))
+        make_requests(student, 2, request_status='Pending')
+
+    def read_csv(self, response):
+        return list(csv.reader(io.StringIO(read_streaming(response).decode('utf-8-sig'))))
+
+    def get_asgi(self, **params):
+        return async_to_sync(self.async_client.get)(
+            reverse('export_requests'), params, headers={'Authorization': f'Bearer {access_token(self.staff)}'},
+        )
+
+    def test_streams_filtered_rows_with_profile_columns(self):
+        response = self.client.get(reverse('export_requests'), {'status': 'Released'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:3], ['Request ID', 'Student ID', 'Last Name'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1:4], ['2027000001', 'Santos', 'Niño'])
+        self.assertIn('150.00', rows[1])
+
+    def test_staff_only(self):
+        log_in(self.client, User.objects.get(username='2027000001'))
+        self.assertEqual(self.client.get(reverse('export_requests')).status_code, 403)
+
+    def test_formulas_are_not_exported_as_formulas(self):
+        student = make_student('2027000002', first_name='=HYPERLINK("http://example.com")', last_name='@SUM(A1)')
+        make_requests(student, 1, request_purpose='-2+3', request_status='Rejected')
+        rows = self.read_csv(self.client.get(reverse('export_requests'), {'status': 'Rejected'}))
+        self.assertEqual(rows[1][2:4], ["'@SUM(A1)", '\'=HYPERLINK("http://example.com")'])
+        self.assertIn("'-2+3", rows[1])
+
+    def test_each_server_gets_an_iterator_it_streams(self):
+        # the sync test client is a WSGI request, the async one an ASGI request
+        wsgi = self.client.get(reverse('export_requests'), {'status': 'Released'})
+        asgi = self.get_asgi(status='Released')
+        self.assertFalse(wsgi.is_async)
+        self.assertTrue(asgi.is_async)
+        self.assertEqual(self.read_csv(wsgi), self.read_csv(asgi))
+
+    def test_sent_in_chunks(self):
+        response = self.get_asgi()
+        self.assertTrue(response.is_async)
+
+        async def chunks():
+            return [chunk async for chunk in response.streaming_content]
+
+        with mock.patch('api.export.EXPORT_CHUNK_SIZE', 2):
+            # BOM + header, then two requests per chunk
+            self.assertEqual(len(async_to_sync(chunks)()), 4)
+
+    def test_management_command(self):
+        out = io.StringIO()
+        call_command('export_requests', status='Pending', stdout=out)
+        rows = list(csv.reader(io.StringIO(out.getvalue().lstrip('\ufeff'))))
+        self.assertEqual(len(rows), 3)
+
+
+def read_streaming(response):
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    # async_to_sync: any ORM calls run on this thread, inside the test's transaction
+    async def read():
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(read)()
+
+
+def make_image_upload(name='proof.jpg', size=(3000, 1500), fmt='JPEG', mode='RGB'):
+    image = Image.new(mode, size, 'white')
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotate 90 degrees
+    exif[0x010F] = 'PhoneMaker'
+    if fmt == 'JPEG':
+        image.save(buffer, format=fmt, exif=exif)
+    else:
+        image.save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+class ProofImagePipelineTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.student = make_student('2028000001')
+        log_in(self.client, self.student)
+
+    def test_upload_is_bounded_stripped_and_thumbnailed(self):
+        response = self.client.post(
+            reverse('create_request'),
+            {'request': 'Diploma', 'eclearance_proof': make_image_upload()},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertTrue(response.json()['eclearance_proof_thumb_url'].split('?')[0].endswith('.jpg'))
+
+        saved = StudentRequest.objects.get()
+        with Image.open(saved.eclearance_proof.path) as image:
+            # rotated upright from the EXIF flag, then scaled to 2000px
+            self.assertEqual(image.size, (1000, 2000))
+            self.assertEqual(len(image.getexif()), 0)
+        with Image.open(saved.eclearance_proof_thumb.path) as thumb:
+            self.assertLessEqual(max(thumb.size), 320)
+
+    def test_transparent_png_stays_png(self):
+        response = self.client.post(
+            reverse('create_request'),
+            {'request': 'Diploma', 'eclearance_proof': make_image_upload('shot.png', (800, 600), 'PNG', 'RGBA')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(StudentRequest.objects.get().eclearance_proof.name.endswith('.png'))
+
+    def test_payment_upload_through_patch(self):
+        student_request, = make_requests(self.student, 1)
+        response = self.client.patch(
+            reverse('manage_request', args=[student_request.pk]),
+            {'payment_proof': make_image_upload('receipt.jpg', (1200, 900))},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['payment_proof_thumb_url'])
+
+    def test_backfill_thumbnails_for_old_uploads(self):
+        old = SimpleUploadedFile('old.jpg', make_image_upload(size=(900, 600)).read())
+        student_request, = make_requests(self.student, 1)
+        name = StudentRequest.eclearance_proof.field.storage.save('clearance_proofs/old.jpg', old)
+        StudentRequest.objects.filter(pk=student_request.pk).update(eclearance_proof=name)
+
+        call_command('generate_proof_thumbnails', stdout=io.StringIO())
+        student_request.refresh_from_db()
+        self.assertTrue(student_request.eclearance_proof_thumb.name.startswith('clearance_proofs/thumbs/'))
+        self.assertEqual(student_request.eclearance_proof.name, name)
+
+    def test_rejects_non_images(self):
+        response = self.client.post(
+            reverse('create_request'),
+            {'request': 'Diploma', 'eclearance_proof': SimpleUploadedFile('x.jpg', b'not an image')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('eclearance_proof', response.json())
+
+
+class ContentAddressedStorageTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.student = make_student('2029000001')
+
+    def test_identical_uploads_are_stored_once(self):
+        log_in(self.client, self.student)
+        upload = make_image_upload(size=(600, 400)).read()
+        for name in ('IMG_2238.JPG', 'IMG_2238 (1).JPG'):
+            response = self.client.post(
+                reverse('create_request'),
+                {'request': 'Diploma', 'eclearance_proof': SimpleUploadedFile(name, upload)},
+                format='multipart',
+            )
+            self.assertEqual(response.status_code, 201)
+        first, second = StudentRequest.objects.order_by('id')
+        self.assertEqual(first.eclearance_proof.name, second.eclearance_proof.name)
+        self.assertTrue(is_content_addressed(first.eclearance_proof.name))
+        stored = [f for f in os.listdir(os.path.dirname(first.eclearance_proof.path)) if not f.startswith('.')]
+        self.assertEqual(len(stored), 1)
+
+    def write_legacy(self, name, content):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        old = time.time() - 3 * 24 * 3600
+        os.utime(path, (old, old))
+        return path
+
+    def test_backfill_and_garbage_collection(self):
+        a = self.write_legacy('clearance_proofs/1000002253.jpg', b'same bytes')
+        b = self.write_legacy('clearance_proofs/1000002253_zRB406o.jpg', b'same bytes')
+        orphan = self.write_legacy('payment_proofs/forgotten.jpg', b'nobody uses me')
+        make_requests(self.student, 1, eclearance_proof='clearance_proofs/1000002253.jpg')
+        make_requests(self.student, 1, eclearance_proof='clearance_proofs/1000002253_zRB406o.jpg')
+
+        out = io.StringIO()
+        call_command('dedupe_proofs', '--dry-run', stdout=out)
+        self.assertTrue(all(os.path.exists(p) for p in (a, b, orphan)))
+
+        call_command('dedupe_proofs', stdout=out)
+        names = set(StudentRequest.objects.values_list('eclearance_proof', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_content_addressed(name))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertFalse(any(os.path.exists(p) for p in (a, b, orphan)))
+        self.assertIn('1 shared', out.getvalue())
+
+    def test_recent_unreferenced_files_survive_the_grace_period(self):
+        path = os.path.join(self.media_root, StudentRequest.payment_proof.field.storage.save(
+            'payment_proofs/fresh.jpg', SimpleUploadedFile('fresh.jpg', b'just uploaded'),
+        ))
+        call_command('dedupe_proofs', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(path))
+
+
+class ServeMediaTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.student = make_student('2030000001')
+        self.content = bytes(range(256)) * 40
+        self.name = StudentRequest.payment_proof.field.storage.save(
+            'payment_proofs/receipt.jpg', SimpleUploadedFile('receipt.jpg', self.content),
+        )
+        make_requests(self.student, 1, payment_proof=self.name)
+
+    def signed_url(self):
+        log_in(self.client, self.student)
+        response = self.client.get(reverse('get_requests'), {'paginate': 'false'})
+        log_in(self.client, None)
+        url = response.json()[0]['payment_proof_url']
+        self.assertEqual(url, response.json()[0]['payment_proof'])
+        return url.replace('http://testserver', '')
+
+    def test_signed_url_serves_file_with_immutable_caching(self):
+        url = self.signed_url()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_streaming(response), self.content)
+        self.assertEqual(response['ETag'], '"%s"' % self.name.rsplit('/', 1)[1][:-4])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        url = self.signed_url()
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(read_streaming(response), self.content[10:20])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(read_streaming(response), self.content[-5:])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=999999-')
+        self.assertEqual(response.status_code, 416)
+
+        # stale If-Range falls back to the whole file
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_streamed_in_chunks_by_either_server(self):
+        url = self.signed_url()
+        # the sync test client is a WSGI request, the async one an ASGI request
+        for get, is_async in ((self.client.get, False), (async_to_sync(self.async_client.get), True)):
+            with mock.patch('api.media.open', wraps=open) as opened:
+                response = get(url)
+                self.assertEqual(response.is_async, is_async)
+                self.assertEqual(read_streaming(response), self.content)
+                response = get(url, headers={'Range': 'bytes=10-19'})
+                self.assertEqual(response.is_async, is_async)
+                self.assertEqual(read_streaming(response), self.content[10:20])
+            self.assertEqual(opened.call_count, 2)
+
+    def test_requires_signature_or_staff(self):
+        path = '/media/' + self.name
+        self.assertEqual(self.client.get(path).status_code, 403)
+        self.assertEqual(self.client.get(path + '?exp=9999999999&sig=forged').status_code, 403)
+        url = self.signed_url()
+        # a signature for one file doesn't open another
+        other = url.replace('payment_proofs', 'clearance_proofs')
+        self.assertEqual(self.client.get(other).status_code, 403)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+        staff = User.objects.create_user('registrar', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(path).status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect')
+    def test_accel_redirect_hands_file_to_nginx(self):
+        response = self.client.get(self.signed_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.name)
+        self.assertEqual(response.content, b'')
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        self.media_root, self.archive_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for root in (self.media_root, self.archive_root):
+            self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, PROOF_ARCHIVE_ROOT=self.archive_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = User.objects.create_user(username='registrar', password='x', is_staff=True)
+        self.student = make_student('2032000001', college_program='BSIT')
+        self.other = make_student('2032000002')
+
+        storage = StudentRequest.payment_proof.field.storage
+        self.own = storage.save('payment_proofs/own.jpg', SimpleUploadedFile('own.jpg', b'only old requests use me'))
+        self.shared = storage.save('payment_proofs/shared.jpg', SimpleUploadedFile('shared.jpg', b'a recent request too'))
+        old = time.time() - 3 * 24 * 3600
+        for name in (self.own, self.shared):
+            os.utime(os.path.join(self.media_root, name), (old, old))
+
+        long_ago = timezone.now() - timedelta(days=400)
+        make_requests(self.student, 3, request_status='Released', released_at=long_ago, payment_proof=self.own)
+        make_requests(self.student, 1, request_status='Released', released_at=long_ago, payment_proof=self.shared)
+        make_requests(self.other, 1, request_status='Released', released_at=timezone.now() - timedelta(days=10),
+                      payment_proof=self.shared)
+        make_requests(self.other, 1, request_status='Pending')
+        counters.rebuild()
+
+    def archive(self, *args):
+        out = io.StringIO()
+        call_command('archive_requests', '--batch-size', '2', '--grace-hours', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_released_requests_and_their_proofs(self):
+        self.assertIn('Would archive 4', self.archive('--dry-run'))
+        self.assertEqual(ArchivedRequest.objects.count(), 0)
+
+        self.assertIn('Archived 4 requests', self.archive())
+        self.assertEqual(StudentRequest.objects.count(), 2)
+        archived = list(ArchivedRequest.objects.order_by('id'))
+        self.assertEqual(len(archived), 4)
+        self.assertEqual(
+            (archived[0].student_id, archived[0].student_name, archived[0].college_program),
+            ('2032000001', 'Juan Dela Cruz', 'BSIT'),
+        )
+        # clients drop them like deleted rows; the counters only count the hot table
+        self.assertEqual(set(RequestTombstone.objects.values_list('request_id', flat=True)), {a.id for a in archived})
+        self.assertEqual(counters.rebuild(dry_run=True), {})
+
+        # same content, same name in the cold store
+        self.assertEqual(archived[0].payment_proof, self.own)
+        with get_archive_storage().open(self.own) as f:
+            self.assertEqual(f.read(), b'only old requests use me')
+        # the hot copy goes once no request references it
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, self.own)))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, self.shared)))
+
+        self.assertIn('Archived 0 requests', self.archive())
+
+    def test_resumes_where_it_stopped(self):
+        self.archive('--limit', '3')
+        self.assertEqual(ArchivedRequest.objects.count(), 3)
+
+        with mock.patch('api.archive.prune_tombstones', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.archive()
+        # the failed batch rolled back whole
+        self.assertEqual(ArchivedRequest.objects.count(), 3)
+        self.assertEqual(StudentRequest.objects.count(), 3)
+
+        self.archive()
+        self.assertEqual(ArchivedRequest.objects.count(), 4)
+        self.assertEqual(counters.rebuild(dry_run=True), {})
+
+    def test_recompresses_jpeg_proofs(self):
+        image = Image.effect_noise((600, 400), 60).convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=95)
+        storage = StudentRequest.payment_proof.field.storage
+        name = storage.save('payment_proofs/noisy.jpg', SimpleUploadedFile('noisy.jpg', buffer.getvalue()))
+        StudentRequest.objects.filter(payment_proof=self.own).update(payment_proof=name)
+
+        self.archive('--recompress-quality', '40')
+        cold = ArchivedRequest.objects.filter(user=self.student).values_list('payment_proof', flat=True)
+        cold_name = set(cold) - {self.shared}
+        self.assertEqual(len(cold_name), 1)
+        cold_name = cold_name.pop()
+        self.assertTrue(is_content_addressed(cold_name))
+        self.assertLess(get_archive_storage().size(cold_name), len(buffer.getvalue()))
+
+    def test_lookup_api(self):
+        self.archive()
+        log_in(self.client, self.other)
+        response = self.client.get(reverse('archived_requests'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+        pk = ArchivedRequest.objects.filter(payment_proof=self.own).values_list('id', flat=True)[0]
+        self.assertEqual(self.client.get(reverse('archived_request', args=[pk])).status_code, 404)
+
+        log_in(self.client, self.staff)
+        response = self.client.get(reverse('archived_requests'), {'student': '2032000001', 'page_size': 3})
+        data = response.json()
+        self.assertEqual((len(data['results']), data['next_page']), (3, 2))
+        self.assertNotIn('user', data['results'][0])
+
+        log_in(self.client, self.student)
+        response = self.client.get(reverse('archived_request', args=[pk]))
+        self.assertEqual(response.status_code, 200)
+        url = response.json()['payment_proof_url'].replace('http://testserver', '')
+
+        log_in(self.client, None)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_streaming(response), b'only old requests use me')
+        self.assertEqual(self.client.get(url.split('?')[0]).status_code, 403)
+        # a hot proof's signature doesn't open the archive
+        hot_url = '?' + signed_query(self.own).lstrip('?')
+        self.assertEqual(self.client.get(url.split('?')[0] + hot_url).status_code, 403)
+
+
+class AsyncRequestViewTests(APITestCase):
+    def setUp(self):
+        self.student = make_student('2031000001')
+        self.url = reverse('get_requests')
+
+    def test_rejects_anonymous_and_wrong_methods(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        log_in(self.client, self.student)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET')
+
+    # with the user from the token claims: a user lookup would take a slot
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_rejected_before_taking_a_db_slot(self):
+        throttling.backend().clear()
+        with mock.patch('api.asyncapi.db_slots') as db_slots:
+            response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer not-a-token')
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+            log_in(self.client, self.student)
+            response = self.client.get(self.url, HTTP_ACCEPT='application/xml')
+            self.assertEqual(response.status_code, 406)
+            with mock.patch.dict(throttling.SlidingWindowThrottle.THROTTLE_RATES, {'request_list': '0/min'}):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 429)
+            self.assertGreater(int(response['Retry-After']), 0)
+            self.assertIn('throttled', response.json()['detail'])
+        db_slots.assert_not_called()
+
+    def test_errors_go_through_the_exception_handler(self):
+        log_in(self.client, self.student)
+        handler = mock.Mock(side_effect=lambda exc, context: Response({'error': exc.detail}, status=exc.status_code))
+        with mock.patch.object(asyncapi.api_settings, 'EXCEPTION_HANDLER', handler):
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json(), {'error': 'Method "DELETE" not allowed.'})
+        self.assertEqual(response['Allow'], 'GET')
+
+    def test_json_create_and_bad_json(self):
+        log_in(self.client, self.student)
+        response = self.client.post(reverse('create_request'), {'request': 'Diploma'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user'], self.student.username)
+        response = self.client.post(reverse('create_request'), '{not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unparseable_or_oversized_bodies_are_bad_requests(self):
+        log_in(self.client, self.student)
+        # no boundary in the header
+        response = self.client.post(reverse('create_request'), b'--x\r\n', content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Multipart form parse error', response.json()['detail'])
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=10):
+            response = self.client.post(reverse('create_request'), {'request': 'Diploma' * 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('DATA_UPLOAD_MAX_MEMORY_SIZE', response.json()['detail'])
+
+    def test_upload_is_encoded_once_off_the_orm_thread(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        log_in(self.client, self.student)
+        with override_settings(MEDIA_ROOT=media_root), \
+                mock.patch('api.images.process_proof', wraps=process_proof) as spy:
+            response = self.client.post(
+                reverse('create_request'),
+                {'request': 'Diploma', 'eclearance_proof': make_image_upload(size=(600, 400))},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(spy.call_count, 1)
+
+
+
+class AsyncConcurrencyTests(TransactionTestCase):
+    # concurrent requests each get their own ORM thread and connection, so the
+    # rows have to be committed
+    async def test_concurrent_polls(self):
+        student = await sync_to_async(make_student)('2031000002')
+        await sync_to_async(make_requests)(student, 3)
+        token = await sync_to_async(access_token)(student)
+        headers = {'Authorization': f'Bearer {token}'}
+        url = reverse('get_requests')
+        responses = await asyncio.gather(*(self.async_client.get(url, headers=headers) for _ in range(10)))
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(len(responses[0].json()['results']), 3)
+
+
+class ProfileCacheTests(APITestCase):
+    def setUp(self):
+        self.student = make_student('2032000001')
+        log_in(self.client, self.student)
+        # issuing the token above already warmed the cache
+        cache.clear()
+        self.url = reverse('current-user-profile')
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_read_through_and_invalidated_by_profile_saves(self):
+        before = profile_cache.stats.snapshot()
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        # the user comes from the token claims, the profile from the cache
+        self.assertEqual(len(ctx.captured_queries), 0)
+        after = profile_cache.stats.snapshot()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(response.json()['program'], None)
+
+        # create_request updates the program through UserProfile.save()
+        self.client.post(reverse('create_request'), {'request': 'Diploma', 'college_program': 'BSCS'}, format='json')
+        self.assertEqual(self.client.get(self.url).json()['program'], 'BSCS')
+
+    def test_token_claims_come_from_the_cache(self):
+        self.client.post(reverse('token_obtain_pair'), {'username': '2032000001', 'password': 'x'}, format='json')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('token_obtain_pair'), {'username': '2032000001', 'password': 'x'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('api_userprofile' in query['sql'] for query in ctx.captured_queries))
+        claims = AccessToken(response.json()['access'])
+        self.assertEqual(claims['name'], 'Juan  Dela Cruz')
+
+    def test_stats_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse('profile_cache_stats')).status_code, 403)
+        staff = User.objects.create_user('registrar', password='x', is_staff=True)
+        log_in(self.client, staff)
+        self.assertIn('hit_rate', self.client.get(reverse('profile_cache_stats')).json())
+
+
+@override_settings(JWT_STATELESS_READS=True)
+class StatelessAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.student = make_student('2033000001')
+        make_requests(self.student, 2)
+        log_in(self.client, self.student)
+        self.url = reverse('get_requests')
+
+    def test_poll_authenticates_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('FROM "auth_user"' in query['sql'] for query in ctx.captured_queries))
+
+    def test_saving_the_user_revokes_earlier_tokens(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with mock.patch('api.authentication.time.time', return_value=time.time() + 5):
+            self.student.is_active = False
+            self.student.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(reverse('current-user-profile')).status_code, 401)
+
+    def test_demotion_reaches_tokens_refreshed_afterwards(self):
+        staff = User.objects.create_user('registrar', password='x', is_staff=True)
+        refresh = MyTokenObtainPairSerializer.get_token(staff)
+        # logged in a minute ago
+        refresh['auth_time'] -= 60
+        staff.is_staff = False
+        staff.save()
+        # refreshed since: the access token's own iat isn't before the demotion
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        # and no new ones: they would copy is_staff from the refresh token
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(JWT_STATELESS_READS=False)
+    def test_can_fall_back_to_database_lookups(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertTrue(any('FROM "auth_user"' in query['sql'] for query in ctx.captured_queries))
+
+    def test_writes_still_load_the_user(self):
+        User.objects.filter(pk=self.student.pk).update(is_active=False)
+        response = self.client.post(reverse('create_request'), {'request': 'Diploma'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ImportStudentsTests(APITestCase):
+    header = 'username,email,first_name,middle_name,last_name,birth_date,college_program,password\n'
+
+    def write_roster(self, content, suffix='.csv'):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, 'w', encoding='utf-8-sig') as f:
+            f.write(content)
+        return path
+
+    def test_command_creates_accounts_and_skips_existing(self):
+        make_student('2034000001')
+        path = self.write_roster(self.header + (
+            '2034000001,old@example.com,Juan,,Dela Cruz,,,\n'
+            '2034000002,ana@example.com,Ana,B.,Santos,2004-02-29,BSIT,\n'
+            '2034000003,ben@example.com,Ben,,Reyes,,BSCS,\n'
+            '2034000004,ana@example.com,Dup,,Email,,,\n'
+            '2034000005,,No,,Email,,,\n'
+        ))
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_students', path, '--chunk-size', '2', '--workers', '0', stdout=out, stderr=err)
+
+        self.assertIn('Created 2 students', out.getvalue())
+        self.assertIn('skipped 1 existing, 2 invalid', out.getvalue())
+        self.assertIn('row 5 (2034000004): Email already exists', err.getvalue())
+        ana = User.objects.get(username='2034000002')
+        self.assertEqual(str(ana.profile), 'Ana B. Santos')
+        self.assertEqual(ana.profile.birth_date, date(2004, 2, 29))
+        # no password in the roster: set through the reset flow
+        self.assertFalse(ana.has_usable_password())
+
+        # re-running is harmless
+        call_command('import_students', path, '--workers', '0', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='2034').count(), 3)
+
+    def test_json_lines_roster_with_passwords_hashed_in_worker_processes(self):
+        path = self.write_roster(
+            json.dumps({'username': '2034000010', 'email': 'a@example.com', 'first_name': 'A',
+                        'last_name': 'Uno', 'password': 'correct-horse-42'}) + '\n' +
+            json.dumps({'username': '2034000011', 'email': 'b@example.com', 'first_name': 'B',
+                        'last_name': 'Dos', 'password': '123'}) + '\n',
+            suffix='.jsonl',
+        )
+        err = io.StringIO()
+        call_command('import_students', path, '--workers', '2', stdout=io.StringIO(), stderr=err)
+        self.assertTrue(User.objects.get(username='2034000010').check_password('correct-horse-42'))
+        self.assertFalse(User.objects.filter(username='2034000011').exists())
+        self.assertIn('too short', err.getvalue())
+
+    def test_values_are_checked_against_the_model_fields(self):
+        path = self.write_roster(self.header + (
+            '2034000030,not-an-email,Bad,,Email,,,\n'
+            f'2034000031,d@example.com,{"X" * 101},,Long,,,\n'
+            f'{"9" * 151},e@example.com,Long,,Username,,,\n'
+            '2034000032,f@example.com,Fine,,Row,,,\n'
+        ))
+        err = io.StringIO()
+        call_command('import_students', path, '--workers', '0', stdout=io.StringIO(), stderr=err)
+        self.assertIn('row 2 (2034000030): email: Enter a valid email address.', err.getvalue())
+        self.assertIn('row 3 (2034000031): first_name: Ensure this value has at most 100 characters', err.getvalue())
+        self.assertIn('username: Ensure this value has at most 150 characters', err.getvalue())
+        self.assertEqual(list(User.objects.filter(email__endswith='@example.com').values_list('username', flat=True)),
+                         ['2034000032'])
+
+    def test_staff_endpoint(self):
+        url = reverse('import_students')
+        roster = SimpleUploadedFile('roster.csv', (self.header + '2034000020,c@example.com,C,,Tres,,,\n').encode())
+        log_in(self.client, make_student('2034000099'))
+        self.assertEqual(self.client.post(url, {'roster': roster}, format='multipart').status_code, 403)
+
+        log_in(self.client, User.objects.create_user('registrar', password='x', is_staff=True))
+        roster.seek(0)
+        response = self.client.post(url + '?dry_run=true', {'roster': roster}, format='multipart')
+        self.assertEqual(response.json()['created'], 1)
+        self.assertFalse(User.objects.filter(username='2034000020').exists())
+        roster.seek(0)
+        response = self.client.post(url, {'roster': roster}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(username='2034000020').exists())
+
+
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        throttling.backend().clear()
+        self.student = make_student('2035000001')
+
+    def login(self, username='2035000001', password='wrong'):
+        return self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': password}, format='json')
+
+    @mock.patch.dict(throttling.SlidingWindowThrottle.THROTTLE_RATES, {'login_student': '3/min'})
+    def test_student_id_is_throttled_before_any_work(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 401)
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch('django.contrib.auth.base_user.check_password') as check_password:
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(len(queries), 0)
+        check_password.assert_not_called()
+        # another student from the same IP is unaffected
+        self.assertEqual(self.login(username='2035000002').status_code, 401)
+        self.assertGreaterEqual(throttling.stats.snapshot()['login_student']['rejected'], 1)
+
+    @mock.patch.dict(throttling.SlidingWindowThrottle.THROTTLE_RATES, {'password_reset_ip': '4/min'})
+    def test_reset_endpoints_share_the_ip_budget_over_a_sliding_window(self):
+        verify, confirm = reverse('verify_reset_credentials'), reverse('reset_password_confirm')
+        start = 60 * 1000 + 45  # 45s into a window
+        with mock.patch.object(throttling.SlidingWindowThrottle, 'timer', mock.Mock(return_value=start)):
+            for i in range(2):
+                self.client.post(verify, {'username': f'x{i}'}, format='json')
+                self.client.post(confirm, {'username': f'y{i}'}, format='json')
+            self.assertEqual(self.client.post(verify, {'username': 'z'}, format='json').status_code, 429)
+        # 30s later half of the previous window still counts: 4 * 0.5 = 2 used
+        with mock.patch.object(throttling.SlidingWindowThrottle, 'timer', mock.Mock(return_value=start + 45)):
+            statuses = [self.client.post(verify, {'username': f'w{i}'}, format='json').status_code for i in range(3)]
+        self.assertEqual(statuses, [400, 400, 429])
+
+    def test_stats_are_staff_only(self):
+        url = reverse('throttle_stats')
+        log_in(self.client, self.student)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        log_in(self.client, User.objects.create_user('registrar', password='x', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        metrics.registry.clear()
+        self.staff = User.objects.create_user('registrar', password='x', is_staff=True)
+        log_in(self.client, self.staff)
+
+    def sample(self, text, name, **labels):
+        prefix = name + '{' + ','.join(f'{key}="{value}"' for key, value in labels.items())
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f"no sample {prefix} in\n{text}")
+
+    def test_records_queries_and_latency_per_url_name(self):
+        student = make_student('2036000001')
+        for _ in range(3):
+            StudentRequest.objects.create(user=student, request='Diploma')
+        self.client.get(reverse('get_requests'))
+        self.client.get(reverse('get_requests'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        labels = {'view': 'get_requests', 'method': 'GET'}
+        self.assertEqual(self.sample(text, 'api_requests_total', **labels, status=200), 2)
+        self.assertEqual(self.sample(text, 'api_request_duration_seconds_count', **labels), 2)
+        # queries on the async view's ORM threads are counted too
+        self.assertGreater(self.sample(text, 'api_db_queries_per_request_sum', **labels), 0)
+        self.assertGreater(self.sample(text, 'api_serialize_seconds_sum', **labels), 0)
+        self.assertGreater(self.sample(text, 'api_response_size_bytes_sum', **labels), 0)
+        self.assertIn('api_profile_cache_requests_total{result="hit"}', text)
+
+    def test_counts_from_concurrent_orm_threads_add_up(self):
+        request_metrics = metrics.RequestMetrics()
+
+        def run_queries():
+            for _ in range(500):
+                metrics.record_query(lambda *args: None, 'SELECT 1', (), False, {})
+            with metrics.serializing():
+                with metrics.serializing():
+                    pass
+
+        async def view():
+            token = metrics.current.set(request_metrics)
+            try:
+                await asyncio.gather(*[sync_to_async(run_queries, thread_sensitive=False)() for _ in range(8)])
+            finally:
+                metrics.current.reset(token)
+
+        async_to_sync(view)()
+        self.assertEqual(request_metrics.queries, 4000)
+        self.assertGreater(request_metrics.serialize_time, 0)
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header_in_debug(self):
+        response = self.client.get(reverse('get_requests'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", serialize;dur=')
+
+    def test_no_header_outside_debug_and_staff_only(self):
+        self.assertFalse(self.client.get(reverse('get_requests')).has_header('Server-Timing'))
+        log_in(self.client, make_student('2036000002'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+
+class SeedRegistrarTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_seeds_loginable_students_requests_and_proof_files(self):
+        seed = ['seed_registrar', '--students', '5', '--requests', '40', '--proofs', '2', '--password', 'seeded-pass-1']
+        call_command(*seed, stdout=io.StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith='seed0').count(), 5)
+        self.assertTrue(User.objects.get(username='seed-staff').is_staff)
+        self.assertEqual(StudentRequest.objects.count(), 40)
+        self.assertGreater(StudentRequest.objects.values('request_status').distinct().count(), 1)
+        proof = StudentRequest.objects.first().eclearance_proof
+        self.assertTrue(is_content_addressed(proof.name))
+        self.assertTrue(proof.storage.exists(proof.name))
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'seed0000001', 'password': 'seeded-pass-1'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertRaisesMessage(CommandError, '--reset'):
+            call_command(*seed, stdout=io.StringIO())
+        call_command(*seed, '--requests', '10', '--reset', stdout=io.StringIO())
+        self.assertEqual(StudentRequest.objects.count(), 10)
+
+
+class StudentRequestAdminTests(APITestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        self.url = reverse('admin:api_studentrequest_changelist')
+        self.ana = make_student('2037000001', first_name='Ana', middle_name='Bautista', last_name='Santos')
+        self.ben = make_student('2038000002', first_name='Ben', last_name='Reyes')
+        make_requests(self.ana, 2, affiliation='Student')
+        make_requests(self.ben, 1, affiliation='Alumni')
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, before = self.changelist_queries()
+        for i in range(10):
+            make_requests(make_student(f'20390000{i:02d}'), 2)
+        _, after = self.changelist_queries()
+        self.assertEqual(before, after)
+
+    def test_search_by_name_prefix_and_student_id(self):
+        response, _ = self.changelist_queries(q='san an')
+        self.assertEqual(response.context['cl'].result_count, 2)
+        response, _ = self.changelist_queries(q='2038')
+        self.assertEqual(list(response.context['cl'].result_list), list(StudentRequest.objects.filter(user=self.ben)))
+        response, _ = self.changelist_queries(q='nobody')
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_search_by_document_purpose_and_year_level(self):
+        make_requests(self.ben, 1, request='Diploma', request_purpose='Scholarship application', year_level='4th Year')
+        for term in ('diplo', 'scholarship', '4TH year'):
+            response, _ = self.changelist_queries(q=term)
+            self.assertEqual([r.request for r in response.context['cl'].result_list], ['Diploma'], term)
+        # prefixes, not substrings
+        response, _ = self.changelist_queries(q='ploma')
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_affiliation_filter_has_fixed_choices(self):
+        response, _ = self.changelist_queries(affiliation='Alumni')
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'the estimate comes from the Postgres planner')
+    @mock.patch('api.pagination.EXACT_COUNT_LIMIT', 2)
+    def test_large_results_are_counted_up_to_the_limit(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        count_sql = [q['sql'] for q in queries if 'COUNT(' in q['sql']]
+        self.assertTrue(count_sql)
+        self.assertTrue(all('LIMIT 3' in sql for sql in count_sql), count_sql)
+        # past the limit: the planner's estimate, never below what was counted
+        self.assertGreaterEqual(response.context['cl'].result_count, 3)
+
+    @mock.patch('api.pagination.EXACT_COUNT_LIMIT', 1)
+    def test_filtered_results_past_the_limit_are_counted_exactly(self):
+        response, _ = self.changelist_queries(affiliation='Student')
+        self.assertEqual(response.context['cl'].result_count, 2)
+        response, _ = self.changelist_queries(q='san')
+        self.assertEqual(response.context['cl'].result_count, 2)
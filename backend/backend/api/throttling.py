@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# Per process by default; 'api.throttling.CacheBackend' counts in the cache
+# (shared between workers when REDIS_URL is set)
+THROTTLE_BACKEND = getattr(settings, 'API_THROTTLE_BACKEND', 'api.throttling.MemoryBackend')
+THROTTLE_CACHE_ALIAS = getattr(settings, 'API_THROTTLE_CACHE_ALIAS', 'default')
+
+
+class MemoryBackend:
+    """Counters in a dict, for this process only."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.next_prune = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self.lock:
+            found = {}
+            for key in keys:
+                value = self.counters.get(key)
+                if value is not None and value[1] > now:
+                    found[key] = value[0]
+            return found
+
+    def incr(self, key, ttl):
+        now = time.monotonic()
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + ttl
+            self.counters[key] = (count + 1, expires)
+            if now >= self.next_prune:
+                # one pass a minute keeps the dict to the live windows
+                self.counters = {k: v for k, v in self.counters.items() if v[1] > now}
+                self.next_prune = now + 60
+            return count + 1
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class CacheBackend:
+    """Counters in a Django cache; atomic increments with Redis."""
+
+    def __init__(self):
+        self.cache = caches[THROTTLE_CACHE_ALIAS]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def incr(self, key, ttl):
+        self.cache.add(key, 0, ttl)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # expired between add() and incr()
+            self.cache.add(key, 1, ttl)
+            return 1
+
+
+class ThrottleStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: {'allowed': 0, 'rejected': 0})
+
+    def record(self, scope, allowed):
+        with self.lock:
+            self.counts[scope]['allowed' if allowed else 'rejected'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {scope: dict(counts) for scope, counts in sorted(self.counts.items())}
+
+
+stats = ThrottleStats()
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(THROTTLE_BACKEND)()
+    return _backend
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter: one counter per fixed window, and the count for
+    the last `duration` seconds is estimated as the current window plus the
+    previous one weighted by how much of it still overlaps. Two integers per
+    key instead of DRF's list of timestamps, and no burst at window edges.
+
+    Rejected requests are not counted, so a client that backs off gets back
+    in once its rate drops under the limit. Throttles run in APIView.initial(),
+    before the view does any hashing or queries.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        ident = self.get_ident_for(request)
+        if not ident:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now / self.duration - window
+        key = self.cache_format % {'scope': self.scope, 'ident': ident}
+        previous_key, current_key = f"{key}:{window - 1}", f"{key}:{window}"
+        counts = backend().get_many([previous_key, current_key])
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+
+        allowed = self.previous * (1 - self.elapsed) + self.current < self.num_requests
+        if allowed:
+            # check-then-increment: concurrent requests can overshoot by a few
+            backend().incr(current_key, 2 * self.duration)
+        stats.record(self.scope, allowed)
+        return allowed
+
+    def get_ident_for(self, request):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def wait(self):
+        remaining = 1 - self.elapsed
+        if self.current >= self.num_requests or not self.previous:
+            return remaining * self.duration
+        # until enough of the previous window has slid out
+        overlap = (self.num_requests - self.current) / self.previous
+        return max(remaining - overlap, 0) * self.duration
+
+
+class IPThrottle(SlidingWindowThrottle):
+    def get_ident_for(self, request):
+        # X-Forwarded-For is only trusted with REST_FRAMEWORK['NUM_PROXIES'] set
+        return self.get_ident(request)
+
+
+class StudentIDThrottle(SlidingWindowThrottle):
+    """Keyed by the Student ID in the body: spreading a guess over IPs doesn't help."""
+
+    def get_ident_for(self, request):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return username.strip().lower()[:150]
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginStudentThrottle(StudentIDThrottle):
+    scope = 'login_student'
+
+
+# verify and confirm share a budget, so alternating between them doesn't double it
+class PasswordResetIPThrottle(IPThrottle):
+    scope = 'password_reset_ip'
+
+
+class PasswordResetStudentThrottle(StudentIDThrottle):
+    scope = 'password_reset_student'
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = 'register_ip'
+
+
+class UserThrottle(SlidingWindowThrottle):
+    """Keyed by the authenticated user, for the API proper."""
+
+    def get_ident_for(self, request):
+        return str(request.user.pk)
+
+
+class RequestListThrottle(UserThrottle):
+    scope = 'request_list'
+
+
+class RequestCreateThrottle(UserThrottle):
+    scope = 'request_create'
+
+
+class ProfileThrottle(UserThrottle):
+    scope = 'profile'
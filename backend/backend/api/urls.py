@@ -1,6 +1,5 @@
 from django.urls import path
-from .views import get_requests, create_request, manage_request, register_user, MyTokenObtainPairView, CurrentUserProfileView, verify_reset_credentials, reset_password_confirm
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .views import get_requests, create_request, manage_request, register_user, MyTokenObtainPairView, MyTokenRefreshView, current_user_profile, profile_cache_stats, throttle_stats, metrics, verify_reset_credentials, reset_password_confirm, request_events, bulk_update_status, bulk_delete_requests, delete_history, export_requests, requests_summary, request_search, import_students, archived_requests, archived_request, archived_proof
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -9,10 +8,24 @@ urlpatterns = [
     path('requests/', get_requests, name='get_requests'),  
     path('requests/create/', create_request, name='create_request'), 
     path('requests/<int:pk>/', manage_request, name='manage_request'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('requests/events/', request_events, name='request_events'),
+    path('requests/bulk/status/', bulk_update_status, name='bulk_update_status'),
+    path('requests/bulk/delete/', bulk_delete_requests, name='bulk_delete_requests'),
+    path('requests/delete-history/', delete_history, name='delete_history'),
+    path('requests/export/', export_requests, name='export_requests'),
+    path('requests/search/', request_search, name='request_search'),
+    path('requests/summary/', requests_summary, name='requests_summary'),
+    path('archive/', archived_requests, name='archived_requests'),
+    path('archive/<int:pk>/', archived_request, name='archived_request'),
+    path('archive/proofs/<path:path>', archived_proof, name='archived_proof'),
+    path('token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
     path('register/', register_user, name='register'),
+    path('students/import/', import_students, name='import_students'),
     path('token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('user/profile/', CurrentUserProfileView.as_view(), name='current-user-profile'),
+    path('user/profile/', current_user_profile, name='current-user-profile'),
+    path('user/profile/cache-stats/', profile_cache_stats, name='profile_cache_stats'),
+    path('metrics/', metrics, name='metrics'),
+    path('throttle-stats/', throttle_stats, name='throttle_stats'),
     path('verify-reset-credentials/', verify_reset_credentials, name='verify_reset_credentials'),
     path('reset-password-confirm/', reset_password_confirm, name='reset_password_confirm'),
 
@@ -1,49 +1,240 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .models import StudentRequest, UserProfile
-from .serializer import StudentRequestSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .models import ArchivedRequest, RequestStatus, RequestTombstone, StudentRequest, UserProfile
+from .serializer import ArchivedRequestSerializer, BulkSelectionSerializer, BulkStatusSerializer, StudentRequestListSerializer, StudentRequestSerializer
+from . import jobs
+from .bulk import bulk_delete, bulk_transition
+from .pagination import DEFAULT_ORDERING, ORDERINGS, InvalidCursor, get_page_size, paginate_keyset
+from .sync import InvalidSyncToken, get_changes, parse_token
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from rest_framework import status
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.db import transaction #
-from rest_framework.views import APIView
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
-from django.core.mail import send_mail
 from django.conf import settings
+from django.utils import timezone
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import http_date
+from asgiref.sync import sync_to_async
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .counters import summary as counters_summary
+from .events import broker
+from .export import acsv_lines, csv_lines
+from .conditional import make_etag, not_modified, requests_validators, set_validators
+from .asyncapi import async_api_view, authenticate, render, request_data
+from .authentication import AUTH_TIME_CLAIM, is_revoked
+from .images import preprocess_proofs
+from .roster import RosterError, RosterImport, guess_format, read_roster
+from .search import fuzzy_search_requests, match_requests, ranked_page, search_requests, search_words
+from .throttling import (
+    LoginIPThrottle, LoginStudentThrottle, PasswordResetIPThrottle, PasswordResetStudentThrottle, ProfileThrottle,
+    RegisterIPThrottle, RequestCreateThrottle, RequestListThrottle, stats as throttle_counters,
+)
+from .profile_cache import aget_profile, get_profile, stats as profile_cache_counters
+from .metrics import exposition as metrics_exposition
+from .media import ARCHIVE_SIGNING_PREFIX, cache_control_for, check_signature, aiter_file, etag_for, iter_file, parse_range
+import asyncio
+import json
+import mimetypes
+import os
+import posixpath
 
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_requests(request):
+@async_api_view(['GET'], stateless=True, throttle_classes=[RequestListThrottle])
+async def get_requests(request):
+    """
+    Query params:
+      status    - filter by request_status (comma separated for several)
+      search    - words starting the student ID, name, document or program
+      ordering  - created_at / -created_at (default newest first)
+      cursor    - next_cursor from the previous page
+      page_size - rows per page (max 200)
+      paginate  - pass "false" to get the old flat list of every row
+      since     - change feed token (see below), "0" for the first call
+
+    With ?since= the response is {changed, deleted, token, reset}: only rows
+    created/updated after the token plus ids deleted since then. Pass the
+    returned token on the next poll. reset=true means the client should
+    replace its list with `changed` instead of merging.
+
+    Async: queries go through the async ORM, so the dashboard's polls don't
+    each pin a worker thread while they wait on the database or the client.
+    """
     # Logic: If user is staff/admin, show all. If student, show only theirs.
-    if request.user.is_staff:
-        requests = StudentRequest.objects.all()
-    else:
-        requests = StudentRequest.objects.filter(user=request.user)
-        
-    serializer = StudentRequestSerializer(
-    requests,
-    many=True,
-    context={'request': request}
-)
-    return Response(serializer.data)
+    # StudentRequestListSerializer reads user + profile columns through joins
+    # in the same query, so the list is one SELECT however many rows it has.
+    requests = StudentRequest.objects.all()
+    tombstones = RequestTombstone.objects.all()
+    if not request.user.is_staff:
+        requests = requests.filter(user_id=request.user.pk)
+        tombstones = tombstones.filter(user_id=request.user.pk)
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def create_request(request): 
+    # Most polls get exactly the same bytes as last time: answer those with a
+    # 304 from the list's change token instead of serializing the whole list.
+    etag = await requests_validators(request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    response = await build_requests_response(request, requests, tombstones)
+    if response.status_code == status.HTTP_200_OK:
+        set_validators(response, etag)
+    return response
+
+
+async def build_requests_response(request, requests, tombstones):
+    params = request.GET
+    if 'since' in params:
+        # status/search are ignored here: a row leaving the filter would
+        # otherwise never be reported to the client
+        try:
+            since = parse_token(params['since'])
+        except InvalidSyncToken:
+            return render({'error': 'Invalid since token.'}, status=status.HTTP_400_BAD_REQUEST)
+        changed, deleted, token, reset = get_changes(requests, tombstones, since)
+        serializer = StudentRequestListSerializer(context={'request': request})
+        return render({
+            'changed': serializer.to_representation([row async for row in serializer.rows(changed)]),
+            'deleted': [pk async for pk in deleted],
+            'token': token,
+            'reset': reset,
+        })
+
+    requests = filter_requests(requests, params)
+
+    ordering = params.get('ordering', DEFAULT_ORDERING)
+    if ordering not in ORDERINGS:
+        return render(
+            {'error': f'Invalid ordering. Use one of: {", ".join(ORDERINGS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if params.get('paginate', '').lower() in ('false', '0', 'no'):
+        if 'ordering' in params:
+            requests = requests.order_by(ordering, ordering.replace('created_at', 'id'))
+        serializer = StudentRequestListSerializer(context={'request': request})
+        return render(serializer.to_representation([row async for row in serializer.rows(requests)]))
+
+    serializer = StudentRequestListSerializer(context={'request': request})
+    try:
+        rows, next_cursor = await paginate_keyset(
+            serializer.rows(requests),
+            cursor=params.get('cursor'),
+            ordering=ordering,
+            page_size=get_page_size(params.get('page_size')),
+            key=serializer.cursor_key,
+        )
+    except InvalidCursor:
+        return render({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return render({
+        'results': serializer.to_representation(rows),
+        'next_cursor': next_cursor,
+    })
+
+
+def filter_requests(requests, params):
+    statuses = [s.strip() for s in params.get('status', '').split(',') if s.strip()]
+    if statuses:
+        requests = requests.filter(request_status__in=statuses)
+
+    search = params.get('search', '').strip()
+    if search:
+        # same matching as /requests/search/, without the ranking
+        requests = match_requests(requests, search)
+    return requests
+
+
+@async_api_view(['GET'], stateless=True, throttle_classes=[RequestListThrottle])
+async def request_search(request):
+    """
+    Ranked search. Query params:
+      q         - Student ID, name, document or program words; each must
+                  start a word of the request (so "sant 2021" finds Santos)
+      status    - as for /requests/
+      page      - 1, 2, ...
+      page_size - rows per page (max 200)
+
+    Best matches first (ID/name, then document, then program; ties newest
+    first), served from the GIN index on search_vector. When nothing matches
+    and pg_trgm is installed, names are matched fuzzily instead and the
+    response says "fuzzy": true. Students only search their own requests.
+    """
+    params = request.GET
+    term = params.get('q', '').strip()
+    if not search_words(term):
+        return render({'error': 'Missing search term (q).'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = int(params.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return render({'error': 'Invalid page.'}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = get_page_size(params.get('page_size'))
+
+    requests = StudentRequest.objects.all()
+    if not request.user.is_staff:
+        requests = requests.filter(user_id=request.user.pk)
+    requests = filter_requests(requests, {'status': params.get('status', '')})
+
+    serializer = StudentRequestListSerializer(context={'request': request})
+    offset = (page - 1) * page_size
+
+    async def fetch(ranked):
+        # one extra row tells whether there is a next page, without a COUNT
+        return [row async for row in serializer.rows(ranked_page(ranked, offset, page_size + 1))]
+
+    ranked = search_requests(requests, term)
+    rows = await fetch(ranked)
+    fuzzy = False
+    if not rows and (page == 1 or not await ranked.aexists()):
+        # may look up whether pg_trgm is installed
+        fuzzy_ranked = await sync_to_async(fuzzy_search_requests)(requests, term)
+        if fuzzy_ranked is not None:
+            rows = await fetch(fuzzy_ranked)
+            fuzzy = True
+
+    return render({
+        'results': serializer.to_representation(rows[:page_size]),
+        'page': page,
+        'next_page': page + 1 if len(rows) > page_size else None,
+        'fuzzy': fuzzy,
+    })
+
+@async_api_view(['POST'], throttle_classes=[RequestCreateThrottle])
+async def create_request(request):
+    """
+    Async upload path: the ASGI server receives the body without a thread,
+    the proofs are re-encoded on a worker thread, and only the short save
+    runs on the ORM's thread.
+    """
+    try:
+        data = await request_data(request)
+    except ParseError as e:
+        return render({'detail': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+    await sync_to_async(preprocess_proofs, thread_sensitive=False)(request.FILES.values())
+    body, code = await sync_to_async(save_new_request)(request, data)
+    return render(body, status=code)
+
+
+def save_new_request(request, data):
     serializer = StudentRequestSerializer(
-    data=request.data,
+    data=data,
     context={'request': request}
     )
     
@@ -52,7 +243,7 @@ def create_request(request):
 
         # --- START NEW LOGIC: Update User Profile Program ---
         # 1. Get the new program from the form data
-        new_program = request.data.get('college_program')
+        new_program = data.get('college_program')
         
         # 2. Check if user has a profile and if the program actually changed
         if new_program and hasattr(user, 'profile'):
@@ -69,9 +260,9 @@ def create_request(request):
         else:
             serializer.save(user=request.user)
             
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return serializer.data, status.HTTP_201_CREATED
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
 
 @api_view(['PUT', 'PATCH', 'DELETE'])
 def manage_request(request, pk):
@@ -90,7 +281,9 @@ def manage_request(request, pk):
             partial=(request.method == 'PATCH')
         )
         if serializer.is_valid():
-            serializer.save()
+            # the status email job (signals.py) commits with the change or not at all
+            with transaction.atomic():
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -99,8 +292,154 @@ def manage_request(request, pk):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
+def bulk_selection(params, requests=None):
+    if requests is None:
+        requests = StudentRequest.objects.all()
+    if 'ids' in params:
+        requests = requests.filter(id__in=params['ids'])
+    return filter_requests(requests, params)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_update_status(request):
+    """
+    Staff: move many requests to a new status at once, e.g.
+    {"ids": [1, 2, 3], "request_status": "To Pay", "cost": "150.00"} or
+    {"status": "Confirmed", "request_status": "Released"}.
+    Rows not in an allowed source status are reported as invalid_transition.
+    """
+    serializer = BulkStatusSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    changes = {field: data[field] for field in ('cost', 'claim_date') if field in data}
+    updated, results = bulk_transition(
+        bulk_selection(data), data.get('ids'), data['request_status'], changes
+    )
+    return Response({'updated': updated, 'results': results})
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_delete_requests(request):
+    """Staff: delete many requests at once, by {"ids": [...]} or filters like {"status": "Released"}."""
+    serializer = BulkSelectionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    deleted, results = bulk_delete(bulk_selection(data), data.get('ids'))
+    return Response({'deleted': deleted, 'results': results})
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_history(request):
+    # Students clearing their own finished (Released / Rejected) requests
+    history = StudentRequest.objects.filter(
+        user=request.user,
+        request_status__in=[RequestStatus.RELEASED, RequestStatus.REJECTED],
+    )
+    deleted, _ = bulk_delete(history, None)
+    return Response({'deleted': deleted})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def requests_summary(request):
+    """
+    Staff: the dashboard numbers without downloading the list. Requests per
+    status and per program, and how many were created / released today.
+    Read from counters kept on every write (counters.py), so the cost
+    doesn't grow with the table; `manage.py reconcile_counters` rebuilds them.
+    """
+    return Response(counters_summary())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def archived_requests(request):
+    """
+    Read-only lookup of requests moved out of the requests table by
+    `manage.py archive_requests` (archive.py). Query params:
+      student   - staff: a Student ID (still works once the account is gone)
+      page      - 1, 2, ...
+      page_size - rows per page (max 200)
+
+    Newest releases first. Students only see their own.
+    """
+    params = request.query_params
+    try:
+        page = int(params.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return Response({'error': 'Invalid page.'}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = get_page_size(params.get('page_size'))
+
+    archived = archived_requests_for(request.user).order_by('-released_at', '-id')
+    student = params.get('student', '').strip()
+    if student and request.user.is_staff:
+        archived = archived.filter(student_id=student)
+    offset = (page - 1) * page_size
+    # one extra row tells whether there is a next page, without a COUNT
+    rows = list(archived[offset:offset + page_size + 1])
+    serializer = ArchivedRequestSerializer(rows[:page_size], many=True, context={'request': request})
+    return Response({
+        'results': serializer.data,
+        'page': page,
+        'next_page': page + 1 if len(rows) > page_size else None,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def archived_request(request, pk):
+    try:
+        archived = archived_requests_for(request.user).get(pk=pk)
+    except ArchivedRequest.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    return Response(ArchivedRequestSerializer(archived, context={'request': request}).data)
+
+
+def archived_requests_for(user):
+    if user.is_staff:
+        return ArchivedRequest.objects.all()
+    return ArchivedRequest.objects.filter(user_id=user.pk)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_requests(request):
+    """
+    Staff: download requests as CSV. Takes the same status/search/ordering
+    params as GET /requests/ and streams rows as they come off the database,
+    so the first bytes go out immediately and memory doesn't grow with the
+    table.
+    """
+    ordering = request.query_params.get('ordering', DEFAULT_ORDERING)
+    if ordering not in ORDERINGS:
+        return Response(
+            {'error': f'Invalid ordering. Use one of: {", ".join(ORDERINGS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    requests = filter_requests(StudentRequest.objects.all(), request.query_params)
+    requests = requests.order_by(ordering, ordering.replace('created_at', 'id'))
+
+    filename = f"student-requests-{timezone.localdate():%Y%m%d}.csv"
+    # each server streams its own kind of iterator: WSGI would read an async
+    # one to the end before sending, ASGI a sync one
+    lines = acsv_lines(requests) if isinstance(request._request, ASGIRequest) else csv_lines(requests)
+    response = StreamingHttpResponse(lines, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterIPThrottle])
 def register_user(request):
     data = request.data
     try:
@@ -179,9 +518,30 @@ def register_user(request):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
   
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_students(request):
+    """
+    Staff: upload a roster (multipart field `roster`, CSV / JSON / JSON lines)
+    to create the accounts in bulk instead of one register call per student.
+    Same columns as `manage.py import_students`; ?dry_run=true only reports.
+    Large rosters with passwords take a while to hash, use the command for those.
+    """
+    roster = request.FILES.get('roster')
+    if roster is None:
+        return Response({'error': 'Upload the roster as "roster".'}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = request.data.get('format') or guess_format(roster.name)
+    dry_run = str(request.query_params.get('dry_run', '')).lower() in ('true', '1', 'yes')
+    try:
+        report = RosterImport(dry_run=dry_run).run(read_roster(roster, fmt))
+    except (RosterError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
 # --- NEW: STEP 1 - VERIFY CREDENTIALS ---
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PasswordResetIPThrottle, PasswordResetStudentThrottle])
 def verify_reset_credentials(request):
     username = request.data.get('username')
     email = request.data.get('email')
@@ -210,6 +570,7 @@ def verify_reset_credentials(request):
 # --- NEW: STEP 2 - RESET PASSWORD ---
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([PasswordResetIPThrottle, PasswordResetStudentThrottle])
 def reset_password_confirm(request):
     username = request.data.get('username')
     email = request.data.get('email')
@@ -232,9 +593,11 @@ def reset_password_confirm(request):
         except ValidationError as e:
             return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 3. Save new password
-        user.set_password(new_password)
-        user.save()
+        # 3. Save new password, and queue the notice with it
+        with transaction.atomic():
+            user.set_password(new_password)
+            user.save()
+            jobs.enqueue('password_reset_email', user_id=user.pk)
 
         return Response({'message': 'Password has been reset successfully.'}, status=status.HTTP_200_OK)
 
@@ -249,30 +612,261 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['username'] = user.username
         token['is_staff'] = user.is_staff
-        token['program'] = user.profile.college_program
-        token['name'] = str(user.profile)
+        token[AUTH_TIME_CLAIM] = token['iat']
+        # from the profile cache: login warms it for the dashboard's profile fetch
+        profile = get_profile(user.pk)['profile']
+        token['program'] = profile['college_program'] if profile else None
+        token['name'] = profile['full_name'] if profile else user.username
         return token
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginStudentThrottle]
 
-class CurrentUserProfileView(APIView):
-    permission_classes = [IsAuthenticated]
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # the access token would copy the refresh token's is_staff claim:
+        # after a demotion or deactivation the user has to log in again
+        if is_revoked(RefreshToken(attrs['refresh'])):
+            raise AuthenticationFailed("Token has been revoked.", code='token_revoked')
+        return super().validate(attrs)
 
-    def get(self, request):
-        user = request.user
-        # Check if profile exists
-        if hasattr(user, 'profile'):
-            profile = user.profile
-            return Response({
-                # This uses the same logic as your serializer (str representation)
-                "full_name": str(profile), 
-                "program": profile.college_program,
-                "student_id": user.username,
-                "email": user.email
-            })
-        return Response({
-            "full_name": "Student",
-            "program": "No Program",
-            "student_id": user.username
-        })
\ No newline at end of file
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
+
+@async_api_view(['GET'], stateless=True, throttle_classes=[ProfileThrottle])
+async def current_user_profile(request):
+    # read through the per-user profile cache, invalidated by UserProfile saves
+    data = await aget_profile(request.user.pk)
+    if data is None:
+        # valid token, but the account is gone
+        return render({'detail': 'User not found.'}, status=status.HTTP_401_UNAUTHORIZED)
+    profile = data['profile']
+    etag = make_etag(
+        request.user.pk, data['username'], data['email'],
+        profile['id'] if profile else None,
+        profile['updated_at'] if profile else None,
+    )
+    last_modified = profile['updated_at'] if profile else None
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    return set_validators(profile_response(data), etag, last_modified)
+
+
+def profile_response(data):
+    profile = data['profile']
+    # Check if profile exists
+    if profile is not None:
+        return render({
+            # Same as str(UserProfile), see profile_cache.load_profile
+            "full_name": profile['full_name'],
+            "program": profile['college_program'],
+            "student_id": data['username'],
+            "email": data['email']
+        })
+    return render({
+        "full_name": "Student",
+        "program": "No Program",
+        "student_id": data['username']
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_cache_stats(request):
+    """Hit/miss counters of the profile cache, for this worker process."""
+    return Response(profile_cache_counters.snapshot())
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    Prometheus text format: per-view latency, SQL queries, serialization
+    time and response size, plus the profile cache and throttle counters.
+    Per worker process, like the other stats endpoints.
+    """
+    return HttpResponse(metrics_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def throttle_stats(request):
+    """Allowed/rejected counts per throttle scope, for this worker process."""
+    return Response(throttle_counters.snapshot())
+
+# --- PUSH: request status events (Server-Sent Events) ---
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def sse_message(data=None, event=None, comment=None):
+    if comment is not None:
+        return f": {comment}\n\n"
+    lines = f"event: {event}\n" if event else ""
+    return lines + f"data: {json.dumps(data)}\n\n"
+
+
+async def request_events(request):
+    """
+    Long-lived text/event-stream of StudentRequest changes, served natively by
+    backend/asgi.py (one coroutine per connection, no worker thread held).
+    Students get events for their own requests, staff get every event:
+
+        event: updated
+        data: {"event": "updated", "id": 4, "request_status": "To Pay", ...}
+
+    Clients should refetch /requests/?since=<token> when an event arrives.
+    Under WSGI the stream is refused with 501 (the client keeps polling):
+    Django would collect the endless iterator into memory on a worker it
+    never gives back.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live updates need the ASGI server; poll /requests/?since= instead.'}, status=501,
+        )
+
+    # EventSource can't send an Authorization header
+    user = await authenticate(request, allow_query_token=True, stateless=True)
+    if user is None or not user.is_active:
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+
+    subscription = broker.subscribe(user.pk, user.is_staff)
+
+    async def stream():
+        try:
+            yield sse_message(comment='connected')
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # keeps proxies from closing an idle connection
+                    yield sse_message(comment='ping')
+                    continue
+                yield sse_message(event, event=event['event'])
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def staff_from_request(request):
+    # Django admin pages link proofs without a signature (session cookie),
+    # API clients may send their JWT instead
+    if getattr(request, 'user', None) is not None and request.user.is_authenticated:
+        return request.user.is_staff
+    authenticator = JWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return result is not None and result[0].is_staff
+
+
+def serve_media(request, path):
+    """
+    Serves uploaded proofs when DEBUG is off. Access needs a signed URL (the
+    serializers sign every proof URL they hand out) or a staff login.
+
+    Content-addressed files get their hash as a strong ETag and an immutable
+    Cache-Control, and Range requests are answered with 206. With
+    MEDIA_SENDFILE_BACKEND set the file itself is left to nginx
+    (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith('..') or name != path:
+        raise Http404
+    if not (check_signature(name, request.GET.get('exp'), request.GET.get('sig')) or staff_from_request(request)):
+        return JsonResponse({'error': 'You do not have permission to view this file.'}, status=403)
+    return stored_file_response(request, settings.MEDIA_ROOT, name, accel_redirect=True)
+
+
+def stored_file_response(request, root, name, accel_redirect):
+    full_path = safe_join(root, name)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = etag_for(name, stat)
+    last_modified = http_date(stat.st_mtime)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+        response = HttpResponseNotModified()
+    elif accel_redirect and settings.MEDIA_SENDFILE_BACKEND == 'x-accel-redirect':
+        # nginx does Range, sendfile and the transfer from an internal location
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + filepath_to_uri(name)
+    elif settings.MEDIA_SENDFILE_BACKEND == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = media_file_response(request, full_path, stat.st_size, etag, content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = cache_control_for(name)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def archived_proof(request, path):
+    """
+    Serves a proof from the archive's cold store (PROOF_ARCHIVE_ROOT). Needs
+    a signed URL (ArchivedRequestSerializer signs them) or a staff login,
+    like serve_media. No X-Accel-Redirect: nginx's internal location only
+    covers MEDIA_ROOT.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith('..') or name != path:
+        raise Http404
+    signed_name = ARCHIVE_SIGNING_PREFIX + name
+    if not (check_signature(signed_name, request.GET.get('exp'), request.GET.get('sig')) or staff_from_request(request)):
+        return JsonResponse({'error': 'You do not have permission to view this file.'}, status=403)
+    return stored_file_response(request, settings.PROOF_ARCHIVE_ROOT, name, accel_redirect=False)
+
+
+def media_file_response(request, full_path, size, etag, content_type):
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range.strip() != etag:
+        # the client's partial copy is stale, send the whole file
+        byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+    # Without MEDIA_SENDFILE_BACKEND the bytes go through Python, in chunks of
+    # the server's own kind: the ASGI handler has no sendfile and reads a sync
+    # iterator to the end first, a WSGI server does the same to an async one
+    file_chunks = aiter_file if isinstance(request, ASGIRequest) else iter_file
+    if byte_range is None:
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+        else:
+            response = StreamingHttpResponse(file_chunks(full_path, 0, size - 1), content_type=content_type)
+        response['Content-Length'] = size
+        return response
+
+    start, end = byte_range
+    body = file_chunks(full_path, start, end) if request.method == 'GET' else ()
+    response = StreamingHttpResponse(body, status=206, content_type=content_type)
+    response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    response['Content-Length'] = end - start + 1
+    return response
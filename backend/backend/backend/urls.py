@@ -19,6 +19,7 @@ from django.urls import path
 from django.urls import include  # Import include to include app URLs
 from django.conf import settings # <--- Import settings
 from django.conf.urls.static import static # <--- Import static
+from api.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,3 +28,5 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    urlpatterns += [path(settings.MEDIA_URL.lstrip('/') + '<path:path>', serve_media, name='serve_media')]
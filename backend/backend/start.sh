@@ -0,0 +1,11 @@
+#!/usr/bin/env bash
+# exit on error
+set -o errexit
+
+# ASGI: /api/requests/events/ streams and the async views need it (see settings)
+# Connections come from a per-process pool: persistent ones aren't reused under ASGI
+export DB_POOL="${DB_POOL:-1}"
+exec uvicorn backend.asgi:application \
+    --host 0.0.0.0 --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-1}" \
+    --proxy-headers --forwarded-allow-ips '*'
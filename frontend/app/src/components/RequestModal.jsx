@@ -103,7 +103,7 @@ const RequestModal = ({
                {request.eclearance_proof_url ? (
                  <div className="relative group">
                     <img 
-                      src={request.eclearance_proof_url} 
+                      src={request.eclearance_proof_thumb_url || request.eclearance_proof_url} 
                       alt="Clearance Proof" 
                       className="max-h-60 rounded-lg shadow-sm object-contain bg-white"
                     />
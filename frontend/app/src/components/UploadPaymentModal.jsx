@@ -85,7 +85,7 @@ const UploadPaymentModal = ({ isOpen, onClose, request, onSuccess }) => {
                 <p className="text-xs text-gray-500 mb-2 font-semibold">Current Receipt:</p>
                 <div className="relative w-full h-32 bg-gray-200 rounded-lg overflow-hidden group">
                     <img 
-                        src={request.payment_proof_url} 
+                        src={request.payment_proof_thumb_url || request.payment_proof_url} 
                         alt="Current Receipt" 
                         className="w-full h-full object-cover cursor-pointer transition-transform hover:scale-105"
                         onClick={() => window.open(request.payment_proof_url, '_blank')}
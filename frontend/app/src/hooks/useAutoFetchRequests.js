@@ -1,5 +1,5 @@
 // src/hooks/useAutoFetchRequests.js
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import axiosInstance from '../utils/axios';
 
 // Default polling interval is 5000ms (5 seconds)
@@ -7,15 +7,51 @@ const useAutoFetchRequests = (intervalMs = 5000) => {
   const [requests, setRequests] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // Change feed token from the last poll, "0" means "send me everything"
+  const tokenRef = useRef('0');
+  // ETag of the last response, lets unchanged polls come back as an empty 304
+  const etagRef = useRef(null);
+  // True while the server push stream is connected; polling pauses meanwhile
+  const streamOpenRef = useRef(false);
 
   const fetchRequests = useCallback(async (isBackground = false) => {
     try {
       // Only show loading spinner on the very first fetch
       if (!isBackground) setLoading(true);
-      
-      const response = await axiosInstance.get('/requests/');
-      setRequests(response.data);
-      
+
+      // Only rows that changed since the last poll come back, not the whole table
+      // If nothing changed since our last response the server answers 304 with no body
+      const response = await axiosInstance.get('/requests/', {
+        params: { since: tokenRef.current },
+        headers: etagRef.current ? { 'If-None-Match': etagRef.current } : {},
+        validateStatus: (code) => (code >= 200 && code < 300) || code === 304,
+      });
+      if (response.status === 304) {
+        if (!isBackground) setLoading(false);
+        return;
+      }
+      etagRef.current = response.headers.etag || null;
+      const { changed, deleted, token, reset } = response.data;
+      tokenRef.current = token;
+
+      if (reset) {
+        setRequests(changed);
+      } else if (changed.length || deleted.length) {
+        setRequests(prev => {
+          const gone = new Set(deleted);
+          const updates = new Map(changed.map(r => [r.id, r]));
+          // Updated rows keep their place, new rows go at the end
+          const merged = prev
+            .filter(r => !gone.has(r.id))
+            .map(r => {
+              const updated = updates.get(r.id);
+              updates.delete(r.id);
+              return updated || r;
+            });
+          return [...merged, ...updates.values()];
+        });
+      }
+
       if (!isBackground) setLoading(false);
     } catch (err) {
       console.error('Error fetching requests:', err);
@@ -28,13 +64,40 @@ const useAutoFetchRequests = (intervalMs = 5000) => {
     // 1. Initial Fetch
     fetchRequests(false);
 
-    // 2. Set up Polling (Background Fetch)
+    // 2. Listen for pushed status changes and only fetch when something happened
+    let events = null;
+    const accessToken = localStorage.getItem('access_token') || sessionStorage.getItem('access_token');
+    if (accessToken && typeof EventSource !== 'undefined') {
+      events = new EventSource(
+        `${axiosInstance.defaults.baseURL}/requests/events/?token=${encodeURIComponent(accessToken)}`
+      );
+      events.onopen = () => {
+        streamOpenRef.current = true;
+        fetchRequests(true); // catch up on anything missed while disconnected
+      };
+      events.onerror = () => { streamOpenRef.current = false; };
+      ['created', 'updated', 'deleted'].forEach(name =>
+        events.addEventListener(name, () => fetchRequests(true))
+      );
+    }
+
+    // 3. Set up Polling (Background Fetch). While the stream is up we still poll
+    // about once a minute, since events only reach clients on the same server process.
+    let ticks = 0;
+    const slowEvery = Math.max(1, Math.round(60000 / intervalMs));
     const intervalId = setInterval(() => {
-      fetchRequests(true); // true = don't trigger loading spinner
+      ticks += 1;
+      if (!streamOpenRef.current || ticks % slowEvery === 0) {
+        fetchRequests(true); // true = don't trigger loading spinner
+      }
     }, intervalMs);
 
-    // 3. Cleanup on unmount (stops the timer when you leave the page)
-    return () => clearInterval(intervalId);
+    // 4. Cleanup on unmount (stops the timer when you leave the page)
+    return () => {
+      clearInterval(intervalId);
+      if (events) events.close();
+      streamOpenRef.current = false;
+    };
   }, [fetchRequests, intervalMs]);
 
   // We return setRequests so the dashboard can still do "optimistic updates"
@@ -42,4 +105,4 @@ const useAutoFetchRequests = (intervalMs = 5000) => {
   return { requests, loading, error, setRequests, refresh: () => fetchRequests(true) };
 };
 
-export default useAutoFetchRequests;
\ No newline at end of file
+export default useAutoFetchRequests;
@@ -0,0 +1,45 @@
+// src/hooks/useRequestSearch.js
+import { useState, useEffect } from 'react';
+import axiosInstance from '../utils/axios';
+
+// Ranked server-side search (GET /requests/search/), best matches first.
+// Waits for typing to pause so every keystroke isn't a request.
+const useRequestSearch = (query, status, delayMs = 300) => {
+  const [results, setResults] = useState([]);
+  const [searching, setSearching] = useState(false);
+
+  useEffect(() => {
+    const term = query.trim();
+    if (!term) {
+      setResults([]);
+      setSearching(false);
+      return;
+    }
+
+    let cancelled = false;
+    setSearching(true);
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axiosInstance.get('/requests/search/', {
+          params: { q: term, status, page_size: 200 },
+        });
+        if (!cancelled) setResults(response.data.results);
+      } catch (err) {
+        console.error('Error searching requests:', err);
+        if (!cancelled) setResults([]);
+      } finally {
+        if (!cancelled) setSearching(false);
+      }
+    }, delayMs);
+
+    // a newer query (or unmount) makes this one's answer irrelevant
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query, status, delayMs]);
+
+  return { results, searching };
+};
+
+export default useRequestSearch;
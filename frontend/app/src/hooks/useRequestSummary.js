@@ -0,0 +1,22 @@
+// src/hooks/useRequestSummary.js
+import { useState, useEffect } from 'react';
+import axiosInstance from '../utils/axios';
+
+// Per-status / per-program counts and today's totals from GET /requests/summary/.
+// The server keeps them as running counters, so this is cheap to refetch
+// whenever `changeKey` (e.g. the live request list) changes.
+const useRequestSummary = (changeKey) => {
+  const [summary, setSummary] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    axiosInstance.get('/requests/summary/')
+      .then(response => { if (!cancelled) setSummary(response.data); })
+      .catch(err => console.error('Error fetching request summary:', err));
+    return () => { cancelled = true; };
+  }, [changeKey]);
+
+  return summary;
+};
+
+export default useRequestSummary;
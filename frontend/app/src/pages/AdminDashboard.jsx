@@ -16,6 +16,8 @@ import { Sidebar } from '../components/SideBar';
 import RequestModal from '../components/RequestModal';
 import PaymentVerificationModal from '../components/PaymentVerificationModal';
 import useAutoFetchRequests from '../hooks/useAutoFetchRequests';
+import useRequestSearch from '../hooks/useRequestSearch';
+import useRequestSummary from '../hooks/useRequestSummary';
 import StatsModal from '../components/StatsModal';
 import DeleteConfirmationModal from '../components/DeleteConfirmationModal'; 
 import toast from 'react-hot-toast';
@@ -39,6 +41,8 @@ const AdminDashboard = () => {
   const [searchQuery, setSearchQuery] = useState('');
 
   const { requests, loading, setRequests, refresh } = useAutoFetchRequests(1000);
+  const { results: searchResults } = useRequestSearch(searchQuery, activeTab);
+  const summary = useRequestSummary(requests);
 
   // --- MODAL HANDLERS ---
   const handleOpenReview = (request) => { 
@@ -104,7 +108,8 @@ const AdminDashboard = () => {
                 return;
             }
 
-            await Promise.all(idsToDelete.map(id => axiosInstance.delete(`/requests/${id}/`)));
+            // One round trip for the whole batch instead of one DELETE per row
+            await axiosInstance.post('/requests/bulk/delete/', { ids: idsToDelete });
             toast.success("All released history cleared.");
         } else {
             await axiosInstance.delete(`/requests/${deleteModal.itemId}/`);
@@ -117,28 +122,26 @@ const AdminDashboard = () => {
     }
   };
 
-  const filteredRequests = requests
+  // Searching: the server's ranked matches, shown with the latest copy of
+  // each row from the live list so status changes apply straight away
+  const latestById = new Map(requests.map(req => [req.id, req]));
+  const visibleRequests = searchQuery.trim()
+    ? searchResults.map(req => latestById.get(req.id) || req)
+    : requests;
+
+  const filteredRequests = visibleRequests
     .filter(req => req.request_status?.toLowerCase() === activeTab.toLowerCase())
-    .filter(req => {
-        if (!searchQuery) return true;
-        const lowerQuery = searchQuery.toLowerCase();
-        return (
-            req.request?.toLowerCase().includes(lowerQuery) ||
-            req.user_name?.toLowerCase().includes(lowerQuery) ||
-            String(req.user).toLowerCase().includes(lowerQuery)
-        );
-    })
     .sort((a, b) => {
-      if (activeTab === 'To Pay') {
+      if (activeTab === 'To Pay' && !searchQuery.trim()) {
         return (b.payment_proof_url ? 1 : 0) - (a.payment_proof_url ? 1 : 0); 
       }
       return 0; 
     });
 
-  const pendingRequests = requests.filter(req => req.request_status === 'Pending');
-  const topayRequests = requests.filter(req => req.request_status === 'To Pay');
-  const confirmedRequests = requests.filter(req => req.request_status === 'Confirmed');
-  const forreleaseRequests = requests.filter(req => req.request_status === 'Released');
+  // Badge counts from the server's counters; counted locally until they arrive
+  const statusCount = (status) => summary
+    ? summary.by_status[status] ?? 0
+    : requests.filter(req => req.request_status === status).length;
 
   if (loading) {
     return (
@@ -154,10 +157,10 @@ const AdminDashboard = () => {
       <Sidebar 
         activeTab={activeTab} 
         onTabChange={setActiveTab} 
-        pendingCount={pendingRequests.length} 
-        topayRequests={topayRequests.length} 
-        confirmedRequests={confirmedRequests.length} 
-        forreleaseRequests={forreleaseRequests.length}
+        pendingCount={statusCount('Pending')} 
+        topayRequests={statusCount('To Pay')} 
+        confirmedRequests={statusCount('Confirmed')} 
+        forreleaseRequests={statusCount('Released')}
         isOpen={isSidebarOpen} 
         onClose={() => setIsSidebarOpen(false)}
         onOpenStats={() => setIsStatsModalOpen(true)}